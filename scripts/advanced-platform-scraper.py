@@ -4,19 +4,19 @@ Advanced Platform Scraper - Multiple Sources
 סקרייפינג מתקדם ממקורות מרובים
 """
 
-import json
 import os
 import asyncio
 import aiohttp
 from datetime import datetime
 from typing import Dict, List, Optional, Set
-import pandas as pd
 import logging
 from dataclasses import dataclass, asdict
 from bs4 import BeautifulSoup
 import re
 from collections import defaultdict
 
+from serialization import CsvWriter, dump
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -356,16 +356,16 @@ class AdvancedPlatformScraper:
         }
         
         # שמירת הדוח
-        with open(f'comprehensive_sourcing_report_{timestamp}.json', 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        dump(report, f'comprehensive_sourcing_report_{timestamp}.json', pretty=True)
             
-        # שמירת נתוני חברות
-        companies_df = pd.DataFrame([asdict(c) for c in self.companies.values()])
-        companies_df.to_csv(f'companies_database_{timestamp}.csv', index=False)
-        
-        # שמירת נתוני מועמדים
-        candidates_df = pd.DataFrame([asdict(c) for c in self.candidates.values()])
-        candidates_df.to_csv(f'enhanced_candidates_{timestamp}.csv', index=False)
+        # שמירת נתוני חברות ומועמדים - כתיבה זורמת ישירות מה-dataclasses
+        with CsvWriter(f'companies_database_{timestamp}.csv', encoding='utf-8') as writer:
+            for company in self.companies.values():
+                writer.write(company)
+        
+        with CsvWriter(f'enhanced_candidates_{timestamp}.csv', encoding='utf-8') as writer:
+            for candidate in self.candidates.values():
+                writer.write(candidate)
         
         logger.info(f"✅ Comprehensive report saved!")
         
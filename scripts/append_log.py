@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Append-Only Log
+תשתית משותפת ליומנים append-only (יומן ה-WAL של האינטגרציה ויומן אירועי העלות) -
+חוצץ בזיכרון עם group commit לפי כמות/זמן, fsync לפי מדיניות, קריאה חוזרת שנעצרת
+בשורה החתוכה הראשונה וקוטמת את הזנב, וכתיבה אטומית של קבצים קטנים
+"""
+
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_OPS = 1000
+DEFAULT_GROUP_INTERVAL_MS = 50
+
+# מדיניות fsync: בכל כתיבת קבוצה, לכל היותר פעם ב-fsync_interval_ms, או לפי מערכת ההפעלה
+FSYNC_ALWAYS = 'always'
+FSYNC_INTERVAL = 'interval'
+FSYNC_NEVER = 'never'
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER)
+DEFAULT_FSYNC_INTERVAL_MS = 1000
+
+
+def fsync_dir(path: str) -> None:
+    """fsync לתיקייה כדי שה-rename עצמו יישמר (לא נתמך בכל מערכת)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """כתיבה אטומית: קובץ זמני, fsync ואז os.replace"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(os.path.dirname(path) or '.')
+
+
+class AppendLog(ABC):
+    """יומן שורות append-only עם group commit
+
+    append_line מצרף שורה (כולל ירידת השורה) לחוצץ בזיכרון; הכתיבה לקובץ
+    קורית כשמצטברות group_ops שורות, או לכל היותר group_interval_ms אחרי
+    השורה הראשונה בקבוצה - גם אם לא מגיעה שורה נוספת: thread רקע (נפתח
+    בשימוש הראשון) כותב קבוצה שהמועד שלה עבר, ובמדיניות interval גם מבצע
+    את ה-fsync שהגיע זמנו. fsync לפי fsync_policy - בקריסה אובדות לכל היותר
+    השורות של החלון האחרון. תת-מחלקות מגדירות את decode_line לפענוח שורה
+    בקריאה החוזרת.
+    """
+
+    def __init__(self, path: str, group_ops: int = DEFAULT_GROUP_OPS,
+                 group_interval_ms: float = DEFAULT_GROUP_INTERVAL_MS,
+                 fsync_policy: str = FSYNC_ALWAYS,
+                 fsync_interval_ms: float = DEFAULT_FSYNC_INTERVAL_MS):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy} (expected one of {', '.join(FSYNC_POLICIES)})")
+        self.path = path
+        self.group_ops = group_ops
+        self.group_interval = group_interval_ms / 1000
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.stats_counts = {'appended': 0, 'flushes': 0, 'fsyncs': 0, 'bytes': 0, 'replayed': 0, 'truncations': 0,
+                             'deadline_flushes': 0}
+        self._buffer = []
+        self._file = None
+        self._last_flush = time.monotonic()
+        self._last_fsync = self._last_flush
+        self._unsynced = False
+        # הכתיבה מה-thread של הקורא ומה-thread של המועדים - תחת אותה נעילה
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._deadline: Optional[float] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def append_line(self, line: bytes) -> None:
+        """רישום שורה (נכתבת לקובץ עם הקבוצה שלה)"""
+        with self._lock:
+            self._buffer.append(line)
+            self.stats_counts['appended'] += 1
+            if len(self._buffer) >= self.group_ops or time.monotonic() - self._last_flush >= self.group_interval:
+                self.flush()
+            elif len(self._buffer) == 1:
+                self._schedule(time.monotonic() + self.group_interval)
+
+    def flush(self, fsync: bool = False) -> None:
+        """כתיבת הקבוצה הממתינה לקובץ, ו-fsync לפי המדיניות (או fsync=True)"""
+        with self._lock:
+            now = time.monotonic()
+            self._last_flush = now
+            self._deadline = None
+            if self._buffer:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    self._file = open(self.path, 'ab')
+                data = b''.join(self._buffer)
+                self._buffer = []
+                self._file.write(data)
+                self._file.flush()
+                self._unsynced = True
+                self.stats_counts['flushes'] += 1
+                self.stats_counts['bytes'] += len(data)
+            if not self._unsynced:
+                return
+            if fsync or self.fsync_policy == FSYNC_ALWAYS or (
+                    self.fsync_policy == FSYNC_INTERVAL and now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+                self._unsynced = False
+                self.stats_counts['fsyncs'] += 1
+            elif self.fsync_policy == FSYNC_INTERVAL:
+                self._schedule(self._last_fsync + self.fsync_interval)
+
+    def _schedule(self, deadline: float) -> None:
+        """מועד לכתיבה/fsync הבאים (המוקדם מבין הממתינים)"""
+        if self._closed:
+            return
+        if self._deadline is None or deadline < self._deadline:
+            self._deadline = deadline
+            self._wakeup.notify()
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._run_flusher, name='append-log-flusher', daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        with self._lock:
+            while not self._closed:
+                if self._deadline is None:
+                    self._wakeup.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+                self.stats_counts['deadline_flushes'] += 1
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.error(f"Deadline flush of {self.path} failed: {e}")
+
+    @abstractmethod
+    def decode_line(self, line: bytes) -> Optional[Any]:
+        """פענוח שורה מהקובץ - None לשורה חתוכה או פגומה"""
+
+    def replay(self) -> Iterator[Any]:
+        """השורות השלמות ביומן לפי הסדר (מפוענחות)
+
+        הקריאה נעצרת בשורה החתוכה/הפגומה הראשונה (כתיבה שנקטעה בקריסה),
+        והיומן נקטם לסוף החלק התקין כדי ששורות חדשות לא ייכתבו אחרי זבל.
+        """
+        if not self.exists():
+            return
+        valid_end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                entry = self.decode_line(line) if line.endswith(b'\n') else None
+                if entry is None:
+                    break
+                valid_end += len(line)
+                self.stats_counts['replayed'] += 1
+                yield entry
+        size = os.path.getsize(self.path)
+        if valid_end < size:
+            logger.warning(f"Discarding {size - valid_end} bytes of torn log tail in {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def truncate(self) -> None:
+        """ריקון היומן (למשל אחרי שהמצב שהוא מתאר נשמר כ-snapshot)"""
+        with self._lock:
+            self._buffer = []
+            self._deadline = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._unsynced = False
+            if self.exists():
+                with open(self.path, 'r+b') as f:
+                    f.truncate(0)
+                    f.flush()
+                    os.fsync(f.fileno())
+                fsync_dir(os.path.dirname(self.path) or '.')
+            self.stats_counts['truncations'] += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush(fsync=self.fsync_policy != FSYNC_NEVER)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._closed = True
+            self._wakeup.notify()
+            flusher, self._flusher = self._flusher, None
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+        # יומן שממשיכים לכתוב אליו אחרי close פותח thread חדש
+        with self._lock:
+            self._closed = False
+
+    def stats(self) -> Dict:
+        return dict(self.stats_counts)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Arrow / Parquet Interchange
+פורמט ביניים עמודתי לקבצי מועמדים - עמודות רשימה נשארות רשימות (בלי חיבור ופיצול
+מחרוזות), קידוד מילון לעמודות חוזרות (חברה, מיקום, מקור), וקריאה עם בחירת עמודות
+וסינון שנדחף לרמת ה-row groups של הקובץ
+"""
+
+import dataclasses
+import logging
+import os
+import typing
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from serialization import dumps
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_COMPRESSION = 'zstd'
+# עמודות עם מעט ערכים שונים - נשמרות כמילון (אינדקסים + טבלת ערכים)
+DICTIONARY_COLUMNS = frozenset({
+    'company', 'current_company', 'location', 'source', 'seniority_level',
+    'enrichment_status', 'server', 'industry', 'size'
+})
+
+
+def _require_pyarrow() -> None:
+    if not HAS_PYARROW:
+        raise ImportError("pyarrow is required for Parquet/Arrow files (pip install pyarrow)")
+
+
+def arrow_type(hint, name: str = ''):
+    """טיפוס Arrow לרמז טיפוס של שדה (Optional נפתח, Dict נשמר כמחרוזת JSON)"""
+    origin = typing.get_origin(hint)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        return arrow_type(args[0], name) if len(args) == 1 else pa.string()
+    if origin in (list, List, set, tuple):
+        args = typing.get_args(hint)
+        return pa.list_(arrow_type(args[0]) if args else pa.string())
+    if hint is str:
+        return pa.dictionary(pa.int32(), pa.string()) if name in DICTIONARY_COLUMNS else pa.string()
+    if hint is bool:
+        return pa.bool_()
+    if hint is int:
+        return pa.int64()
+    if hint is float:
+        return pa.float64()
+    if hint in (datetime, date):
+        return pa.timestamp('us')
+    return pa.string()
+
+
+def schema_for_dataclass(cls) -> 'pa.Schema':
+    """סכמה מהשדות והטיפוסים של dataclass"""
+    _require_pyarrow()
+    hints = typing.get_type_hints(cls)
+    return pa.schema([
+        pa.field(field.name, arrow_type(hints.get(field.name, str), field.name))
+        for field in dataclasses.fields(cls)
+    ])
+
+
+def infer_schema(records: Sequence[Dict]) -> 'pa.Schema':
+    """סכמה מרשומות (dict) - עמודות ריקות כמחרוזת, עמודות חוזרות כמילון"""
+    _require_pyarrow()
+    inferred = pa.Table.from_pylist(list(records)).schema
+    fields = []
+    for field in inferred:
+        field_type = field.type
+        if pa.types.is_null(field_type) or pa.types.is_struct(field_type):
+            field_type = pa.string()
+        elif pa.types.is_list(field_type) and pa.types.is_null(field_type.value_type):
+            field_type = pa.list_(pa.string())
+        if field.name in DICTIONARY_COLUMNS and pa.types.is_string(field_type):
+            field_type = pa.dictionary(pa.int32(), pa.string())
+        fields.append(pa.field(field.name, field_type))
+    return pa.schema(fields)
+
+
+def _row(record) -> Dict:
+    if dataclasses.is_dataclass(record):
+        return {field.name: getattr(record, field.name) for field in dataclasses.fields(record)}
+    return record
+
+
+class ParquetWriter:
+    """כתיבה זורמת ל-Parquet במנות (row group לכל מנה), עם סכמה מפורשת או מהמנה הראשונה"""
+
+    def __init__(self, path: str, schema: Optional['pa.Schema'] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, compression: str = DEFAULT_COMPRESSION):
+        _require_pyarrow()
+        self.path = path
+        self.schema = schema
+        self.batch_size = batch_size
+        self.compression = compression
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._buffer: List[Dict] = []
+        self._writer = None
+
+    def _columns_of(self, predicate) -> List[str]:
+        return [field.name for field in self.schema if predicate(field.type)]
+
+    def _open(self, first) -> None:
+        if self.schema is None:
+            if dataclasses.is_dataclass(first):
+                self.schema = schema_for_dataclass(type(first))
+            else:
+                self.schema = infer_schema(self._buffer)
+        # עמודות מחרוזת שמגיעות כ-dict / timestamp שמגיע כמחרוזת ISO מומרים לפני הכתיבה
+        self._string_columns = self._columns_of(pa.types.is_string)
+        self._timestamp_columns = self._columns_of(pa.types.is_timestamp)
+        self._writer = pq.ParquetWriter(self._tmp_path, self.schema, compression=self.compression)
+
+    def _prepare(self, row: Dict) -> Dict:
+        for name in self._string_columns:
+            value = row.get(name)
+            if value is not None and not isinstance(value, str):
+                row[name] = dumps(value).decode('utf-8')
+        for name in self._timestamp_columns:
+            value = row.get(name)
+            if isinstance(value, str):
+                row[name] = datetime.fromisoformat(value) if value else None
+        return row
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self._open(self._first)
+        rows = [self._prepare(dict(row)) for row in self._buffer]
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+        self._buffer = []
+
+    def write(self, record) -> None:
+        if self.count == 0:
+            self._first = record
+        self._buffer.append(_row(record))
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def close(self) -> None:
+        if self._writer is None and not self._buffer and self.schema is None:
+            # אין רשומות ואין סכמה - אין קובץ
+            return
+        self._flush()
+        if self._writer is None:
+            self._open(None)
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> 'ParquetWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _filter_expression(filters):
+    if filters is None or isinstance(filters, pads.Expression):
+        return filters
+    # פורמט filters של pyarrow.parquet: [('location', '=', 'Tel Aviv'), ...]
+    return pq.filters_to_expression(filters)
+
+
+def read_batches(path: str, columns: Optional[Sequence[str]] = None, filters=None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, skip: int = 0) -> Iterator[List[Dict]]:
+    """קריאה במנות של רשומות (dict) - רק העמודות שביקשו, ורק השורות שעוברות את הסינון
+
+    עמודות שלא קיימות בקובץ מושמטות. הסינון נבדק קודם מול הסטטיסטיקות של כל
+    row group, כך ש-row groups שלא יכולים להתאים לא נקראים בכלל.
+    """
+    _require_pyarrow()
+    dataset = pads.dataset(path, format='parquet')
+    if columns is not None:
+        available = set(dataset.schema.names)
+        columns = [column for column in columns if column in available]
+    batches = dataset.to_batches(columns=columns, filter=_filter_expression(filters), batch_size=batch_size)
+    rows = (row for batch in batches for row in batch.to_pylist())
+    chunk = list(islice(rows, skip, skip + batch_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(rows, batch_size))
+
+
+def read_table(path: str, columns: Optional[Sequence[str]] = None, filters=None) -> 'pa.Table':
+    """טבלת Arrow שלמה (לניתוח עמודתי) עם בחירת עמודות וסינון"""
+    _require_pyarrow()
+    return pads.dataset(path, format='parquet').to_table(columns=columns, filter=_filter_expression(filters))
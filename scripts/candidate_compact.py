@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+"""
+Compact Candidate Representation
+ייצוג קומפקטי למועמדים - רשומות __slots__ עם מחרוזות משותפות, מזהים מספריים
+לכישורים/מקורות/תגיות ומאגר עמודות (arrays) לניתוח מרוכז
+"""
+
+import gc
+import importlib.util
+import json
+import logging
+import os
+import random
+import sys
+import tracemalloc
+from array import array
+from collections import Counter
+from collections.abc import MutableMapping, MutableSequence
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from candidate_normalize import dedup_keys
+
+logger = logging.getLogger(__name__)
+
+# השדות של EnrichedCandidate לפי סוג האחסון
+STRING_FIELDS = (
+    'id', 'name', 'email', 'phone', 'location',
+    'linkedin_url', 'github_url', 'twitter_handle', 'stackoverflow_id',
+    'current_title', 'current_company', 'seniority_level', 'enrichment_status',
+    'github_created_at', 'email_key', 'linkedin_key', 'name_key', 'company_key'
+)
+# שדות עם ערכים שחוזרים על עצמם בין מועמדים - שווה לשתף את המחרוזת
+SHARED_STRING_FIELDS = ('location', 'current_title', 'current_company', 'seniority_level', 'enrichment_status')
+LIST_FIELDS = ('skills', 'verified_skills', 'sources', 'tags')
+INT_FIELDS = ('github_stars', 'github_repos', 'stackoverflow_reputation')
+FLOAT_FIELDS = ('engagement_score', 'match_score', 'data_quality_score')
+DATETIME_FIELDS = ('created_at', 'updated_at')
+
+CANDIDATE_FIELDS = (
+    'id', 'name', 'email', 'phone', 'location',
+    'linkedin_url', 'github_url', 'twitter_handle', 'stackoverflow_id',
+    'current_title', 'current_company', 'years_experience', 'seniority_level',
+    'skills', 'verified_skills', 'skill_confidence',
+    'github_stars', 'github_repos', 'github_created_at',
+    'stackoverflow_reputation', 'engagement_score', 'match_score',
+    'sources', 'tags',
+    'created_at', 'updated_at', 'enrichment_status', 'data_quality_score',
+    'email_key', 'linkedin_key', 'name_key', 'company_key'
+)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# ערך חסר בעמודות מספריות שלמות (years_experience)
+_MISSING_INT = -(1 << 63)
+
+
+def _to_micros(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class Vocabulary:
+    """מילון משותף: מחרוזת <-> מזהה מספרי קטן (0 שמור ל-None)"""
+
+    def __init__(self):
+        self.strings: List[Optional[str]] = [None]
+        self.ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings) - 1
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        token = self.ids.get(value)
+        if token is None:
+            token = len(self.strings)
+            value = sys.intern(value)
+            self.ids[value] = token
+            self.strings.append(value)
+        return token
+
+    def decode(self, token: int) -> Optional[str]:
+        return self.strings[token]
+
+    def encode_many(self, values: Iterable[str]) -> array:
+        return array('I', (self.encode(v) for v in values))
+
+    def decode_many(self, tokens: Iterable[int]) -> List[str]:
+        strings = self.strings
+        return [strings[t] for t in tokens]
+
+
+# מילון ברירת מחדל משותף לכל הרשומות הקומפקטיות בתהליך
+SHARED_VOCABULARY = Vocabulary()
+
+
+class VocabList(MutableSequence):
+    """רשימת מחרוזות מעל array של מזהים - שינוי במקום (append, +=) נכתב למערך עצמו
+
+    on_change נקרא אחרי כל שינוי (תצוגה של מאגר העמודות רושמת כך את הרשימה
+    כערך שהוחלף). חיבור עם רשימה מחזיר list רגיל.
+    """
+
+    __slots__ = ('_vocab', '_tokens', '_on_change')
+
+    def __init__(self, vocab: Vocabulary, tokens: array,
+                 on_change: Optional[Callable[['VocabList'], None]] = None):
+        self._vocab = vocab
+        self._tokens = tokens
+        self._on_change = on_change
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change(self)
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._vocab.decode_many(self._tokens[index])
+        return self._vocab.strings[self._tokens[index]]
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            self._tokens[index] = self._vocab.encode_many(value)
+        else:
+            self._tokens[index] = self._vocab.encode(value)
+        self._changed()
+
+    def __delitem__(self, index) -> None:
+        del self._tokens[index]
+        self._changed()
+
+    def insert(self, index: int, value: str) -> None:
+        self._tokens.insert(index, self._vocab.encode(value))
+        self._changed()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, VocabList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other) -> List[str]:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> List[str]:
+        return list(other) + list(self)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class VocabDict(MutableMapping):
+    """מילון מחרוזת -> float מעל array של מזהים ו-array של ערכים (skill_confidence)"""
+
+    __slots__ = ('_vocab', '_keys', '_values', '_on_change')
+
+    def __init__(self, vocab: Vocabulary, keys: array, values: array,
+                 on_change: Optional[Callable[['VocabDict'], None]] = None):
+        self._vocab = vocab
+        self._keys = keys
+        self._values = values
+        self._on_change = on_change
+
+    def _position(self, key: str) -> int:
+        token = self._vocab.ids.get(key)
+        if token is not None:
+            try:
+                return self._keys.index(token)
+            except ValueError:
+                pass
+        raise KeyError(key)
+
+    def __getitem__(self, key: str) -> float:
+        return self._values[self._position(key)]
+
+    def __setitem__(self, key: str, value: float) -> None:
+        try:
+            self._values[self._position(key)] = value
+        except KeyError:
+            self._keys.append(self._vocab.encode(key))
+            self._values.append(value)
+        if self._on_change is not None:
+            self._on_change(self)
+
+    def __delitem__(self, key: str) -> None:
+        position = self._position(key)
+        del self._keys[position]
+        del self._values[position]
+        if self._on_change is not None:
+            self._on_change(self)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._vocab.decode_many(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+def candidate_fields(candidate) -> Dict:
+    """כל השדות של מועמד (EnrichedCandidate / CompactCandidate / CandidateView) כערכים רגילים
+
+    רשימות ומילונים מועתקים - מתאים לתמונת מצב לפני שינוי ולשמירה.
+    """
+    fields = {field: getattr(candidate, field) for field in CANDIDATE_FIELDS}
+    for field in LIST_FIELDS:
+        fields[field] = list(fields[field] or ())
+    fields['skill_confidence'] = dict(fields['skill_confidence'] or {})
+    return fields
+
+
+class CompactCandidate:
+    """רשומת מועמד עם __slots__ - תחליף קומפקטי ל-EnrichedCandidate
+
+    מחרוזות חוזרות (חברה, מיקום, תפקיד) משותפות, ורשימות נשמרות כ-array של
+    מזהים מהמילון המשותף. שדות רשימה ו-skill_confidence מוחזרים כתצוגות
+    (VocabList / VocabDict) מעל המערכים של הרשומה - append ועדכון במקום נשמרים.
+    """
+
+    __slots__ = (
+        'id', 'name', 'email', 'phone', 'location',
+        'linkedin_url', 'github_url', 'twitter_handle', 'stackoverflow_id',
+        'current_title', 'current_company', 'years_experience', 'seniority_level',
+        'github_stars', 'github_repos', 'github_created_at',
+        'stackoverflow_reputation', 'engagement_score', 'match_score',
+        'created_at', 'updated_at', 'enrichment_status', 'data_quality_score',
+        'email_key', 'linkedin_key', 'name_key', 'company_key',
+        '_skills', '_verified_skills', '_sources', '_tags',
+        '_confidence_keys', '_confidence_values', '_vocab'
+    )
+
+    def __init__(self, vocab: Optional[Vocabulary] = None, **fields):
+        self._vocab = vocab if vocab is not None else SHARED_VOCABULARY
+        for field in STRING_FIELDS:
+            setattr(self, field, fields.get(field))
+        self.years_experience = fields.get('years_experience')
+        for field in INT_FIELDS:
+            setattr(self, field, fields.get(field) or 0)
+        for field in FLOAT_FIELDS:
+            setattr(self, field, fields.get(field) or 0.0)
+        if self.enrichment_status is None:
+            self.enrichment_status = "pending"
+        if self.email_key is None:
+            self.email_key, self.linkedin_key, self.name_key, self.company_key = dedup_keys(
+                self.email, self.linkedin_url, self.name, self.current_company
+            )
+        for field in LIST_FIELDS:
+            setattr(self, field, fields.get(field) or [])
+        self.skill_confidence = fields.get('skill_confidence') or {}
+        now = datetime.now()
+        self.created_at = fields.get('created_at') or now
+        self.updated_at = fields.get('updated_at') or now
+
+    def __setattr__(self, field, value):
+        # מחרוזות חוזרות - עותק יחיד לכל התהליך
+        if field in SHARED_STRING_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        object.__setattr__(self, field, value)
+
+    @classmethod
+    def from_candidate(cls, candidate, vocab: Optional[Vocabulary] = None) -> 'CompactCandidate':
+        """המרה מ-EnrichedCandidate (או כל אובייקט עם אותם שדות)"""
+        return cls(vocab, **{field: getattr(candidate, field) for field in CANDIDATE_FIELDS})
+
+    @classmethod
+    def from_record(cls, record: Dict, vocab: Optional[Vocabulary] = None) -> 'CompactCandidate':
+        """המרה מרשומה שמורה (datetime כמחרוזת ISO)"""
+        fields = dict(record)
+        for field in DATETIME_FIELDS:
+            if isinstance(fields.get(field), str):
+                fields[field] = datetime.fromisoformat(fields[field])
+        return cls(vocab, **fields)
+
+    def __reduce__(self):
+        # pickle (למשל לשארדים במצב מקבילי) לפי ערכים - המזהים מקודדים מחדש במילון של התהליך המקבל
+        return _compact_from_fields, (candidate_fields(self),)
+
+    def _get_list(self, slot: str) -> VocabList:
+        return VocabList(self._vocab, getattr(self, slot))
+
+    def _set_list(self, slot: str, values: Iterable[str]) -> None:
+        object.__setattr__(self, slot, self._vocab.encode_many(values))
+
+    skills = property(lambda self: self._get_list('_skills'),
+                      lambda self, v: self._set_list('_skills', v))
+    verified_skills = property(lambda self: self._get_list('_verified_skills'),
+                               lambda self, v: self._set_list('_verified_skills', v))
+    sources = property(lambda self: self._get_list('_sources'),
+                       lambda self, v: self._set_list('_sources', v))
+    tags = property(lambda self: self._get_list('_tags'),
+                    lambda self, v: self._set_list('_tags', v))
+
+    @property
+    def skill_confidence(self) -> VocabDict:
+        return VocabDict(self._vocab, self._confidence_keys, self._confidence_values)
+
+    @skill_confidence.setter
+    def skill_confidence(self, value: Dict[str, float]) -> None:
+        object.__setattr__(self, '_confidence_keys', self._vocab.encode_many(value.keys()))
+        object.__setattr__(self, '_confidence_values', array('d', value.values()))
+
+    def to_record(self) -> Dict:
+        """רשומה לשמירה - אותו מבנה כמו asdict(EnrichedCandidate)"""
+        record = candidate_fields(self)
+        for field in DATETIME_FIELDS:
+            record[field] = record[field].isoformat()
+        return record
+
+    def to_candidate(self, factory):
+        """המרה חזרה למחלקת המועמד המלאה (למשל EnrichedCandidate)"""
+        return factory(**candidate_fields(self))
+
+    def __repr__(self) -> str:
+        return f"CompactCandidate(id={self.id!r}, name={self.name!r})"
+
+
+def _compact_from_fields(fields: Dict) -> CompactCandidate:
+    return CompactCandidate(**fields)
+
+
+class CandidateColumns:
+    """מאגר עמודות למועמדים - array לכל שדה, מתאים לניתוח מרוכז
+
+    מחרוזות נשמרות כמזהים במילון, רשימות כמערך שטוח + offsets, ותאריכים
+    כמיקרו-שניות. גישה לשורה מחזירה CandidateView בלי העתקת הנתונים.
+    """
+
+    def __init__(self, vocab: Optional[Vocabulary] = None):
+        self.vocab = vocab if vocab is not None else SHARED_VOCABULARY
+        self.strings: Dict[str, array] = {field: array('I') for field in STRING_FIELDS}
+        self.ints: Dict[str, array] = {field: array('q') for field in INT_FIELDS + ('years_experience',)}
+        self.floats: Dict[str, array] = {field: array('d') for field in FLOAT_FIELDS}
+        self.datetimes: Dict[str, array] = {field: array('q') for field in DATETIME_FIELDS}
+        # רשימות: ערכים שטוחים + offset התחלה לכל שורה (offsets[n] = סוף)
+        self.lists: Dict[str, Tuple[array, array]] = {
+            field: (array('I'), array('Q', [0])) for field in LIST_FIELDS + ('skill_confidence',)
+        }
+        self.confidence_values = array('d')
+        # ערכי רשימה שהוחלפו אחרי ההכנסה (המערך השטוח לא משנה גודל)
+        self._patched: Dict[Tuple[int, str], object] = {}
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append(self, candidate) -> int:
+        """הוספת מועמד (EnrichedCandidate / CompactCandidate / CandidateView)"""
+        vocab = self.vocab
+        for field, column in self.strings.items():
+            column.append(vocab.encode(getattr(candidate, field)))
+        for field, column in self.ints.items():
+            value = getattr(candidate, field)
+            column.append(_MISSING_INT if value is None else int(value))
+        for field, column in self.floats.items():
+            column.append(float(getattr(candidate, field) or 0.0))
+        for field, column in self.datetimes.items():
+            column.append(_to_micros(getattr(candidate, field)))
+        for field in LIST_FIELDS:
+            values, offsets = self.lists[field]
+            values.extend(vocab.encode(v) for v in getattr(candidate, field))
+            offsets.append(len(values))
+        confidence = getattr(candidate, 'skill_confidence')
+        keys, offsets = self.lists['skill_confidence']
+        keys.extend(vocab.encode(k) for k in confidence)
+        self.confidence_values.extend(confidence.values())
+        offsets.append(len(keys))
+
+        self._rows += 1
+        return self._rows - 1
+
+    def extend(self, candidates: Iterable) -> None:
+        for candidate in candidates:
+            self.append(candidate)
+
+    def get(self, row: int, field: str):
+        """ערך של שדה בשורה"""
+        if self._patched and (row, field) in self._patched:
+            return self._patched[(row, field)]
+        column = self.strings.get(field)
+        if column is not None:
+            return self.vocab.strings[column[row]]
+        column = self.floats.get(field)
+        if column is not None:
+            return column[row]
+        column = self.ints.get(field)
+        if column is not None:
+            value = column[row]
+            return None if value == _MISSING_INT else value
+        column = self.datetimes.get(field)
+        if column is not None:
+            return _from_micros(column[row])
+        # רשימות ומילונים: תצוגה מעל עותק של הטווח - שינוי במקום נרשם כערך שהוחלף
+        def patch(value):
+            self._patched[(row, field)] = value
+
+        if field == 'skill_confidence':
+            keys, offsets = self.lists[field]
+            start, end = offsets[row], offsets[row + 1]
+            return VocabDict(self.vocab, keys[start:end], self.confidence_values[start:end], patch)
+        if field in self.lists:
+            values, offsets = self.lists[field]
+            return VocabList(self.vocab, values[offsets[row]:offsets[row + 1]], patch)
+        raise AttributeError(field)
+
+    def set(self, row: int, field: str, value) -> None:
+        """עדכון שדה - שדות באורך קבוע נכתבים לעמודה, רשימות נשמרות בצד"""
+        if field in self.strings:
+            self.strings[field][row] = self.vocab.encode(value)
+        elif field in self.floats:
+            self.floats[field][row] = float(value or 0.0)
+        elif field in self.ints:
+            self.ints[field][row] = _MISSING_INT if value is None else int(value)
+        elif field in self.datetimes:
+            self.datetimes[field][row] = _to_micros(value)
+        elif field in self.lists:
+            self._patched[(row, field)] = value
+            return
+        else:
+            raise AttributeError(field)
+        self._patched.pop((row, field), None)
+
+    def column(self, field: str) -> memoryview:
+        """העמודה הגולמית של שדה קבוע-אורך (מזהים / מספרים) - בלי העתקה"""
+        for columns in (self.strings, self.ints, self.floats, self.datetimes):
+            if field in columns:
+                return memoryview(columns[field])
+        raise KeyError(field)
+
+    def value_counts(self, field: str) -> Counter:
+        """ספירת ערכים בעמודה (מחרוזת או רשימה) ישירות על המזהים"""
+        if field in self.strings:
+            tokens = Counter(self.strings[field])
+        elif field in LIST_FIELDS:
+            tokens = Counter(self.lists[field][0])
+            if self._patched:
+                # שורות שהוחלפו - הסרת הערכים המקוריים והוספת החדשים
+                values, offsets = self.lists[field]
+                for (row, patched_field), patched in self._patched.items():
+                    if patched_field != field:
+                        continue
+                    tokens.subtract(values[offsets[row]:offsets[row + 1]])
+                    tokens.update(self.vocab.encode(v) for v in patched)
+        else:
+            raise KeyError(field)
+        return Counter({self.vocab.strings[t]: n for t, n in tokens.items() if t and n > 0})
+
+    def __getitem__(self, row: int) -> 'CandidateView':
+        if row < 0:
+            row += self._rows
+        if not 0 <= row < self._rows:
+            raise IndexError(row)
+        return CandidateView(self, row)
+
+    def __iter__(self) -> Iterator['CandidateView']:
+        for row in range(self._rows):
+            yield CandidateView(self, row)
+
+    def nbytes(self) -> int:
+        """גודל העמודות בבתים (בלי המילון)"""
+        arrays = [
+            *self.strings.values(), *self.ints.values(), *self.floats.values(),
+            *self.datetimes.values(), self.confidence_values
+        ]
+        for values, offsets in self.lists.values():
+            arrays.extend((values, offsets))
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+class CandidateView:
+    """תצוגה של שורה במאגר העמודות שמתנהגת כמו EnrichedCandidate"""
+
+    __slots__ = ('_columns', '_row')
+
+    def __init__(self, columns: CandidateColumns, row: int):
+        object.__setattr__(self, '_columns', columns)
+        object.__setattr__(self, '_row', row)
+
+    def __getattr__(self, field):
+        return self._columns.get(self._row, field)
+
+    def __setattr__(self, field, value):
+        self._columns.set(self._row, field, value)
+
+    def to_record(self) -> Dict:
+        record = candidate_fields(self)
+        for field in DATETIME_FIELDS:
+            record[field] = record[field].isoformat()
+        return record
+
+    def __repr__(self) -> str:
+        return f"CandidateView(row={self._row}, id={self.id!r})"
+
+
+def _synthetic_lines(count: int, seed: int = 42) -> List[str]:
+    """שורות JSON סינתטיות כמו בסגמנטים של המאגר (חברות, מיקומים וכישורים חוזרים)"""
+    rng = random.Random(seed)
+    companies = ['Wix', 'Monday.com', 'Check Point', 'CyberArk', 'Fiverr', 'Snyk', 'Riskified',
+                 'Lemonade', 'JFrog', 'Payoneer'] + [f'Startup {i}' for i in range(300)]
+    locations = ['Tel Aviv, Israel', 'Haifa, Israel', 'Jerusalem, Israel', 'Herzliya, Israel',
+                 'Ramat Gan, Israel', 'Petah Tikva, Israel', 'Remote']
+    titles = ['Software Engineer', 'Senior Software Engineer', 'Backend Developer',
+              'Frontend Developer', 'DevOps Engineer', 'Data Scientist', 'Team Lead', 'VP R&D']
+    skills = ['python', 'javascript', 'typescript', 'react', 'node.js', 'go', 'java', 'kubernetes',
+              'docker', 'aws', 'gcp', 'sql', 'postgresql', 'mongodb', 'redis', 'kafka',
+              'machine learning', 'pytorch', 'terraform', 'graphql']
+    sources = ['linkedin', 'github', 'discord', 'stackoverflow', 'meetup']
+    tags = ['github-active', 'israeli-company', 'senior', 'open-source', 'high-quality']
+    created = datetime(2024, 1, 1)
+
+    lines = []
+    for i in range(count):
+        candidate_skills = rng.sample(skills, rng.randint(3, 10))
+        verified = candidate_skills[:rng.randint(1, len(candidate_skills))]
+        lines.append(json.dumps({
+            'id': f'{i:012x}',
+            'name': f'Candidate {i}',
+            'email': f'candidate{i}@example.com',
+            'phone': f'+9725{i % 100000000:08d}',
+            'location': rng.choice(locations),
+            'linkedin_url': f'https://linkedin.com/in/candidate-{i}',
+            'github_url': f'https://github.com/candidate{i}' if i % 3 == 0 else None,
+            'current_title': rng.choice(titles),
+            'current_company': rng.choice(companies),
+            'years_experience': rng.randint(0, 20),
+            'seniority_level': rng.choice(['junior', 'mid', 'senior', 'principal']),
+            'skills': candidate_skills,
+            'verified_skills': verified,
+            'skill_confidence': {s: round(rng.uniform(0.7, 1.0), 2) for s in verified},
+            'github_stars': rng.randint(0, 500),
+            'engagement_score': rng.random(),
+            'sources': rng.sample(sources, rng.randint(1, 3)),
+            'tags': rng.sample(tags, rng.randint(0, 3)),
+            'created_at': (created + timedelta(seconds=i)).isoformat(),
+            'updated_at': (created + timedelta(seconds=i, microseconds=rng.randint(0, 999999))).isoformat(),
+            'enrichment_status': 'completed',
+            'data_quality_score': rng.random()
+        }))
+    return lines
+
+
+def _traced_bytes(build) -> Tuple[int, object]:
+    """כמות הזיכרון שנשארת מוקצית אחרי בניית מבנה"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def _load_enriched_candidate():
+    """טעינת EnrichedCandidate מסקריפט האינטגרציה (שם הקובץ מכיל מקפים)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'integrate-candidates-to-database.py')
+    spec = importlib.util.spec_from_file_location('integrate_candidates_to_database', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.EnrichedCandidate
+
+
+def benchmark_memory(count: int = 50000, seed: int = 42) -> Dict:
+    """השוואת זיכרון: dataclass הנוכחי מול __slots__ קומפקטי ומאגר עמודות"""
+    EnrichedCandidate = _load_enriched_candidate()
+    # כל מבנה נבנה מפרסור השורות - המחרוזות נוצרות בתוך המדידה כמו בטעינה אמיתית
+    lines = _synthetic_lines(count, seed)
+
+    def build_dataclasses():
+        candidates = []
+        for line in lines:
+            record = json.loads(line)
+            for field in DATETIME_FIELDS:
+                record[field] = datetime.fromisoformat(record[field])
+            candidates.append(EnrichedCandidate(**record))
+        return candidates
+
+    def build_compact():
+        vocab = Vocabulary()
+        return vocab, [CompactCandidate.from_record(json.loads(line), vocab) for line in lines]
+
+    def build_columns():
+        columns = CandidateColumns(Vocabulary())
+        for line in lines:
+            columns.append(CompactCandidate.from_record(json.loads(line), columns.vocab))
+        return columns
+
+    results = {}
+    for layout, build in (('dataclass', build_dataclasses),
+                          ('slots_compact', build_compact),
+                          ('columnar', build_columns)):
+        size, built = _traced_bytes(build)
+        results[layout] = {
+            'total_mb': round(size / (1024 * 1024), 2),
+            'bytes_per_candidate': round(size / count, 1)
+        }
+        del built
+
+    baseline = results['dataclass']['bytes_per_candidate']
+    for layout in results.values():
+        layout['ratio_vs_dataclass'] = round(layout['bytes_per_candidate'] / baseline, 3)
+
+    return {'candidates': count, 'seed': seed, 'layouts': results}
+
+
+def main():
+    """בנצ'מרק זיכרון - python candidate_compact.py [מספר מועמדים]"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    result = benchmark_memory(count)
+
+    output_file = f'candidate_memory_benchmark_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    for layout, stats in result['layouts'].items():
+        logger.info(f"{layout}: {stats['bytes_per_candidate']} bytes/candidate "
+                    f"({stats['ratio_vs_dataclass']:.1%} of dataclass)")
+    logger.info(f"Benchmark saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
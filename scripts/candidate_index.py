@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Candidate Dedup Index
+אינדקס לזיהוי כפילויות מועמדים - מפות hash מדויקות ואינדקס חסימה
+"""
+
+import gc
+import re
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# אותיות Soundex לפי קבוצות צליל
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+_TOKEN_SPLIT = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def soundex(token: str) -> str:
+    """קוד פונטי (Soundex) לטוקן - לטוקנים שאינם לטיניים מוחזרת תחילית"""
+    if not token:
+        return ""
+    if not token[0].isascii() or not token[0].isalpha():
+        return token[:4]
+
+    first = token[0]
+    code = first.upper()
+    last = _SOUNDEX_CODES.get(first, '')
+    for char in token[1:]:
+        digit = _SOUNDEX_CODES.get(char, '')
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in 'hw':
+            last = digit
+    return code.ljust(4, '0')
+
+
+def name_tokens(name: Optional[str]) -> List[str]:
+    """פיצול שם לטוקנים משמעותיים"""
+    if not name:
+        return []
+    return [t for t in _TOKEN_SPLIT.split(name.lower()) if len(t) >= 2]
+
+
+def company_block(company: Optional[str]) -> str:
+    """מפתח חסימה לחברה - תחילית של הטוקן הראשון"""
+    tokens = name_tokens(company)
+    return tokens[0][:4] if tokens else ""
+
+
+def blocking_keys(name: Optional[str], company: Optional[str]) -> Set[str]:
+    """מפתחות חסימה לשם + חברה (טוקן מדויק וקוד פונטי לכל טוקן)"""
+    company_key = company_block(company)
+    if not company_key:
+        # בלי חברה אין בדיקת שם + חברה
+        return set()
+
+    keys = set()
+    for token in name_tokens(name):
+        keys.add(f"t:{token}|{company_key}")
+        keys.add(f"p:{soundex(token)}|{company_key}")
+    return keys
+
+
+class UnionFind:
+    """Union-Find עם דחיסת מסלולים ואיחוד לפי דרגה (מערכים - גם למיליוני איברים)"""
+
+    def __init__(self, size: int = 0):
+        self.parent = array('q', range(size))
+        self.rank = array('B', bytes(size))
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self) -> int:
+        """הוספת איבר חדש - מחזיר את האינדקס שלו"""
+        self.parent.append(len(self.parent))
+        self.rank.append(0)
+        return len(self.parent) - 1
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        # דחיסת מסלול
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a: int, b: int) -> int:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+        return root_a
+
+
+class DedupIndex:
+    """אינדקס כפילויות מתוחזק: email, LinkedIn ובלוקים של שם + חברה"""
+
+    def __init__(self):
+        self.by_email: Dict[str, str] = {}
+        self.by_linkedin: Dict[str, str] = {}
+        self.blocks: Dict[str, Set[str]] = defaultdict(set)
+
+        # המפתחות שנרשמו לכל מועמד - לצורך עדכון אחרי מיזוג
+        self._keys: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {}
+        # סדר הכנסה - כדי לשמור על "ההתאמה הראשונה" כמו בסריקה הליניארית
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, candidate_id: str) -> bool:
+        return candidate_id in self._keys
+
+    def add(self, candidate) -> None:
+        """רישום מועמד באינדקס (או רישום מחדש אחרי שינוי)"""
+        # מפתחות מנורמלים שנשמרו על הרשומה - בלי חישוב מחדש
+        self._register(candidate.id, candidate.email_key, candidate.linkedin_key,
+                       tuple(blocking_keys(candidate.name, candidate.current_company)))
+
+    def add_columns(self, ids: Sequence[str], email_keys: Sequence[str], linkedin_keys: Sequence[str],
+                    names: Sequence[Optional[str]], companies: Sequence[Optional[str]]) -> None:
+        """רישום מועמדים רבים מעמודות (למשל קבצי האינדקס של המאגר) - כמו add לכל שורה לפי הסדר
+
+        בלי אובייקט לכל רשומה, ומפתח החברה וקוד ה-Soundex מחושבים פעם אחת
+        לכל חברה וטוקן שונים. ה-GC מושהה בזמן הבנייה - מיליוני אובייקטים
+        חדשים שכולם נשארים חיים מפעילים אותו שוב ושוב בלי לשחרר כלום.
+        """
+        company_blocks: Dict[Optional[str], str] = {}
+        codes: Dict[str, str] = {}
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for candidate_id, email_key, linkedin_key, name, company in zip(
+                    ids, email_keys, linkedin_keys, names, companies):
+                company_key = company_blocks.get(company)
+                if company_key is None:
+                    company_key = company_blocks[company] = company_block(company)
+                block_keys = ()
+                if company_key:
+                    keys = []
+                    for token in name_tokens(name):
+                        code = codes.get(token)
+                        if code is None:
+                            code = codes[token] = soundex(token)
+                        keys.append(f"t:{token}|{company_key}")
+                        keys.append(f"p:{code}|{company_key}")
+                    block_keys = tuple(dict.fromkeys(keys))
+                self._register(candidate_id, email_key, linkedin_key, block_keys)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _register(self, candidate_id: str, email_key: str, linkedin_key: str, block_keys: Tuple[str, ...]) -> None:
+        if candidate_id in self._keys:
+            self.remove(candidate_id, keep_order=True)
+        else:
+            self._order[candidate_id] = self._next_order
+            self._next_order += 1
+
+        # הרשומה הראשונה זוכה - בדיוק כמו בסריקה הליניארית
+        if email_key:
+            self.by_email.setdefault(email_key, candidate_id)
+        if linkedin_key:
+            self.by_linkedin.setdefault(linkedin_key, candidate_id)
+        for key in block_keys:
+            self.blocks[key].add(candidate_id)
+
+        self._keys[candidate_id] = (email_key, linkedin_key, block_keys)
+
+    def update(self, candidate) -> None:
+        """סנכרון האינדקס אחרי מיזוג"""
+        self.add(candidate)
+
+    def remove(self, candidate_id: str, keep_order: bool = False) -> None:
+        """הסרת מועמד מהאינדקס"""
+        keys = self._keys.pop(candidate_id, None)
+        if keys is None:
+            return
+        email_key, linkedin_key, block_keys = keys
+
+        if email_key and self.by_email.get(email_key) == candidate_id:
+            del self.by_email[email_key]
+        if linkedin_key and self.by_linkedin.get(linkedin_key) == candidate_id:
+            del self.by_linkedin[linkedin_key]
+        for key in block_keys:
+            block = self.blocks.get(key)
+            if block is not None:
+                block.discard(candidate_id)
+                if not block:
+                    del self.blocks[key]
+
+        if not keep_order:
+            self._order.pop(candidate_id, None)
+
+    @staticmethod
+    def identity_keys(candidate) -> Set[str]:
+        """כל המפתחות שדרכם מועמד יכול להיות מזוהה ככפול של אחר"""
+        keys = set(blocking_keys(candidate.name, candidate.current_company))
+        if candidate.email_key:
+            keys.add(f"e:{candidate.email_key}")
+        if candidate.linkedin_key:
+            keys.add(f"l:{candidate.linkedin_key}")
+        return keys
+
+    def lookup_exact(self, email_key: str, linkedin_key: str) -> List[str]:
+        """התאמות מדויקות לפי מפתחות email ו-LinkedIn מנורמלים"""
+        matches = []
+        if email_key:
+            match = self.by_email.get(email_key)
+            if match:
+                matches.append(match)
+        if linkedin_key:
+            match = self.by_linkedin.get(linkedin_key)
+            if match:
+                matches.append(match)
+        return matches
+
+    def block_candidates(self, name: Optional[str], company: Optional[str]) -> Set[str]:
+        """מועמדים מאותו בלוק - רק מולם מריצים השוואת שם + חברה"""
+        ids: Set[str] = set()
+        for key in blocking_keys(name, company):
+            block = self.blocks.get(key)
+            if block:
+                ids.update(block)
+        return ids
+
+    def first_in_order(self, candidate_ids: Iterable[str]) -> Optional[str]:
+        """המועמד שנרשם ראשון מבין ההתאמות"""
+        return min(candidate_ids, key=lambda cid: self._order.get(cid, 0), default=None)
+
+    def stats(self) -> Dict[str, int]:
+        """סטטיסטיקות אינדקס"""
+        return {
+            'indexed_candidates': len(self._keys),
+            'email_keys': len(self.by_email),
+            'linkedin_keys': len(self.by_linkedin),
+            'blocks': len(self.blocks),
+            'largest_block': max((len(b) for b in self.blocks.values()), default=0)
+        }
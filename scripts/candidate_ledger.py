@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Ingestion Ledger
+ספר קבצים שנקלטו - טביעת אצבע (גודל, mtime, hash תוכן) לכל קובץ קלט, כך שקובץ
+שלא השתנה מדולג וקובץ שנוספו לו שורות ממשיך מהמקום שבו הריצה הקודמת עצרה
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from append_log import atomic_write
+
+logger = logging.getLogger(__name__)
+
+LEDGER_VERSION = 1
+HASH_BLOCK_SIZE = 1 << 20
+
+SKIP = 'skip'
+RESUME = 'resume'
+FULL = 'full'
+
+
+@dataclass
+class FileFingerprint:
+    """מצב קובץ בסוף הקליטה האחרונה
+
+    offset - הבית שממנו ממשיכים: סוף הקובץ ב-CSV (רק אם מסתיים בשורה שלמה),
+    ה-']' הסוגר במערך JSON; None אם אי אפשר להמשיך ושינוי מחייב קליטה מלאה.
+    prefix_sha256 - hash של הבתים עד offset, לזיהוי שהתוכן הקודם לא השתנה.
+    """
+    size: int
+    mtime: float
+    sha256: str
+    rows: int
+    offset: Optional[int]
+    prefix_sha256: Optional[str]
+    ingested_at: str
+
+
+@dataclass
+class IngestionPlan:
+    """מה לעשות עם קובץ בריצה הנוכחית"""
+    path: str
+    action: str
+    offset: int = 0      # CSV - בית ההתחלה (אחרי הכותרת)
+    skip_rows: int = 0   # JSON - רשומות שכבר נקלטו
+    previous_rows: int = 0
+    recovered_rows: int = 0  # רשומות אחרי נקודת ההתחלה שכבר שוחזרו מיומן ה-WAL
+    size: int = 0
+    mtime: float = 0.0
+
+
+def _digests(path: str, cuts: Iterable[int]) -> Dict[int, str]:
+    """sha256 של הקידומות באורכי cuts במעבר קריאה יחיד (-1 = כל הקובץ)"""
+    cuts = sorted({cut for cut in cuts if cut >= 0})
+    results: Dict[int, str] = {}
+    hasher = hashlib.sha256()
+    position = 0
+    with open(path, 'rb') as f:
+        for cut in cuts:
+            while position < cut:
+                block = f.read(min(HASH_BLOCK_SIZE, cut - position))
+                if not block:
+                    break
+                hasher.update(block)
+                position += len(block)
+            results[cut] = hasher.hexdigest()
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+    results[-1] = hasher.hexdigest()
+    return results
+
+
+def resume_offset(path: str, size: int) -> Optional[int]:
+    """הבית שממנו אפשר להמשיך אחרי הוספת שורות (None - הקובץ לא מסתיים במקום בטוח)"""
+    if size == 0:
+        return None
+    tail_size = min(size, 64)
+    with open(path, 'rb') as f:
+        f.seek(size - tail_size)
+        tail = f.read(tail_size)
+    if path.endswith('.csv'):
+        return size if tail.endswith(b'\n') else None
+    if path.endswith('.json'):
+        stripped = tail.rstrip()
+        if stripped.endswith(b']'):
+            return size - (len(tail) - len(stripped)) - 1
+    return None
+
+
+def _continues_array(path: str, offset: int) -> bool:
+    """ב-JSON: התוכן החדש אחרי offset מתחיל ב-',' (רשומות נוספו למערך)"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return f.read(64).lstrip().startswith(b',')
+
+
+class IngestionLedger:
+    """ספר הקליטה - נשמר ליד המאגר, ומתעדכן רק אחרי שהמאגר עצמו נשמר"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, FileFingerprint] = {}
+        self.pending: Dict[str, FileFingerprint] = {}
+        self.counts = {'skipped': 0, 'resumed': 0, 'processed': 0}
+        self.rows_skipped = 0
+
+    @staticmethod
+    def key(file_path: str) -> str:
+        return os.path.abspath(file_path)
+
+    def plan(self, file_path: str) -> IngestionPlan:
+        """החלטה לקובץ: דילוג, המשך מה-offset האחרון או קליטה מלאה"""
+        stat = os.stat(file_path)
+        plan = IngestionPlan(file_path, FULL, size=stat.st_size, mtime=stat.st_mtime)
+        previous = self.files.get(self.key(file_path))
+        if previous is not None:
+            if stat.st_size == previous.size and stat.st_mtime == previous.mtime:
+                plan.action = SKIP
+            elif stat.st_size == previous.size:
+                # mtime השתנה (למשל העתקה מחדש) - התוכן מכריע
+                if _digests(file_path, [])[-1] == previous.sha256:
+                    plan.action = SKIP
+            elif stat.st_size > previous.size and previous.offset is not None:
+                prefix = _digests(file_path, [previous.offset])[previous.offset]
+                if prefix == previous.prefix_sha256 and (
+                        file_path.endswith('.csv') or _continues_array(file_path, previous.offset)):
+                    plan.action = RESUME
+                    plan.previous_rows = previous.rows
+                    if file_path.endswith('.csv'):
+                        plan.offset = previous.offset
+                    else:
+                        plan.skip_rows = previous.rows
+
+        if plan.action == SKIP:
+            self.counts['skipped'] += 1
+            self.rows_skipped += previous.rows
+            logger.info(f"Skipping unchanged file: {file_path}")
+        elif plan.action == RESUME:
+            self.counts['resumed'] += 1
+            logger.info(f"Resuming {file_path} after {plan.previous_rows} rows")
+        else:
+            self.counts['processed'] += 1
+        return plan
+
+    def record(self, plan: IngestionPlan, rows: int) -> None:
+        """טביעת האצבע של קובץ שנקלט - נכנסת לספר רק ב-save
+
+        הטביעה נלקחת לפי הגודל בתחילת הקליטה: שורות שנוספו תוך כדי קריאה
+        ייקלטו שוב בריצה הבאה ויאוחדו ככפילויות.
+        """
+        offset = resume_offset(plan.path, plan.size)
+        digests = _digests(plan.path, [plan.size] if offset is None else [offset, plan.size])
+        self.pending[self.key(plan.path)] = FileFingerprint(
+            size=plan.size,
+            mtime=plan.mtime,
+            sha256=digests[plan.size],
+            rows=plan.previous_rows + plan.recovered_rows + rows,
+            offset=offset,
+            prefix_sha256=digests.get(offset) if offset is not None else None,
+            ingested_at=datetime.now().isoformat()
+        )
+
+    def save(self) -> None:
+        """שמירה אטומית - אחרי שהרשומות מהקבצים כבר נמצאות במאגר"""
+        self.files.update(self.pending)
+        self.pending = {}
+        data = {
+            'version': LEDGER_VERSION,
+            'files': {path: asdict(fingerprint) for path, fingerprint in sorted(self.files.items())}
+        }
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        atomic_write(self.path, json.dumps(data, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    def summary(self) -> Dict:
+        return {
+            'files_skipped': self.counts['skipped'],
+            'files_resumed': self.counts['resumed'],
+            'files_processed': self.counts['processed'],
+            'rows_skipped': self.rows_skipped,
+            'tracked_files': len(self.files) + len(set(self.pending) - set(self.files))
+        }
+
+    @classmethod
+    def load(cls, path: str) -> 'IngestionLedger':
+        ledger = cls(path)
+        if not os.path.exists(path):
+            return ledger
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingestion ledger {path}: {e}")
+            return ledger
+        if data.get('version') != LEDGER_VERSION:
+            return ledger
+        ledger.files = {path: FileFingerprint(**entry) for path, entry in data.get('files', {}).items()}
+        return ledger
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+MinHash / LSH Index for Near-Duplicate Candidates
+אינדקס LSH לזיהוי מועמדים כמעט-כפולים לפי n-grams של שם וחברה
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from candidate_store import CandidateStore
+
+logger = logging.getLogger(__name__)
+
+# הראשוני הגדול ביותר מתחת ל-2^32: a*h+b נכנס ב-uint64 והחתימה ב-uint32
+_PRIME = 4294967291
+# גרסת משפחת ה-hash - אינדקס שמור מגרסה אחרת נבנה מחדש
+HASH_VERSION = 2
+LSH_INDEX_FILE = "lsh_index.npz"
+# מכפיל (אי-זוגי) לקיפול שורות הפס לטוקן uint64
+_TOKEN_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_DEFAULT_CAPACITY = 1024
+# שורות שנוספו מאז הבנייה האחרונה של הדליים - מעבר לזה (ולגודל החלק הממוין) בונים מחדש
+_MIN_PENDING_ROWS = 4096
+_REBUILD_CHUNK_ROWS = 65536
+# סף מחמיר יותר לניקוי אופליין מאשר לשליפת מועמדים בזמן אינטגרציה
+OFFLINE_PAIR_THRESHOLD = 0.7
+
+
+def char_ngrams(text: Optional[str], n: int = 3) -> Set[str]:
+    """n-grams של תווים (עם ריפוד) לטקסט מנורמל"""
+    if not text:
+        return set()
+    text = ' '.join(text.lower().split())
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class MinHashLSH:
+    """אינדקס MinHash עם LSH בפסים (bands x rows)
+
+    מספר הפסים והשורות קובע את סף הדמיון האפקטיבי:
+    יותר פסים - recall גבוה יותר, יותר שורות - precision גבוה יותר.
+
+    אחסון עמודתי: החתימות במטריצת uint32 (שורה לכל מועמד, גדילה בהכפלה), וכל פס
+    של חתימה מקוצר לטוקן uint64 (כולל מספר הפס). הדליים הם מערך ממוין של כל
+    הטוקנים ושורותיהם - שליפה ב-searchsorted; הוספות נכנסות למילון ממתין קטן
+    ומתמזגות לבנייה מחדש של המערך כשהוא גדל כמו החלק הממוין. שורה של מועמד
+    שהוסר או עודכן מסומנת כמתה ונעלמת בבנייה הבאה. אחרי load המערך הממוין
+    נבנה רק בשליפה הראשונה.
+    """
+
+    def __init__(self, bands: int = 20, rows: int = 3, ngram: int = 3, seed: int = 42,
+                 max_bucket_size: int = 1000):
+        self.bands = bands
+        self.rows = rows
+        self.ngram = ngram
+        self.seed = seed
+        self.max_bucket_size = max_bucket_size
+
+        rng = random.Random(seed)
+        self.num_perm = bands * rows
+        perms = [(rng.randint(1, _PRIME - 1), rng.randint(0, _PRIME - 1)) for _ in range(self.num_perm)]
+        # עמודות (num_perm, 1) - כל הפרמוטציות מול כל ה-hashes בפעולה אחת
+        self._a = np.array([a for a, _ in perms], dtype=np.uint64).reshape(-1, 1)
+        self._b = np.array([b for _, b in perms], dtype=np.uint64).reshape(-1, 1)
+        # ערך התחלתי שונה לכל פס - אותם ערכים בפסים שונים נותנים טוקנים שונים
+        self._band_salt = np.array([rng.getrandbits(64) for _ in range(bands)], dtype=np.uint64)
+
+        # שורה -> מפתח / טביעת אצבע (None לשורה מתה), ומפתח -> שורה
+        self._keys: List[Optional[str]] = []
+        self._fingerprints: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix = np.empty((_DEFAULT_CAPACITY, self.num_perm), dtype=np.uint32)
+        # הדליים: טוקנים ממוינים ושורותיהם, ושורות שנוספו מאז הבנייה האחרונה לפי טוקן
+        self._sorted_tokens = np.empty(0, dtype=np.uint64)
+        self._sorted_rows = np.empty(0, dtype=np.int32)
+        self._indexed_rows = 0
+        self._pending: Dict[int, List[int]] = defaultdict(list)
+        # המערך הממוין לא משקף את המטריצה - נבנה מחדש לפני השליפה הבאה
+        self._buckets_stale = False
+        # דור המאגר שהאינדקס השמור תואם לו (None - לא ידוע)
+        self.generation: Optional[int] = None
+
+    @property
+    def threshold(self) -> float:
+        """סף Jaccard משוער שבו הסיכוי להתנגשות הוא 50%"""
+        return (1.0 / self.bands) ** (1.0 / self.rows)
+
+    def shingles(self, name: Optional[str], company: Optional[str]) -> Set[str]:
+        """n-grams של שם וחברה (עם קידומת כדי שלא יתערבבו)"""
+        return (
+            {f"n:{g}" for g in char_ngrams(name, self.ngram)} |
+            {f"c:{g}" for g in char_ngrams(company, self.ngram)}
+        )
+
+    def signature(self, name: Optional[str], company: Optional[str]) -> Optional[np.ndarray]:
+        """חישוב חתימת MinHash (מערך uint32 באורך num_perm)"""
+        shingles = self.shingles(name, company)
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def fingerprint(name: Optional[str], company: Optional[str]) -> str:
+        """טביעת אצבע לזיהוי שינוי בשם/חברה בין ריצות"""
+        text = f"{(name or '').lower()}|{(company or '').lower()}"
+        return hashlib.md5(text.encode('utf-8')).hexdigest()[:12]
+
+    def _band_tokens(self, signatures: np.ndarray) -> np.ndarray:
+        """טוקן uint64 לכל פס של כל חתימה - (n, num_perm) -> (n, bands)"""
+        values = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        tokens = np.broadcast_to(self._band_salt, values.shape[:2]).copy()
+        for row in range(self.rows):
+            tokens *= _TOKEN_MULTIPLIER
+            tokens += values[:, :, row]
+        return tokens
+
+    def band_tokens(self, signature: Optional[np.ndarray]) -> List[int]:
+        """טוקני הפסים של חתימה - שני מועמדים נבדקים זה מול זה רק אם חולקים אחד"""
+        if signature is None:
+            return []
+        return self._band_tokens(signature.reshape(1, -1))[0].tolist()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def keys(self) -> List[str]:
+        return list(self._rows)
+
+    def get_signature(self, key: str) -> Optional[np.ndarray]:
+        """החתימה השמורה של מועמד (None אם אינו באינדקס)"""
+        row = self._rows.get(key)
+        return None if row is None else self._matrix[row]
+
+    def get_fingerprint(self, key: str) -> Optional[str]:
+        row = self._rows.get(key)
+        return None if row is None else self._fingerprints[row]
+
+    def add(self, key: str, name: Optional[str], company: Optional[str],
+            signature: Optional[np.ndarray] = None) -> None:
+        """הוספה (או עדכון) של מועמד לאינדקס
+
+        signature - חתימה שכבר חושבה לאותו שם וחברה (למשל בבדיקת הכפילויות).
+        """
+        fingerprint = self.fingerprint(name, company)
+        if self.get_fingerprint(key) == fingerprint:
+            return
+        if key in self._rows:
+            self.remove(key)
+
+        if signature is None:
+            signature = self.signature(name, company)
+        if signature is None:
+            return
+        self._insert(key, signature, fingerprint)
+
+    def put(self, key: str, signature: np.ndarray, fingerprint: str) -> None:
+        """הכנסת חתימה מחושבת מראש (למשל מ-worker אחר או מקובץ שמור)"""
+        if key in self._rows:
+            self.remove(key)
+        self._insert(key, signature, fingerprint)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._matrix)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity = max(capacity * 2, _DEFAULT_CAPACITY)
+        grown = np.empty((capacity, self.num_perm), dtype=np.uint32)
+        grown[:len(self._keys)] = self._matrix[:len(self._keys)]
+        self._matrix = grown
+
+    def _insert(self, key: str, signature: np.ndarray, fingerprint: str) -> None:
+        row = len(self._keys)
+        self._reserve(row + 1)
+        self._matrix[row] = signature
+        self._keys.append(key)
+        self._fingerprints.append(fingerprint)
+        self._rows[key] = row
+        if self._buckets_stale:
+            return
+        for token in self.band_tokens(self._matrix[row]):
+            self._pending[token].append(row)
+        if row + 1 - self._indexed_rows > max(_MIN_PENDING_ROWS, self._indexed_rows):
+            self._rebuild()
+
+    def remove(self, key: str) -> None:
+        """הסרת מועמד מהאינדקס (השורה מתה עד הבנייה הבאה)"""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        self._keys[row] = None
+        self._fingerprints[row] = None
+
+    def _compact(self) -> None:
+        """דחיסת שורות מתות (מספרי השורות משתנים - הדליים נבנים מחדש בשליפה הבאה)"""
+        if len(self._rows) < len(self._keys):
+            live = np.array([row for row, key in enumerate(self._keys) if key is not None], dtype=np.int64)
+            self._matrix = self._matrix[live] if len(live) else np.empty(
+                (_DEFAULT_CAPACITY, self.num_perm), dtype=np.uint32)
+            self._keys = [self._keys[row] for row in live]
+            self._fingerprints = [self._fingerprints[row] for row in live]
+            self._rows = dict(zip(self._keys, range(len(self._keys))))
+            self._buckets_stale = True
+
+    def _rebuild(self) -> None:
+        """דחיסת שורות מתות ובניית מערך הטוקנים הממוין מכל החתימות"""
+        self._compact()
+        count = len(self._keys)
+        # במנות - בלי עותק uint64 של כל המטריצה
+        tokens = np.empty((count, self.bands), dtype=np.uint64)
+        for start in range(0, count, _REBUILD_CHUNK_ROWS):
+            end = min(start + _REBUILD_CHUNK_ROWS, count)
+            tokens[start:end] = self._band_tokens(self._matrix[start:end])
+        tokens = tokens.ravel()
+        order = np.argsort(tokens, kind='stable')
+        self._sorted_tokens = tokens[order]
+        self._sorted_rows = (order // self.bands).astype(np.int32)
+        self._indexed_rows = count
+        self._pending = defaultdict(list)
+        self._buckets_stale = False
+
+    def sync(self, candidates: Iterable) -> Dict[str, int]:
+        """סנכרון מול המאגר - חישוב חתימות רק לרשומות חדשות/שהשתנו"""
+        seen = set()
+        added = 0
+        for candidate in candidates:
+            seen.add(candidate.id)
+            if self.get_fingerprint(candidate.id) != self.fingerprint(candidate.name, candidate.current_company):
+                self.add(candidate.id, candidate.name, candidate.current_company)
+                added += 1
+
+        stale = [key for key in self._rows if key not in seen]
+        for key in stale:
+            self.remove(key)
+
+        return {'updated': added, 'removed': len(stale), 'total': len(self._rows)}
+
+    @staticmethod
+    def estimate_similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """הערכת Jaccard לפי אחוז ההתאמות בחתימה"""
+        return int(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+    def query(self, name: Optional[str], company: Optional[str]) -> Set[str]:
+        """מועמדים שחולקים לפחות פס אחד - בזמן תת-ליניארי"""
+        signature = self.signature(name, company)
+        if signature is None:
+            return set()
+        return self.query_signature(signature)
+
+    def query_signature(self, signature: Optional[np.ndarray]) -> Set[str]:
+        """כמו query, לחתימה שכבר חושבה"""
+        if signature is None:
+            return set()
+        if self._buckets_stale:
+            self._rebuild()
+        tokens = self._band_tokens(signature.reshape(1, -1))[0]
+        starts = np.searchsorted(self._sorted_tokens, tokens, side='left')
+        ends = np.searchsorted(self._sorted_tokens, tokens, side='right')
+        rows: List[int] = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end > start:
+                rows.extend(self._sorted_rows[start:end].tolist())
+        if self._pending:
+            for token in tokens.tolist():
+                rows.extend(self._pending.get(token, ()))
+        keys = self._keys
+        return {keys[row] for row in rows if keys[row] is not None}
+
+    def query_similar(self, name: Optional[str], company: Optional[str],
+                      threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """מועמדים דומים עם ציון Jaccard משוער מעל הסף"""
+        signature = self.signature(name, company)
+        if signature is None:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+
+        results = []
+        for key in self.query_signature(signature):
+            similarity = self.estimate_similarity(signature, self.get_signature(key))
+            if similarity >= threshold:
+                results.append((key, similarity))
+        return sorted(results, key=lambda x: x[1], reverse=True)
+
+    def near_duplicate_pairs(self, threshold: Optional[float] = None) -> Iterator[Tuple[str, str, float]]:
+        """כל הזוגות הכמעט-כפולים באינדקס (לניקוי אופליין של המאגר)"""
+        threshold = self.threshold if threshold is None else threshold
+        seen_pairs: Set[Tuple[str, str]] = set()
+
+        self._rebuild()
+        tokens = self._sorted_tokens
+        if not len(tokens):
+            return
+        # גבולות הדליים - רצפים של טוקן זהה במערך הממוין
+        bounds = np.concatenate(([0], np.flatnonzero(tokens[1:] != tokens[:-1]) + 1, [len(tokens)]))
+        sizes = np.diff(bounds)
+        for start, size in zip(bounds[:-1][sizes >= 2].tolist(), sizes[sizes >= 2].tolist()):
+            if size > self.max_bucket_size:
+                logger.warning(f"Skipping oversized LSH bucket ({size} candidates)")
+                continue
+
+            members = sorted({self._keys[row] for row in self._sorted_rows[start:start + size].tolist()})
+            for i, key_a in enumerate(members):
+                for key_b in members[i + 1:]:
+                    pair = (key_a, key_b)
+                    if pair in seen_pairs:
+                        continue
+                    seen_pairs.add(pair)
+                    similarity = self.estimate_similarity(
+                        self.get_signature(key_a), self.get_signature(key_b)
+                    )
+                    if similarity >= threshold:
+                        yield key_a, key_b, similarity
+
+    def save(self, path: str, generation: Optional[int] = None) -> None:
+        """שמירת האינדקס ליד המאגר - npz: פרמטרים, מפתחות, טביעות אצבע ומטריצת החתימות
+
+        generation - דור המאגר שהאינדקס משקף; בטעינה עם אותו דור אין צורך בסנכרון.
+        """
+        self._compact()
+        params = {
+            'hash_version': HASH_VERSION,
+            'bands': self.bands,
+            'rows': self.rows,
+            'ngram': self.ngram,
+            'seed': self.seed,
+            'max_bucket_size': self.max_bucket_size
+        }
+        count = len(self._keys)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                params=np.array(json.dumps(params)),
+                generation=np.array(-1 if generation is None else generation),
+                keys=np.array(self._keys, dtype=str) if count else np.empty(0, dtype='U1'),
+                fingerprints=np.array(self._fingerprints, dtype=str) if count else np.empty(0, dtype='U1'),
+                signatures=self._matrix[:count]
+            )
+        os.replace(tmp_path, path)
+        self.generation = generation
+        logger.info(f"Saved LSH index with {count} signatures to {path}")
+
+    @classmethod
+    def load(cls, path: str, **params) -> 'MinHashLSH':
+        """טעינת אינדקס שמור - הדליים נבנים מהמטריצה (בפעולות וקטוריות, בלי MinHash) בשליפה הראשונה"""
+        if not os.path.exists(path):
+            return cls(**params)
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                saved_params = json.loads(str(data['params']))
+                keys = data['keys'].tolist()
+                fingerprints = data['fingerprints'].tolist()
+                signatures = data['signatures']
+                generation = int(data['generation']) if 'generation' in data.files else -1
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read LSH index {path} ({e}), rebuilding")
+            return cls(**params)
+
+        if saved_params.pop('hash_version', None) != HASH_VERSION or (
+                params and any(saved_params.get(k) != v for k, v in params.items())):
+            # פרמטרים או משפחת hash שונים - החתימות השמורות לא תקפות
+            logger.info("LSH parameters changed, rebuilding index")
+            return cls(**params)
+
+        index = cls(**saved_params)
+        if keys:
+            index._keys = keys
+            index._fingerprints = fingerprints
+            index._rows = dict(zip(keys, range(len(keys))))
+            index._matrix = signatures
+            index._buckets_stale = True
+        index.generation = None if generation < 0 else generation
+        logger.info(f"Loaded LSH index with {len(index)} signatures from {path}")
+        return index
+
+
+def main():
+    """ניקוי אופליין - כל הזוגות הכמעט-כפולים במאגר הראשי"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    store = CandidateStore()
+    index_file = os.path.join(store.path, LSH_INDEX_FILE)
+    if not store.exists():
+        logger.error(f"Database not found: {store.path}")
+        return
+
+    records = store.load().values()
+
+    index = MinHashLSH.load(index_file)
+    names = {}
+    for record in records:
+        index.add(record['id'], record.get('name'), record.get('current_company'))
+        names[record['id']] = (record.get('name'), record.get('current_company'))
+    index.save(index_file)
+
+    pairs = [
+        {
+            'id_a': key_a,
+            'id_b': key_b,
+            'similarity': round(similarity, 3),
+            'a': names.get(key_a),
+            'b': names.get(key_b)
+        }
+        for key_a, key_b, similarity in index.near_duplicate_pairs(OFFLINE_PAIR_THRESHOLD)
+    ]
+
+    output_file = f'near_duplicate_pairs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(pairs, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"Found {len(pairs)} near-duplicate pairs -> {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Candidate Normalization Layer
+שכבת נרמול משותפת - טלפון, מיקום, email, LinkedIn ובכירות עם מטמוני LRU חסומים
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+import phonenumbers
+
+# ערכים גולמיים חוזרים הרבה בין המקורות - מטמון חסום לכל נרמול
+CACHE_SIZE = 65536
+
+# מיפוי שמות ערים (הסדר נשמר - ההתאמה הראשונה זוכה)
+LOCATION_MAP: Tuple[Tuple[str, str], ...] = (
+    ('tlv', 'Tel Aviv'),
+    ('jerusalem', 'Jerusalem'),
+    ('haifa', 'Haifa'),
+    ('תל אביב', 'Tel Aviv'),
+    ('ירושלים', 'Jerusalem'),
+    ('חיפה', 'Haifa'),
+)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """נרמול כתובת מייל"""
+    if not email:
+        return None
+    email = email.lower().strip()
+    # בדיקת תקינות בסיסית
+    if '@' in email and '.' in email.split('@')[1]:
+        return email
+    return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_phone(phone: Optional[str], region: str = "IL") -> Optional[str]:
+    """נרמול מספר טלפון לפורמט בינלאומי"""
+    if not phone:
+        return None
+    try:
+        parsed = phonenumbers.parse(phone, region)
+        if phonenumbers.is_valid_number(parsed):
+            return phonenumbers.format_number(
+                parsed,
+                phonenumbers.PhoneNumberFormat.INTERNATIONAL
+            )
+    except Exception:
+        pass
+    return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_location(location: Optional[str]) -> Optional[str]:
+    """נרמול מיקום"""
+    if not location:
+        return None
+
+    location_lower = location.lower().strip()
+    for key, value in LOCATION_MAP:
+        if key in location_lower:
+            return value
+
+    return location.title()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_linkedin_url(url: Optional[str]) -> str:
+    """נרמול URL של LinkedIn"""
+    if not url:
+        return ""
+    # הסרת פרמטרים מיותרים
+    url = url.split('?')[0]
+    # הסרת / בסוף
+    url = url.rstrip('/')
+    return url.lower()
+
+
+def dedup_keys(email: Optional[str], linkedin_url: Optional[str],
+               name: Optional[str], company: Optional[str]) -> Tuple[str, str, str, str]:
+    """מפתחות מנורמלים לזיהוי כפילויות: (email, linkedin, שם, חברה)"""
+    return (
+        (email or '').lower(),
+        normalize_linkedin_url(linkedin_url),
+        (name or '').lower(),
+        (company or '').lower()
+    )
+
+
+class SeniorityRules:
+    """סיווג בכירות לפי מילות מפתח בתפקיד - ביטוי מקומפל לכל רמה ומטמון LRU
+
+    הרמות נבדקות לפי הסדר והראשונה שמתאימה זוכה (חיפוש תת-מחרוזת כמו any(word in title)).
+    """
+
+    def __init__(self, levels: Sequence[Tuple[str, Sequence[str]]], default: str,
+                 missing: Optional[str] = None, cache_size: int = CACHE_SIZE):
+        self.levels = [
+            (level, re.compile('|'.join(re.escape(word) for word in words)))
+            for level, words in levels
+        ]
+        self.default = default
+        self.missing = default if missing is None else missing
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, title: Optional[str]) -> str:
+        if not title:
+            return self.missing
+        title_lower = title.lower()
+        for level, pattern in self.levels:
+            if pattern.search(title_lower):
+                return level
+        return self.default
+
+    def __call__(self, title: Optional[str]) -> str:
+        return self.classify(title)
+
+
+# הסולם של סקריפט האינטגרציה
+INTEGRATION_SENIORITY = SeniorityRules(
+    [
+        ('executive', ['cto', 'vp', 'vice president', 'chief']),
+        ('director', ['director', 'head of']),
+        ('principal', ['principal', 'staff', 'architect']),
+        ('senior', ['senior', 'lead']),
+        ('junior', ['junior', 'entry']),
+    ],
+    default='mid-level',
+    missing='unknown'
+)
+
+# הסולם של האורקסטרטור (רמת management במקום director/principal)
+ORCHESTRATOR_SENIORITY = SeniorityRules(
+    [
+        ('executive', ['cto', 'ceo', 'vp', 'chief']),
+        ('management', ['director', 'head of', 'manager']),
+        ('senior', ['senior', 'lead', 'principal']),
+        ('junior', ['junior', 'intern']),
+    ],
+    default='mid-level'
+)
+
+
+def _cache_info(func) -> Dict[str, int]:
+    info = func.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize
+    }
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """מוני hit/miss לכל מטמוני הנרמול"""
+    return {
+        'email': _cache_info(normalize_email),
+        'phone': _cache_info(normalize_phone),
+        'location': _cache_info(normalize_location),
+        'linkedin_url': _cache_info(normalize_linkedin_url),
+        'seniority_integration': _cache_info(INTEGRATION_SENIORITY.classify),
+        'seniority_orchestrator': _cache_info(ORCHESTRATOR_SENIORITY.classify)
+    }
+
+
+def clear_caches() -> None:
+    """ניקוי כל המטמונים (למשל בין ריצות ארוכות)"""
+    for func in (normalize_email, normalize_phone, normalize_location, normalize_linkedin_url,
+                 INTEGRATION_SENIORITY.classify, ORCHESTRATOR_SENIORITY.classify):
+        func.cache_clear()
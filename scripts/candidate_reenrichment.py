@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Re-enrichment Scheduler
+תור עדיפויות להעשרה מחדש של רשומות ישנות - עדיפות = התיישנות × ערך (איכות נתונים,
+match_score, תגיות כמו hot-candidate). כל מחזור שולף את K הרשומות הדחופות בתוך
+תקציב API לכל מקור, ונשמר ליד המאגר כך שמחזור הבא לא דורש סריקה מלאה
+"""
+
+import heapq
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Callable, Container, Dict, Iterable, List, Optional, Tuple
+
+from serialization import dump, loads
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+# התיישנות מכפילה את העדיפות בכל HALF_LIFE_DAYS ימים בלי בדיקה
+HALF_LIFE_DAYS = 30.0
+_EPOCH = datetime(2020, 1, 1)
+
+VALUE_BASE = 0.1
+QUALITY_WEIGHT = 1.0
+MATCH_WEIGHT = 2.0
+TAG_WEIGHTS = {
+    'hot-candidate': 3.0,
+    'github-influencer': 0.5,
+    'experienced-hire': 0.3
+}
+# רשומות שההעשרה שלהן לא הושלמה מקבלות עדיפות
+STATUS_WEIGHTS = {'pending': 1.0, 'failed': 1.0}
+
+# עלות בבקשות API לכל מקור בתשלום (פרופיל GitHub = משתמש + ריפוזיטוריז)
+SOURCE_COSTS = {'github': 2}
+DEFAULT_TOP_K = 500
+# כמה רשומות שנדחו בגלל תקציב לסרוק לפני שעוצרים (פי top_k)
+DEFER_SCAN_FACTOR = 4
+
+
+def record_value(candidate) -> float:
+    """ערך הרשומה - כמה שווה להחזיק אותה עדכנית"""
+    value = VALUE_BASE
+    value += QUALITY_WEIGHT * (candidate.data_quality_score or 0.0)
+    value += MATCH_WEIGHT * (candidate.match_score or 0.0)
+    value += sum(TAG_WEIGHTS.get(tag, 0.0) for tag in candidate.tags or ())
+    value += STATUS_WEIGHTS.get(candidate.enrichment_status, 0.0)
+    return value
+
+
+def _days(moment: Optional[datetime]) -> float:
+    if moment is None:
+        return 0.0
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None)
+    return (moment - _EPOCH).total_seconds() / 86400
+
+
+def priority_key(value: float, touched_at: Optional[datetime]) -> float:
+    """מפתח סדר שלא תלוי בזמן הנוכחי
+
+    עדיפות(t) = ערך × 2^((t - touched_at) / HALF_LIFE_DAYS), כך שהיחס בין
+    שתי רשומות קבוע לאורך זמן - log2 של העדיפות פחות t מספיק לסידור, והתור
+    לא צריך בנייה מחדש כשהזמן עובר (רק רשומות שהשתנו מוכנסות מחדש).
+    """
+    return math.log2(value) - _days(touched_at) / HALF_LIFE_DAYS
+
+
+def staleness(key: float, value: float, now: Optional[datetime] = None) -> float:
+    """גורם ההתיישנות בזמן now (1.0 = נבדק עכשיו)"""
+    return 2 ** (key - math.log2(value) + _days(now or datetime.now()) / HALF_LIFE_DAYS)
+
+
+class ReenrichmentScheduler:
+    """תור עדיפויות (heap עם ביטול עצל) של מועמדים להעשרה מחדש
+
+    update מכניס מחדש מועמד שנוצר/השתנה/נבדק; הרשומה הקודמת שלו ב-heap
+    נשארת ומדולגת בשליפה כי המפתח שלה כבר לא תואם.
+    """
+
+    def __init__(self):
+        self.keys: Dict[str, float] = {}
+        # מקורות בתשלום שהמועמד צריך (רק למי שיש, למשל URL של GitHub)
+        self.paid_sources: Dict[str, Tuple[str, ...]] = {}
+        self._heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def update(self, candidate, paid_sources: Tuple[str, ...] = (),
+               checked_at: Optional[datetime] = None) -> None:
+        """הכנסה/עדכון של מועמד (checked_at - נבדק עכשיו בלי שינוי בנתונים)"""
+        touched_at = candidate.updated_at
+        if checked_at is not None and (touched_at is None or checked_at > touched_at):
+            touched_at = checked_at
+        key = priority_key(record_value(candidate), touched_at)
+        self.keys[candidate.id] = key
+        if paid_sources:
+            self.paid_sources[candidate.id] = tuple(paid_sources)
+        else:
+            self.paid_sources.pop(candidate.id, None)
+        heapq.heappush(self._heap, (-key, candidate.id))
+
+    def remove(self, candidate_id: str) -> None:
+        self.keys.pop(candidate_id, None)
+        self.paid_sources.pop(candidate_id, None)
+
+    def rebuild(self, candidates: Iterable, sources_of: Callable[[object], Tuple[str, ...]]) -> None:
+        """בנייה מלאה במעבר יחיד (כשאין מצב שמור תקף)"""
+        self.__init__()
+        for candidate in candidates:
+            self.update(candidate, sources_of(candidate))
+
+    def _compact_heap(self) -> None:
+        # רשומות מבוטלות הצטברו - בנייה מחדש מהמפתחות התקפים
+        self._heap = [(-key, candidate_id) for candidate_id, key in self.keys.items()]
+        heapq.heapify(self._heap)
+
+    def next_batch(self, top_k: int = DEFAULT_TOP_K, budgets: Optional[Dict[str, int]] = None,
+                   exclude: Container[str] = ()) -> Tuple[List[str], Dict]:
+        """K המועמדים הדחופים שנכנסים בתקציב (budgets - בקשות לכל מקור בתשלום)
+
+        מועמד שהמקור שלו חרג מהתקציב נדחה ונשאר בתור (מועמדים זולים יותר
+        ממשיכים להיבחר), והסריקה נעצרת אחרי DEFER_SCAN_FACTOR × K דחיות.
+        מועמדים ב-exclude (למשל שנוצרו או מוזגו בריצה הנוכחית) מדולגים ונשארים בתור.
+        מועמדים שנבחרו נשארים בתור עד update עם זמן הבדיקה.
+        """
+        if len(self._heap) > 2 * len(self.keys) + 1024:
+            self._compact_heap()
+        remaining = dict(budgets or {})
+        spent = dict.fromkeys(remaining, 0)
+        selected: List[str] = []
+        popped: List[Tuple[float, str]] = []
+        deferred = 0
+        skipped = 0
+        while self._heap and len(selected) < top_k and deferred < top_k * DEFER_SCAN_FACTOR:
+            neg_key, candidate_id = heapq.heappop(self._heap)
+            if self.keys.get(candidate_id) != -neg_key:
+                continue
+            popped.append((neg_key, candidate_id))
+            if candidate_id in exclude:
+                skipped += 1
+                continue
+            costs = {source: SOURCE_COSTS.get(source, 1) for source in self.paid_sources.get(candidate_id, ())}
+            if any(remaining.get(source, 0) < cost for source, cost in costs.items()):
+                deferred += 1
+                continue
+            for source, cost in costs.items():
+                remaining[source] -= cost
+                spent[source] = spent.get(source, 0) + cost
+            selected.append(candidate_id)
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return selected, {'selected': len(selected), 'deferred_over_budget': deferred,
+                          'skipped_fresh': skipped, 'spent': spent}
+
+    def to_dict(self) -> Dict:
+        return {'keys': self.keys, 'paid_sources': self.paid_sources}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ReenrichmentScheduler':
+        scheduler = cls()
+        scheduler.keys = data['keys']
+        scheduler.paid_sources = {cid: tuple(sources) for cid, sources in data['paid_sources'].items()}
+        scheduler._compact_heap()
+        return scheduler
+
+    def save(self, path: str, generation: int) -> None:
+        """שמירת התור יחד עם דור המאגר שהוא משקף"""
+        dump({'version': STATE_VERSION, 'generation': generation, 'state': self.to_dict()}, path)
+
+    @classmethod
+    def load(cls, path: str, generation: int) -> Optional['ReenrichmentScheduler']:
+        """טעינת תור שמור - רק אם הוא תואם לדור הנוכחי של המאגר"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = loads(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable re-enrichment queue {path}: {e}")
+            return None
+        if data.get('version') != STATE_VERSION or data.get('generation') != generation:
+            return None
+        return cls.from_dict(data['state'])
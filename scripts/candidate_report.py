@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Streaming Report Aggregator
+צבירת מדדי דוח האינטגרציה במעבר אחד - מתעדכנת בכל יצירה/מיזוג של מועמד
+ונשמרת ליד המאגר כך שהדוח הבא לא דורש סריקה מלאה
+"""
+
+import json
+import logging
+import os
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+TOP_SKILLS = 20
+TOP_LOCATIONS = 10
+HIGH_QUALITY_THRESHOLD = 0.8
+
+
+def _top(counter: Counter, limit: int) -> Dict:
+    # שבירת שוויון לפי שם - תוצאה יציבה בין ריצות
+    items = sorted(counter.items(), key=lambda x: (-x[1], str(x[0])))
+    return dict(items[:limit])
+
+
+def _bump(counter: Counter, key, delta: int) -> None:
+    value = counter[key] + delta
+    if value:
+        counter[key] = value
+    else:
+        del counter[key]
+
+
+class ReportAggregator:
+    """מדדי הדוח כמונים מצטברים: add למועמד חדש, remove לפני שינוי/החלפה"""
+
+    def __init__(self):
+        self.total = 0
+        self.quality_sum = 0.0
+        self.high_quality = 0
+        self.with_verified_skills = 0
+        self.skills: Counter = Counter()
+        self.seniority: Counter = Counter()
+        self.sources: Counter = Counter()
+        self.locations: Counter = Counter()
+
+    def _apply(self, candidate, sign: int) -> None:
+        self.total += sign
+        self.quality_sum += sign * candidate.data_quality_score
+        if candidate.data_quality_score > HIGH_QUALITY_THRESHOLD:
+            self.high_quality += sign
+        if len(candidate.verified_skills) > 0:
+            self.with_verified_skills += sign
+
+        for skill in candidate.verified_skills:
+            _bump(self.skills, skill, sign)
+        _bump(self.seniority, candidate.seniority_level, sign)
+        for source in candidate.sources:
+            _bump(self.sources, source, sign)
+        if candidate.location:
+            _bump(self.locations, candidate.location, sign)
+
+    def add(self, candidate) -> None:
+        """הוספת תרומת מועמד למדדים"""
+        self._apply(candidate, 1)
+
+    def remove(self, candidate) -> None:
+        """הסרת תרומת מועמד (לפני מיזוג או החלפה)"""
+        self._apply(candidate, -1)
+
+    def rebuild(self, candidates: Iterable) -> None:
+        """בנייה מלאה במעבר יחיד (כשאין מצב שמור תקף)"""
+        self.__init__()
+        for candidate in candidates:
+            self.add(candidate)
+
+    def metrics(self) -> Dict:
+        """המדדים במבנה של integration_report"""
+        total = self.total
+        return {
+            'quality_metrics': {
+                'avg_data_quality': self.quality_sum / total if total else 0.0,
+                'high_quality_candidates': self.high_quality,
+                'verified_skills_coverage': self.with_verified_skills / total if total else 0.0
+            },
+            'skill_distribution': {
+                'top_skills': _top(self.skills, TOP_SKILLS),
+                'total_unique_skills': len(self.skills)
+            },
+            'seniority_distribution': dict(self.seniority),
+            'source_distribution': dict(self.sources),
+            'location_distribution': _top(self.locations, TOP_LOCATIONS)
+        }
+
+    def to_dict(self) -> Dict:
+        # מונים כרשימות זוגות - מפתח None נשמר כמו שהוא
+        return {
+            'total': self.total,
+            'quality_sum': self.quality_sum,
+            'high_quality': self.high_quality,
+            'with_verified_skills': self.with_verified_skills,
+            'skills': list(self.skills.items()),
+            'seniority': list(self.seniority.items()),
+            'sources': list(self.sources.items()),
+            'locations': list(self.locations.items())
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ReportAggregator':
+        aggregator = cls()
+        aggregator.total = data['total']
+        aggregator.quality_sum = data['quality_sum']
+        aggregator.high_quality = data['high_quality']
+        aggregator.with_verified_skills = data['with_verified_skills']
+        for field in ('skills', 'seniority', 'sources', 'locations'):
+            setattr(aggregator, field, Counter(dict(data[field])))
+        return aggregator
+
+    def save(self, path: str, generation: int) -> None:
+        """שמירת המצב יחד עם דור המאגר שהוא משקף"""
+        data = {'version': STATE_VERSION, 'generation': generation, 'state': self.to_dict()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, generation: int) -> Optional['ReportAggregator']:
+        """טעינת מצב שמור - רק אם הוא תואם לדור הנוכחי של המאגר"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable report state {path}: {e}")
+            return None
+        if data.get('version') != STATE_VERSION or data.get('generation') != generation:
+            logger.info("Report state is stale, rebuilding")
+            return None
+        return cls.from_dict(data['state'])
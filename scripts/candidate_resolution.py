@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Batch Entity Resolution
+איחוד כפילויות טרנזיטיבי - קשתות התאמה מאינדקסי הכפילויות, אשכולות Union-Find
+ומיזוג דטרמיניסטי של כל אשכול לרשומה אחת
+"""
+
+import logging
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from candidate_compact import LIST_FIELDS
+from candidate_index import UnionFind, blocking_keys
+from candidate_lsh import MinHashLSH
+from candidate_normalize import dedup_keys
+
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    from fuzzywuzzy import fuzz
+
+logger = logging.getLogger(__name__)
+
+# אותם ספים כמו find_duplicate
+NAME_THRESHOLD = 90
+COMPANY_THRESHOLD = 80
+# אשכול גדול מזה כנראה נוצר משרשרת התאמות שגויה (למשל email משותף) - לא ממוזג אוטומטית
+MAX_CLUSTER_SIZE = 50
+
+# שדות מספריים - הערך הגבוה בין חברי האשכול
+MAX_FIELDS = (
+    'years_experience', 'github_stars', 'github_repos', 'stackoverflow_reputation',
+    'engagement_score', 'match_score', 'data_quality_score'
+)
+# שדות שהמיזוג מחשב בנפרד
+_SPECIAL_FIELDS = set(LIST_FIELDS) | set(MAX_FIELDS) | {
+    'id', 'skill_confidence', 'created_at', 'updated_at',
+    'email_key', 'linkedin_key', 'name_key', 'company_key'
+}
+
+
+def _ratio(a: str, b: str) -> int:
+    # ציון שלם כמו fuzzywuzzy (rapidfuzz מחזיר float)
+    return int(round(fuzz.ratio(a, b)))
+
+
+def survivor_order(record: Dict) -> Tuple:
+    """סדר השרידות: הרשומה הוותיקה ביותר שורדת, שבירת שוויון לפי ID"""
+    return (str(record.get('created_at') or ''), record['id'])
+
+
+def merge_records(records: Sequence[Dict], now: Optional[datetime] = None) -> Dict:
+    """מיזוג אשכול לרשומה אחת - הכללה של merge_candidates
+
+    - שדות טקסט: הערך הלא-ריק הראשון לפי סדר השרידות
+    - רשימות (כישורים, מקורות, תגיות): איחוד ממוין
+    - ביטחון כישורים ומטריקות: הערך הגבוה
+    - created_at: המוקדם ביותר; updated_at: זמן המיזוג
+    """
+    ordered = sorted(records, key=survivor_order)
+    merged = dict(ordered[0])
+
+    for field in merged:
+        if field in _SPECIAL_FIELDS:
+            continue
+        if not merged[field]:
+            merged[field] = next((r[field] for r in ordered[1:] if r.get(field)), merged[field])
+
+    for field in LIST_FIELDS:
+        merged[field] = sorted({value for r in ordered for value in (r.get(field) or [])})
+
+    confidence: Dict[str, float] = {}
+    for r in ordered:
+        for skill, value in (r.get('skill_confidence') or {}).items():
+            confidence[skill] = max(value, confidence.get(skill, value))
+    merged['skill_confidence'] = dict(sorted(confidence.items()))
+
+    for field in MAX_FIELDS:
+        values = [r[field] for r in ordered if r.get(field) is not None]
+        merged[field] = max(values) if values else merged.get(field)
+
+    merged['created_at'] = min(r['created_at'] for r in ordered)
+    merged['updated_at'] = (now or datetime.now()).isoformat()
+    merged['email_key'], merged['linkedin_key'], merged['name_key'], merged['company_key'] = dedup_keys(
+        merged.get('email'), merged.get('linkedin_url'), merged.get('name'), merged.get('current_company')
+    )
+    return merged
+
+
+def size_histogram(size_counts: Dict[int, int]) -> Dict[str, int]:
+    """היסטוגרמת גדלי אשכולות ({גודל: כמות}) - מדויק עד 5, אחר כך בחזקות של 2"""
+    histogram: Counter = Counter()
+    for size, count in size_counts.items():
+        if size <= 5:
+            label = str(size)
+        else:
+            upper = 1 << (size - 1).bit_length()
+            label = f"{upper // 2 + 1}-{upper}"
+        histogram[label] += count
+    return dict(sorted(histogram.items(), key=lambda x: int(x[0].split('-')[0])))
+
+
+class ClusterResolver:
+    """בניית אשכולות כפילויות טרנזיטיביים מעל רשומות מפתח (KeyEntry / מועמד)
+
+    קשתות מדויקות (email, LinkedIn) מחוברות דרך הבעלים הראשון של כל מפתח, וקשתות
+    fuzzy נבדקות רק בתוך בלוקים של שם + חברה ופסי LSH. הקשתות לא נשמרות - כל
+    קשת מאוחדת מיד ב-Union-Find, והבלוקים נבנים במחיצות (partitions) לפי hash
+    כך שהזיכרון חסום גם במיליוני רשומות.
+    """
+
+    def __init__(self, lsh: Optional[MinHashLSH] = None, partitions: int = 1,
+                 name_threshold: int = NAME_THRESHOLD, company_threshold: int = COMPANY_THRESHOLD,
+                 max_cluster_size: int = MAX_CLUSTER_SIZE):
+        self.lsh = lsh if lsh is not None else MinHashLSH()
+        self.partitions = max(1, partitions)
+        self.name_threshold = name_threshold
+        self.company_threshold = company_threshold
+        self.max_cluster_size = max_cluster_size
+
+        self.exact_edges = 0
+        self.fuzzy_edges = 0
+        self.pairs_checked = 0
+        self.largest_block = 0
+
+    def _fuzzy_keys(self, entry) -> Iterator:
+        yield from blocking_keys(entry.name, entry.current_company)
+        signature = self.lsh.get_signature(entry.id)
+        if signature is None:
+            signature = self.lsh.signature(entry.name, entry.current_company)
+        yield from self.lsh.band_tokens(signature)
+
+    def _link_exact(self, entries: Sequence, union_find: UnionFind) -> None:
+        owners: Dict[str, int] = {}
+        for position, entry in enumerate(entries):
+            for key in (f"e:{entry.email_key}" if entry.email_key else None,
+                        f"l:{entry.linkedin_key}" if entry.linkedin_key else None):
+                if key is None:
+                    continue
+                owner = owners.setdefault(key, position)
+                if owner != position and union_find.find(owner) != union_find.find(position):
+                    union_find.union(owner, position)
+                    self.exact_edges += 1
+
+    def _link_fuzzy_partition(self, entries: Sequence, union_find: UnionFind, partition: int) -> None:
+        blocks: Dict = defaultdict(lambda: array('q'))
+        for position, entry in enumerate(entries):
+            if not entry.name_key or not entry.company_key:
+                continue
+            for key in self._fuzzy_keys(entry):
+                if self.partitions == 1 or hash(key) % self.partitions == partition:
+                    blocks[key].append(position)
+
+        for members in blocks.values():
+            if len(members) < 2:
+                continue
+            self.largest_block = max(self.largest_block, len(members))
+            for i, a in enumerate(members):
+                entry_a = entries[a]
+                for b in members[i + 1:]:
+                    # כבר באותו אשכול - אין צורך בהשוואה
+                    if union_find.find(a) == union_find.find(b):
+                        continue
+                    entry_b = entries[b]
+                    self.pairs_checked += 1
+                    if (_ratio(entry_a.name_key, entry_b.name_key) > self.name_threshold and
+                            _ratio(entry_a.company_key, entry_b.company_key) > self.company_threshold):
+                        union_find.union(a, b)
+                        self.fuzzy_edges += 1
+
+    def cluster(self, entries: Sequence) -> UnionFind:
+        """Union-Find מעל מיקומי הרשומות ב-entries"""
+        union_find = UnionFind(len(entries))
+        self._link_exact(entries, union_find)
+        for partition in range(self.partitions):
+            self._link_fuzzy_partition(entries, union_find, partition)
+        return union_find
+
+    @staticmethod
+    def groups(union_find: UnionFind) -> Tuple[List[List[int]], Counter]:
+        """אשכולות עם יותר מחבר אחד + ספירת גדלים של כל האשכולות"""
+        count = len(union_find)
+        roots = array('q', (union_find.find(position) for position in range(count)))
+        sizes = array('q', bytes(8 * count))
+        for root in roots:
+            sizes[root] += 1
+        members: Dict[int, List[int]] = defaultdict(list)
+        for position, root in enumerate(roots):
+            if sizes[root] > 1:
+                members[root].append(position)
+        return list(members.values()), Counter(size for size in sizes if size)
+
+    def resolve(self, entries: Sequence, load_record: Callable[[str], Dict],
+                now: Optional[datetime] = None) -> Tuple[List[Tuple[Dict, List[str]]], Dict]:
+        """אשכולות + רשומה ממוזגת לכל אשכול: ([(merged_record, member_ids)], stats)"""
+        union_find = self.cluster(entries)
+        clusters, size_counts = self.groups(union_find)
+
+        resolved = []
+        oversized = []
+        for members in clusters:
+            ids = [entries[position].id for position in members]
+            if len(ids) > self.max_cluster_size:
+                oversized.append({'size': len(ids), 'sample_ids': ids[:10]})
+                continue
+            resolved.append((merge_records([load_record(cid) for cid in ids], now), ids))
+
+        stats = {
+            'records': len(entries),
+            'clusters': len(clusters),
+            'merged_clusters': len(resolved),
+            'records_removed': sum(len(ids) - 1 for _, ids in resolved),
+            'exact_edges': self.exact_edges,
+            'fuzzy_edges': self.fuzzy_edges,
+            'pairs_checked': self.pairs_checked,
+            'largest_block': self.largest_block,
+            'partitions': self.partitions,
+            'cluster_size_histogram': size_histogram(size_counts),
+            'oversized_clusters': oversized
+        }
+        logger.info(
+            f"Entity resolution: {stats['clusters']} clusters, {stats['records_removed']} records merged away "
+            f"({stats['exact_edges']} exact + {stats['fuzzy_edges']} fuzzy edges)"
+        )
+        return resolved, stats
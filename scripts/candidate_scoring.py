@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Batch Candidate Scoring
+חישוב מחדש של בכירות, שנות ניסיון, תגיות חכמות וציון איכות נתונים על מנות עמודתיות
+(DataFrame) - פעולות מחרוזת וקטוריות ומסכות NumPy במקום לולאה לכל מועמד, עם ביטוי
+מקומפל אחד לכל רמת בכירות. החוקים משותפים לפונקציות לכל רשומה באינטגרציה, שנשארות
+ההגדרה המחייבת - התוצאות זהות להן
+"""
+
+import logging
+import re
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from candidate_normalize import INTEGRATION_SENIORITY, SeniorityRules
+
+logger = logging.getLogger(__name__)
+
+# שנות ניסיון בסיס לכל רמת בכירות
+SENIORITY_YEARS = {
+    'executive': 15,
+    'director': 12,
+    'principal': 10,
+    'senior': 5,
+    'mid-level': 3,
+    'junior': 1,
+    'unknown': 0
+}
+
+# תגיות חכמות: (תגית, מילים) לפי מיקום, (תגית, כישורים מאומתים), (מילה במקור, תגית)
+LOCATION_TAGS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ('tel-aviv-tech', ('tel aviv', 'תל אביב')),
+    ('israeli-talent', ('israel', 'ישראל')),
+)
+SKILL_TAGS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ('frontend-specialist', ('react', 'angular', 'vue')),
+    ('python-developer', ('python', 'django', 'flask')),
+    ('devops-engineer', ('kubernetes', 'docker')),
+)
+EXPERIENCED_LEVELS = ('senior', 'principal', 'director')
+EXPERIENCED_TAG = 'experienced-hire'
+# המילה הראשונה שמופיעה בשם המקור קובעת
+SOURCE_TAGS: Tuple[Tuple[str, str], ...] = (
+    ('github', 'open-source-contributor'),
+    ('linkedin', 'linkedin-active'),
+)
+SMART_TAGS: Tuple[str, ...] = (
+    tuple(tag for tag, _ in LOCATION_TAGS) + tuple(tag for tag, _ in SKILL_TAGS)
+    + (EXPERIENCED_TAG,) + tuple(tag for _, tag in SOURCE_TAGS)
+)
+
+# ציון איכות נתונים: משקל לכל שדה שיש לו ערך, ולרשימות לא ריקות
+QUALITY_FIELDS: Tuple[Tuple[str, float], ...] = (
+    ('name', 1.0),
+    ('email', 1.0),
+    ('phone', 0.5),
+    ('location', 0.5),
+    ('linkedin_url', 1.0),
+    ('github_url', 1.0),
+    ('current_title', 1.0),
+    ('current_company', 1.0),
+)
+QUALITY_LISTS: Tuple[Tuple[str, float], ...] = (
+    ('verified_skills', 1.0),
+    ('tags', 1.0),
+)
+QUALITY_TOTAL = 10
+
+# גודל מנה לניקוד מחדש של המאגר - זיכרון חסום, פעולות וקטוריות על מנה גדולה
+SCORING_BATCH_SIZE = 50000
+
+# העמודות שהמנוע קורא
+SCORING_COLUMNS = [
+    'id', 'name', 'email', 'phone', 'location', 'linkedin_url', 'github_url', 'current_title',
+    'current_company', 'github_created_at', 'verified_skills', 'sources', 'tags',
+    'seniority_level', 'years_experience', 'data_quality_score'
+]
+
+
+def _text(series: pd.Series) -> pd.Series:
+    """עמודת מחרוזות בלי ערכים חסרים (None/NaN -> '')"""
+    return series.fillna('')
+
+
+def _present(series: pd.Series) -> np.ndarray:
+    """שדה עם ערך (כמו bool(value) למחרוזת)"""
+    return (series.notna() & (series != '')).to_numpy(dtype=bool)
+
+
+def _lengths(series: pd.Series) -> np.ndarray:
+    """אורך הרשימה בכל שורה (0 לערך חסר)"""
+    return np.fromiter((len(value) if value else 0 for value in series), dtype=np.int64, count=len(series))
+
+
+def _non_empty(series: pd.Series) -> np.ndarray:
+    """רשימה לא ריקה"""
+    return _lengths(series) > 0
+
+
+def _explode(series: pd.Series) -> pd.Series:
+    """עמודת רשימות לצורה ארוכה - האינדקס הוא מיקום השורה"""
+    flat = list(chain.from_iterable(value for value in series if value))
+    rows = np.repeat(np.arange(len(series)), _lengths(series))
+    return pd.Series(flat, index=rows, dtype=object).fillna('').astype(str)
+
+
+def _any_by_row(mask: pd.Series, rows: int) -> np.ndarray:
+    result = np.zeros(rows, dtype=bool)
+    hits = mask.index[mask.to_numpy(dtype=bool)]
+    result[np.asarray(hits, dtype=np.int64)] = True
+    return result
+
+
+def _contains_any(lower: pd.Series, words: Sequence[str]) -> np.ndarray:
+    pattern = re.compile('|'.join(re.escape(word) for word in words))
+    return lower.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+
+
+def batch_seniority(titles: pd.Series, rules: SeniorityRules = INTEGRATION_SENIORITY) -> np.ndarray:
+    """רמת בכירות לכל תפקיד - הרמה הראשונה שהביטוי שלה מתאים זוכה (כמו rules.classify)"""
+    lower = _text(titles).str.lower()
+    result = np.full(len(titles), rules.default, dtype=object)
+    unassigned = np.ones(len(titles), dtype=bool)
+    for level, pattern in rules.levels:
+        hit = lower.str.contains(pattern, regex=True).to_numpy(dtype=bool) & unassigned
+        result[hit] = level
+        unassigned &= ~hit
+    result[~_present(titles)] = rules.missing
+    return result
+
+
+def batch_experience(seniority: Sequence[str], github_created_at: pd.Series,
+                     now: Optional[datetime] = None) -> np.ndarray:
+    """שנות ניסיון: בסיס לפי בכירות, ולפחות ותק חשבון ה-GitHub בשנים שלמות"""
+    base = pd.Series(seniority, dtype=object).map(SENIORITY_YEARS).fillna(0).to_numpy(dtype=np.int64)
+    created_text = github_created_at.reset_index(drop=True)
+    has_created = _present(created_text)
+    if not has_created.any():
+        return base
+    created = pd.to_datetime(created_text[has_created].str.replace('Z', '+00:00', regex=False),
+                             utc=True, format='ISO8601')
+    now = pd.Timestamp(now or datetime.now(timezone.utc))
+    days = (now - created).dt.days.to_numpy(dtype=np.float64)
+    age_years = np.floor(np.maximum(0.0, days / 365.25)).astype(np.int64)
+    years = base.copy()
+    years[has_created] = np.maximum(base[has_created], age_years)
+    return years
+
+
+def smart_tag_masks(location: pd.Series, verified_skills: pd.Series, seniority: Sequence[str],
+                    sources: pd.Series) -> pd.DataFrame:
+    """מסכה בוליאנית לכל תגית חכמה (עמודה לכל תגית ב-SMART_TAGS)"""
+    rows = len(location)
+    masks: Dict[str, np.ndarray] = {}
+
+    location_lower = _text(location).str.lower()
+    for tag, words in LOCATION_TAGS:
+        masks[tag] = _contains_any(location_lower, words)
+
+    skills = _explode(verified_skills)
+    for tag, tag_skills in SKILL_TAGS:
+        masks[tag] = _any_by_row(skills.isin(tag_skills), rows)
+
+    masks[EXPERIENCED_TAG] = np.isin(np.asarray(seniority, dtype=object), EXPERIENCED_LEVELS)
+
+    source_lower = _explode(sources).str.lower()
+    matched = np.zeros(len(source_lower), dtype=bool)
+    for word, tag in SOURCE_TAGS:
+        hit = source_lower.str.contains(word, regex=False).to_numpy(dtype=bool) & ~matched
+        matched |= hit
+        masks[tag] = _any_by_row(pd.Series(hit, index=source_lower.index), rows)
+
+    return pd.DataFrame({tag: masks[tag] for tag in SMART_TAGS})
+
+
+def tags_from_masks(masks: pd.DataFrame) -> List[Tuple[str, ...]]:
+    """התגיות של כל שורה (בסדר העמודות) - tuple אחד לכל צירוף מסכות שונה"""
+    names = np.array(masks.columns, dtype=object)
+    matrix = masks.to_numpy(dtype=bool)
+    codes = matrix.astype(np.int64) @ (1 << np.arange(len(names), dtype=np.int64))
+    unique, inverse = np.unique(codes, return_inverse=True)
+    combinations = [tuple(names[(code >> np.arange(len(names))) & 1 == 1]) for code in unique]
+    return [combinations[i] for i in inverse.ravel()]
+
+
+def batch_data_quality(frame: pd.DataFrame, has_tags: Optional[np.ndarray] = None) -> np.ndarray:
+    """ציון איכות נתונים לכל שורה (has_tags - במקום עמודת tags, למשל אחרי תיוג מחדש)"""
+    score = np.zeros(len(frame), dtype=np.float64)
+    for field, weight in QUALITY_FIELDS:
+        score += weight * _present(frame[field])
+    for field, weight in QUALITY_LISTS:
+        present = has_tags if field == 'tags' and has_tags is not None else _non_empty(frame[field])
+        score += weight * present
+    return score / QUALITY_TOTAL
+
+
+def score_frame(frame: pd.DataFrame, rules: SeniorityRules = INTEGRATION_SENIORITY,
+                now: Optional[datetime] = None) -> pd.DataFrame:
+    """חישוב מחדש של כל השדות המחושבים למנה - כמו refresh_enrichment לכל שורה
+
+    בכירות -> ניסיון -> תגיות (תגיות קיימות נשמרות, תגיות חכמות חסרות נוספות)
+    -> איכות. מחזיר את הערכים החדשים ועמודת changed לשורות שאחד מהם השתנה.
+    """
+    frame = frame.reset_index(drop=True)
+    seniority = batch_seniority(frame['current_title'], rules)
+    years = batch_experience(seniority, frame['github_created_at'], now)
+    masks = smart_tag_masks(frame['location'], frame['verified_skills'], seniority, frame['sources'])
+
+    # תגיות חכמות שחסרות ברשומה
+    existing_tags = _explode(frame['tags'])
+    added = pd.DataFrame({
+        tag: masks[tag].to_numpy() & ~_any_by_row(existing_tags == tag, len(frame))
+        for tag in SMART_TAGS
+    })
+    has_added = added.to_numpy(dtype=bool).any(axis=1)
+    has_tags = _non_empty(frame['tags']) | masks.to_numpy(dtype=bool).any(axis=1)
+    quality = batch_data_quality(frame, has_tags)
+
+    old_years = pd.to_numeric(frame['years_experience'], errors='coerce').to_numpy(dtype=np.float64)
+    old_quality = pd.to_numeric(frame['data_quality_score'], errors='coerce').to_numpy(dtype=np.float64)
+    changed = (
+        (seniority != frame['seniority_level'].astype(object).to_numpy())
+        | (years != old_years)
+        | (quality != old_quality)
+        | has_added
+    )
+    return pd.DataFrame({
+        'id': frame['id'],
+        'seniority_level': seniority,
+        'years_experience': years,
+        'added_tags': tags_from_masks(added),
+        'data_quality_score': quality,
+        'changed': changed
+    })
+
+
+def records_frame(records: Sequence[Dict]) -> pd.DataFrame:
+    """מנת רשומות שמורות (dict) כ-DataFrame עם עמודות הניקוד בלבד"""
+    return pd.DataFrame.from_records(records, columns=SCORING_COLUMNS)
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Incremental Candidate Store
+מאגר מועמדים אינקרמנטלי - לוג סגמנטים append-only עם manifest, קומיט אטומי ודחיסה
+"""
+
+import json
+import logging
+import mmap
+import os
+from array import array
+from collections import namedtuple
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from append_log import atomic_write
+from candidate_normalize import dedup_keys
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+STORE_VERSION = 1
+
+# מפתחות הכפילויות שנשמרים בקובץ האינדקס של כל סגמנט
+KeyEntry = namedtuple('KeyEntry', [
+    'id', 'email', 'linkedin_url', 'name', 'current_company',
+    'email_key', 'linkedin_key', 'name_key', 'company_key'
+])
+
+_NORMALIZED_KEY_FIELDS = ('email_key', 'linkedin_key', 'name_key', 'company_key')
+
+# רשומה לקומיט: dict, או שורה גולמית שכבר מקודדת יחד עם מפתחותיה
+StoreRecord = Union[Dict, Tuple[KeyEntry, bytes]]
+
+
+def encode_record(record: Dict) -> bytes:
+    """שורת JSON קומפקטית לרשומה"""
+    return dumps(record) + b'\n'
+
+
+def key_entry_from_record(record: Dict) -> KeyEntry:
+    """מפתחות הכפילויות של רשומה (רשומות ישנות בלי מפתחות מנורמלים מחושבות כאן)"""
+    if 'email_key' not in record:
+        record = dict(record)
+        record.update(zip(_NORMALIZED_KEY_FIELDS, dedup_keys(
+            record.get('email'), record.get('linkedin_url'), record.get('name'), record.get('current_company')
+        )))
+    return KeyEntry(*(record.get(field) for field in KeyEntry._fields))
+
+
+class CandidateStore:
+    """לוג סגמנטים append-only של רשומות מועמדים
+
+    כל ריצה כותבת סגמנט חדש רק עם הרשומות החדשות/שמוזגו. ה-manifest
+    מחליף את עצמו אטומית ורק סגמנטים שרשומים בו נחשבים - קריסה באמצע
+    קומיט משאירה את המצב הקודם שלם. רשומה מאוחרת מחליפה רשומה קודמת
+    עם אותו id, ודחיסה כותבת את המצב העדכני כסגמנט בסיס אחד.
+    """
+
+    def __init__(self, path: str = "candidates_master_db", compact_after_segments: int = 24,
+                 compact_ratio: float = 0.5):
+        self.path = path
+        self.compact_after_segments = compact_after_segments
+        self.compact_ratio = compact_ratio
+        self.manifest = self._read_manifest()
+
+        # מצב הטעינה האחרונה - לרענון אינקרמנטלי
+        self._loaded_segments: List[str] = []
+        self._state: Dict[str, Dict] = {}
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def _read_manifest(self) -> Dict:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {
+            'version': STORE_VERSION,
+            'generation': 0,
+            'next_segment': 1,
+            'segments': [],
+            'compacted_at': None
+        }
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        data = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        atomic_write(self.manifest_path, data)
+        self.manifest = manifest
+
+    def segment_path(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def index_path(self, name: str) -> str:
+        """קובץ האינדקס (offsets + מפתחות) של סגמנט"""
+        return os.path.join(self.path, name.replace('.jsonl', '.idx.json'))
+
+    @staticmethod
+    def read_segment(path: str) -> Iterator[Dict]:
+        """קריאת רשומות מסגמנט"""
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def load(self) -> Dict[str, Dict]:
+        """טעינת המצב העדכני (id -> רשומה)"""
+        self.manifest = self._read_manifest()
+        self._state = {}
+        self._loaded_segments = []
+        self._apply_segments(self.manifest['segments'])
+        return self._state
+
+    def refresh(self) -> Dict[str, Dict]:
+        """רענון אינקרמנטלי - קריאת הסגמנטים החדשים בלבד (O(changed))"""
+        manifest = self._read_manifest()
+        names = [segment['name'] for segment in manifest['segments']]
+        if names[:len(self._loaded_segments)] != self._loaded_segments:
+            # המאגר נדחס מאז הטעינה האחרונה - טעינה מלאה
+            return self.load()
+
+        self.manifest = manifest
+        changed = {}
+        for segment in manifest['segments'][len(self._loaded_segments):]:
+            for record in self.read_segment(self.segment_path(segment['name'])):
+                changed[record['id']] = record
+            self._loaded_segments.append(segment['name'])
+        self._state.update(changed)
+        return changed
+
+    def _apply_segments(self, segments: List[Dict]) -> None:
+        for segment in segments:
+            for record in self.read_segment(self.segment_path(segment['name'])):
+                self._state[record['id']] = record
+            self._loaded_segments.append(segment['name'])
+
+    def commit(self, records: Iterable[StoreRecord], kind: str = "delta") -> Optional[str]:
+        """קומיט אטומי של סגמנט חדש עם הרשומות שהשתנו"""
+        os.makedirs(self.path, exist_ok=True)
+        manifest = self._read_manifest()
+
+        name = f"segment_{manifest['next_segment']:06d}.jsonl"
+        path = self.segment_path(name)
+        tmp_path = f"{path}.tmp"
+
+        # טבלת offsets ומפתחות כפילויות - לטעינה עצלה
+        columns = {field: [] for field in KeyEntry._fields}
+        columns['offset'] = []
+        columns['length'] = []
+
+        count = 0
+        offset = 0
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                if isinstance(record, tuple):
+                    entry, line = record
+                else:
+                    entry = key_entry_from_record(record)
+                    line = encode_record(record)
+                f.write(line)
+                for field, value in zip(KeyEntry._fields, entry):
+                    columns[field].append(value)
+                columns['offset'].append(offset)
+                columns['length'].append(len(line))
+                offset += len(line)
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+
+        if count == 0:
+            os.remove(tmp_path)
+            return None
+
+        os.replace(tmp_path, path)
+        index_data = dumps(columns)
+        atomic_write(self.index_path(name), index_data)
+
+        segment = {
+            'name': name,
+            'kind': kind,
+            'records': count,
+            'bytes': os.path.getsize(path),
+            'created_at': datetime.now().isoformat()
+        }
+        new_manifest = dict(manifest)
+        new_manifest['generation'] = manifest['generation'] + 1
+        new_manifest['next_segment'] = manifest['next_segment'] + 1
+        new_manifest['segments'] = (
+            [segment] if kind == "base" else manifest['segments'] + [segment]
+        )
+        if kind == "base":
+            new_manifest['compacted_at'] = segment['created_at']
+
+        # נקודת הקומיט - החלפה אטומית של ה-manifest
+        self._write_manifest(new_manifest)
+        logger.info(f"Committed {count} records to {name} (generation {new_manifest['generation']})")
+
+        if kind == "base":
+            self._remove_unreferenced()
+        return name
+
+    def needs_compaction(self) -> bool:
+        """האם כדאי לדחוס - יותר מדי סגמנטים או הרבה רשומות מיותרות"""
+        segments = self.manifest['segments']
+        if len(segments) > self.compact_after_segments:
+            return True
+        # הסגמנט הוותיק הוא הבסיס גם כשהוא נכתב כ-delta (השמירה הראשונה של מאגר חדש)
+        base_records = segments[0]['records'] if segments else 0
+        delta_records = sum(s['records'] for s in segments) - base_records
+        return base_records > 0 and delta_records > base_records * self.compact_ratio
+
+    def compact(self, records: Optional[Iterable[StoreRecord]] = None) -> Optional[str]:
+        """כתיבת המצב העדכני כסגמנט בסיס אחד ומחיקת הסגמנטים הישנים"""
+        if records is None:
+            records = list(self.load().values())
+        name = self.commit(records, kind="base")
+        self._loaded_segments = []
+        self._state = {}
+        return name
+
+    def _remove_unreferenced(self) -> None:
+        """מחיקת סגמנטים שלא רשומים ב-manifest (ישנים או שאריות מקריסה)"""
+        referenced = {segment['name'] for segment in self.manifest['segments']}
+        for file_name in os.listdir(self.path):
+            segment_name = file_name.split('.')[0] + '.jsonl'
+            if file_name.startswith('segment_') and segment_name not in referenced:
+                try:
+                    os.remove(self.segment_path(file_name))
+                except OSError as e:
+                    logger.warning(f"Could not remove old segment {file_name}: {e}")
+
+    def stats(self) -> Dict:
+        """סטטיסטיקות מאגר"""
+        segments = self.manifest['segments']
+        return {
+            'generation': self.manifest['generation'],
+            'segments': len(segments),
+            'records_on_disk': sum(s['records'] for s in segments),
+            'bytes_on_disk': sum(s['bytes'] for s in segments),
+            'compacted_at': self.manifest.get('compacted_at')
+        }
+
+
+class LazyCandidateMap(MutableMapping):
+    """מפת מועמדים עצלה מעל הסגמנטים
+
+    רק מפתחות הכפילויות נטענים מראש (מקבצי האינדקס) ונשמרים כעמודות -
+    רשימה לכל שדה של KeyEntry, בלי אובייקט לכל רשומה. רשומות מלאות
+    נקראות לפי דרישה מקבצי הסגמנטים דרך mmap וטבלת offsets, ומועמד
+    שנשלף נשמר בזיכרון עד השמירה (כי מיזוג משנה אותו).
+    """
+
+    def __init__(self, store_path: str, segments: List[str], factory: Callable[[Dict], object]):
+        self.store_path = store_path
+        self.segments = segments
+        self.factory = factory
+
+        self._pos: Dict[str, int] = {}
+        # עמודות המפתחות לפי מיקום (None למועמד שנוסף בזיכרון)
+        self._columns: Dict[str, List] = {field: [] for field in KeyEntry._fields}
+        self._seg = array('H')
+        self._off = array('q')
+        self._len = array('q')
+        self._materialized: Dict[str, object] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._files = []
+
+    @classmethod
+    def open(cls, store: CandidateStore, factory: Callable[[Dict], object]) -> 'LazyCandidateMap':
+        """טעינת טבלת offsets ומפתחות מכל הסגמנטים (הרשומה המאוחרת זוכה)"""
+        names = [segment['name'] for segment in store.manifest['segments']]
+        lazy = cls(store.path, names, factory)
+        for seg_idx, name in enumerate(names):
+            with open(store.index_path(name), 'rb') as f:
+                columns = loads(f.read())
+            if 'email_key' not in columns:
+                # sidecar ישן - חישוב המפתחות המנורמלים פעם אחת בטעינה
+                keys = [
+                    dedup_keys(*row) for row in zip(
+                        columns['email'], columns['linkedin_url'], columns['name'], columns['current_company']
+                    )
+                ]
+                for i, field in enumerate(_NORMALIZED_KEY_FIELDS):
+                    columns[field] = [row[i] for row in keys]
+            lazy._extend(columns, seg_idx)
+        return lazy
+
+    def _extend(self, columns: Dict[str, List], seg_idx: int) -> None:
+        """הוספת עמודות של סגמנט - הרשומה המאוחרת זוכה ומועמד שכבר קיים שומר על מקומו בסדר"""
+        ids = columns['id']
+        start = len(self._seg)
+        # שורה של מועמד שהוחלף נשארת בעמודות בלי הפניה (כמו אחרי מחיקה)
+        self._pos.update(zip(ids, range(start, start + len(ids))))
+        for field, column in self._columns.items():
+            column.extend(columns[field])
+        self._seg.extend(array('H', [seg_idx]) * len(ids))
+        self._off.extend(columns['offset'])
+        self._len.extend(columns['length'])
+        if self._materialized:
+            for candidate_id in ids:
+                self._materialized.pop(candidate_id, None)
+
+    def _set_location(self, entry: KeyEntry, seg_idx: int, offset: int, length: int) -> None:
+        pos = self._pos.get(entry.id)
+        if pos is None:
+            self._pos[entry.id] = len(self._seg)
+            for column, value in zip(self._columns.values(), entry):
+                column.append(value)
+            self._seg.append(seg_idx)
+            self._off.append(offset)
+            self._len.append(length)
+        else:
+            for column, value in zip(self._columns.values(), entry):
+                column[pos] = value
+            self._seg[pos] = seg_idx
+            self._off[pos] = offset
+            self._len[pos] = length
+        self._materialized.pop(entry.id, None)
+
+    def _entry(self, pos: int) -> KeyEntry:
+        return KeyEntry(*(column[pos] for column in self._columns.values()))
+
+    def _mmap(self, seg_idx: int) -> mmap.mmap:
+        mapped = self._maps.get(seg_idx)
+        if mapped is None:
+            f = open(os.path.join(self.store_path, self.segments[seg_idx]), 'rb')
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._files.append(f)
+            self._maps[seg_idx] = mapped
+        return mapped
+
+    def raw(self, candidate_id: str) -> bytes:
+        """השורה הגולמית של רשומה מהסגמנט"""
+        pos = self._pos[candidate_id]
+        offset = self._off[pos]
+        return self._mmap(self._seg[pos])[offset:offset + self._len[pos]]
+
+    def record(self, candidate_id: str) -> Dict:
+        """הרשומה השמורה (dict) בלי ליצור מועמד"""
+        return json.loads(self.raw(candidate_id))
+
+    def __getitem__(self, candidate_id: str):
+        candidate = self._materialized.get(candidate_id)
+        if candidate is not None:
+            return candidate
+        if candidate_id not in self._pos:
+            raise KeyError(candidate_id)
+        candidate = self.factory(self.record(candidate_id))
+        self._materialized[candidate_id] = candidate
+        return candidate
+
+    def __setitem__(self, candidate_id: str, candidate) -> None:
+        if candidate_id not in self._pos:
+            self._pos[candidate_id] = len(self._seg)
+            for column in self._columns.values():
+                column.append(None)
+            self._seg.append(0)
+            self._off.append(-1)
+            self._len.append(0)
+        self._materialized[candidate_id] = candidate
+
+    def __delitem__(self, candidate_id: str) -> None:
+        # המאגר append-only - הרשומה יוצאת מהמפה ונעלמת מהדיסק בדחיסה הבאה
+        del self._pos[candidate_id]
+        self._materialized.pop(candidate_id, None)
+
+    def __contains__(self, candidate_id) -> bool:
+        return candidate_id in self._pos
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._pos)
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    def peek(self, candidate_id: str):
+        """המועמד בלי לשמור אותו במטמון (None אם לא קיים)"""
+        candidate = self._materialized.get(candidate_id)
+        if candidate is not None or candidate_id not in self._pos:
+            return candidate
+        return self.factory(self.record(candidate_id))
+
+    def iter_candidates(self) -> Iterator:
+        """כל המועמדים - רשומות שלא נשלפו נבנות זמנית בלי להישמר במטמון"""
+        for candidate_id in self._pos:
+            candidate = self._materialized.get(candidate_id)
+            yield candidate if candidate is not None else self.factory(self.record(candidate_id))
+
+    def is_materialized(self, candidate_id: str) -> bool:
+        return candidate_id in self._materialized
+
+    def key_entry(self, candidate_id: str):
+        """מפתחות הכפילויות של מועמד - בלי לקרוא את הרשומה המלאה"""
+        candidate = self._materialized.get(candidate_id)
+        if candidate is not None:
+            return candidate
+        return self._entry(self._pos[candidate_id])
+
+    def key_entries(self) -> Iterator:
+        """מפתחות הכפילויות של כל המועמדים לפי הסדר"""
+        for candidate_id in self._pos:
+            yield self.key_entry(candidate_id)
+
+    def key_columns(self) -> Dict[str, List]:
+        """מפתחות הכפילויות של כל המועמדים כעמודות לפי הסדר (לקריאה בלבד)
+
+        בלי מחיקות ומועמדים שנשלפו - העמודות עצמן, בלי העתקה.
+        """
+        if not self._materialized and len(self._pos) == len(self._seg):
+            return self._columns
+        positions = list(self._pos.values())
+        columns = {field: [column[pos] for pos in positions] for field, column in self._columns.items()}
+        if self._materialized:
+            for i, candidate_id in enumerate(self._pos):
+                candidate = self._materialized.get(candidate_id)
+                if candidate is not None:
+                    for field, column in columns.items():
+                        column[i] = getattr(candidate, field)
+        return columns
+
+    def iter_store_records(self, to_record: Callable[[object], Dict]) -> Iterator[StoreRecord]:
+        """רשומות לדחיסה - מועמדים שנשלפו מקודדים מחדש, השאר מועתקים גולמיים"""
+        for candidate_id, pos in self._pos.items():
+            candidate = self._materialized.get(candidate_id)
+            if candidate is not None:
+                yield to_record(candidate)
+            else:
+                yield self._entry(pos), self.raw(candidate_id)
+
+    def export(self, candidate_ids: Iterable[str]) -> Dict:
+        """תיאור picklable של תת-קבוצה לפי הסדר (לשארדים במצב מקבילי)"""
+        items = []
+        for candidate_id in candidate_ids:
+            candidate = self._materialized.get(candidate_id)
+            if candidate is not None:
+                items.append((candidate_id, candidate, None))
+            else:
+                pos = self._pos[candidate_id]
+                items.append((candidate_id, None, (
+                    self._entry(pos), self._seg[pos], self._off[pos], self._len[pos]
+                )))
+        return {
+            'store_path': self.store_path,
+            'segments': self.segments,
+            'items': items
+        }
+
+    @classmethod
+    def from_export(cls, exported: Dict, factory: Callable[[Dict], object]) -> 'LazyCandidateMap':
+        """בנייה מחדש מתיאור שיוצא ב-export"""
+        lazy = cls(exported['store_path'], exported['segments'], factory)
+        for candidate_id, candidate, location in exported['items']:
+            if candidate is not None:
+                lazy[candidate_id] = candidate
+            else:
+                lazy._set_location(*location)
+        return lazy
+
+    def close(self) -> None:
+        for mapped in self._maps.values():
+            mapped.close()
+        for f in self._files:
+            f.close()
+        self._maps = {}
+        self._files = []
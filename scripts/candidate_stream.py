@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Streaming Candidate File Reader
+קריאה זורמת של קבצי מועמדים במנות - זיכרון חסום לפי גודל המנה ולא לפי גודל הקובץ
+"""
+
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# העמודות שהאינטגרציה קוראת - בקבצים עמודתיים רק הן נטענות
+INPUT_COLUMNS = [
+    'name', 'email', 'phone', 'location', 'linkedin_url', 'github_url', 'twitter_handle',
+    'title', 'company', 'source', 'skills', 'technologies', 'expertise', 'tech_stack'
+]
+
+
+def _skip_records(chunks: Iterator[List[Dict]], skip: int) -> Iterator[List[Dict]]:
+    """דילוג על skip הרשומות הראשונות של זרם מנות"""
+    for chunk in chunks:
+        if skip >= len(chunk):
+            skip -= len(chunk)
+            continue
+        yield chunk[skip:] if skip else chunk
+        skip = 0
+
+
+def iter_csv_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    offset: int = 0, skip: int = 0) -> Iterator[List[Dict]]:
+    """קריאת CSV במנות - כל מנה היא רשימת dicts פשוטים
+
+    offset > 0 ממשיך מבית מסוים (תחילת שורה) עם שמות העמודות מכותרת הקובץ;
+    skip מדלג על רשומות אחרי נקודת ההתחלה (המשך אחרי שחזור מיומן).
+    """
+    if skip:
+        yield from _skip_records(iter_csv_chunks(file_path, chunk_size, offset), skip)
+        return
+    if offset:
+        columns = pd.read_csv(file_path, encoding='utf-8-sig', nrows=0).columns.tolist()
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            reader = pd.read_csv(
+                f,
+                encoding='utf-8',
+                chunksize=chunk_size,
+                dtype=str,
+                keep_default_na=False,
+                header=None,
+                names=columns
+            )
+            for chunk in reader:
+                yield chunk.to_dict('records')
+        return
+
+    reader = pd.read_csv(
+        file_path,
+        encoding='utf-8-sig',
+        chunksize=chunk_size,
+        dtype=str,
+        keep_default_na=False
+    )
+    for chunk in reader:
+        yield chunk.to_dict('records')
+
+
+def iter_json_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     skip: int = 0) -> Iterator[List[Dict]]:
+    """קריאת מערך JSON באופן הדרגתי (ijson) במנות, אחרי דילוג על skip הרשומות הראשונות"""
+    with open(file_path, 'rb') as f:
+        if HAS_IJSON:
+            records = ijson.items(f, 'item', use_float=True)
+        else:
+            logger.warning("ijson not installed, loading whole JSON file into memory")
+            records = iter(json.load(f))
+        records = islice(records, skip, None)
+
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def iter_parquet_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, skip: int = 0,
+                        columns: Optional[Sequence[str]] = None, filters=None) -> Iterator[List[Dict]]:
+    """קריאת Parquet במנות - רק עמודות הקלט, רשימות (skills) מגיעות כרשימות"""
+    from arrow_io import read_batches
+    return read_batches(file_path, columns=INPUT_COLUMNS if columns is None else columns,
+                        filters=filters, batch_size=chunk_size, skip=skip)
+
+
+def iter_record_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       offset: int = 0, skip: int = 0) -> Iterator[List[Dict]]:
+    """מנות רשומות לפי סוג הקובץ (offset ב-CSV / skip רשומות בכל הפורמטים להמשך קליטה)"""
+    if file_path.endswith('.csv'):
+        return iter_csv_chunks(file_path, chunk_size, offset, skip)
+    if file_path.endswith('.json'):
+        return iter_json_chunks(file_path, chunk_size, skip)
+    if file_path.endswith('.parquet'):
+        return iter_parquet_chunks(file_path, chunk_size, skip)
+    raise ValueError(f"Unsupported file format: {file_path}")
+
+
+def peak_rss_mb() -> float:
+    """שיא צריכת הזיכרון של התהליך מתחילתו (MB) - לא יורד אחרי קובץ גדול"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ב-macOS הערך בבתים, ב-Linux ב-KB
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """צריכת הזיכרון הנוכחית של התהליך (MB) מ-/proc/self/statm - None אם אין /proc"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class IngestionStats:
+    """מדידת תפוקה (rows/s) ושיא זיכרון לקובץ
+
+    השיא לקובץ נדגם מה-RSS הנוכחי בתחילת הקובץ ובסוף כל מנה; process_peak_rss_mb
+    הוא שיא התהליך כולו (כולל קבצים קודמים).
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.rows = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.peak_rss = current_rss_mb()
+
+    def add_chunk(self, rows: int):
+        self.rows += rows
+        self.chunks += 1
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss or 0.0, rss)
+
+    def finish(self) -> Dict:
+        self.elapsed = time.perf_counter() - self.started
+        return self.as_dict()
+
+    def as_dict(self) -> Dict:
+        return {
+            'file': self.file_path,
+            'rows': self.rows,
+            'chunks': self.chunks,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows / self.elapsed, 1) if self.elapsed > 0 else 0.0,
+            'peak_rss_mb': round(self.peak_rss, 1) if self.peak_rss is not None else None,
+            'process_peak_rss_mb': round(peak_rss_mb(), 1)
+        }
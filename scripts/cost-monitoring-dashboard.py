@@ -4,18 +4,19 @@ Cost Monitoring Dashboard for MeUnique
 מערכת ניטור עלויות ומעקב אחר פעולות
 """
 
+import atexit
 import json
 import os
-import sys
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from datetime import datetime
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 import logging
-from collections import defaultdict
-import numpy as np
+
+from cost_aggregates import DAY_WINDOW, MONTH_WINDOW, TODAY_WINDOW, WEEK_WINDOW, CostAggregates
+from cost_dashboard_renderer import DASHBOARD_PNG_FILE, DashboardRenderer
+from cost_event_store import CostEventStore
+from cost_event_log import DEFAULT_FSYNC_POLICY, EVENTS_LOG_FILE, CostEventLog
+from serialization import dump
 
 # הגדרת לוגינג
 logging.basicConfig(
@@ -45,9 +46,19 @@ class CostLimits:
 class CostMonitor:
     """מערכת ניטור עלויות"""
     
-    def __init__(self, config_file: str = "cost_config.json"):
+    def __init__(self, config_file: str = "cost_config.json", events_log: str = EVENTS_LOG_FILE,
+                 fsync_policy: str = DEFAULT_FSYNC_POLICY):
         self.config_file = config_file
-        self.events: List[CostEvent] = []
+        # אירועים בעמודות (זמן, קודי סוכן/פעולה, עלות) - השאילתות וקטוריות
+        self.store = CostEventStore()
+        # סכומים מצטברים בחלונות זמן - בדיקת מגבלות ודוחות בלי סריקת ההיסטוריה
+        self.aggregates = CostAggregates()
+        # יומן append-only - snapshot של cost_events.json נכתב רק ב-save_events
+        self.events_file = "cost_events.json"
+        self.event_log = CostEventLog(events_log, fsync_policy=fsync_policy)
+        atexit.register(self.event_log.close)
+        # דשבורד אינקרמנטלי: JSON לפרונטאנד, PNG רק לפי בקשה (worker ברקע - start_dashboard_worker)
+        self.dashboard = DashboardRenderer(self)
         self.load_config()
         self.load_events()
         
@@ -100,38 +111,52 @@ class CostMonitor:
         with open(self.config_file, 'w') as f:
             json.dump(self.config, f, indent=2)
             
+    @staticmethod
+    def event_to_record(event: CostEvent) -> Dict:
+        return {
+            'timestamp': event.timestamp.isoformat(),
+            'agent': event.agent,
+            'operation': event.operation,
+            'cost': event.cost,
+            'details': event.details
+        }
+        
+    @staticmethod
+    def event_from_record(record: Dict) -> CostEvent:
+        return CostEvent(
+            timestamp=datetime.fromisoformat(record['timestamp']),
+            agent=record['agent'],
+            operation=record['operation'],
+            cost=record['cost'],
+            details=record['details']
+        )
+        
     def load_events(self):
-        """טעינת אירועי עלות"""
-        events_file = "cost_events.json"
-        if os.path.exists(events_file):
-            with open(events_file, 'r') as f:
-                data = json.load(f)
-                self.events = [
-                    CostEvent(
-                        timestamp=datetime.fromisoformat(e['timestamp']),
-                        agent=e['agent'],
-                        operation=e['operation'],
-                        cost=e['cost'],
-                        details=e['details']
-                    )
-                    for e in data
-                ]
+        """טעינת אירועי עלות - קריאה זורמת של היומן"""
+        if not self.event_log.exists() and os.path.exists(self.events_file):
+            # snapshot ישן בלי יומן - המרה חד-פעמית ליומן
+            with open(self.events_file, 'r') as f:
+                migrated = self.event_log.append_all(json.load(f))
+            logger.info(f"Migrated {migrated} cost events from {self.events_file} to {self.event_log.path}")
+            
+        self.store = CostEventStore()
+        self.aggregates = CostAggregates()
+        for record in self.event_log.replay():
+            timestamp = datetime.fromisoformat(record['timestamp'])
+            self.store.append(timestamp, record['agent'], record['operation'], record['cost'], record['details'])
+            self.aggregates.add(timestamp, record['agent'], record['operation'], record['cost'])
+            
+    @property
+    def events(self) -> List[CostEvent]:
+        """כל האירועים כאובייקטים (נבנים מהעמודות בכל קריאה - לשאילתות יש את self.store)"""
+        return [CostEvent(**record) for record in self.store.iter_records()]
                 
     def save_events(self):
-        """שמירת אירועי עלות"""
-        events_file = "cost_events.json"
-        data = [
-            {
-                'timestamp': e.timestamp.isoformat(),
-                'agent': e.agent,
-                'operation': e.operation,
-                'cost': e.cost,
-                'details': e.details
-            }
-            for e in self.events
-        ]
-        with open(events_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        """snapshot של כל אירועי העלות ל-cost_events.json (לפי דרישה - היומן הוא המקור)"""
+        self.event_log.flush(fsync=True)
+        records = self.store.iter_records()
+        dump([dict(record, timestamp=record['timestamp'].isoformat()) for record in records], self.events_file, pretty=True)
+        return self.events_file
             
     def add_event(self, agent: str, operation: str, cost: float, details: Dict = None):
         """הוספת אירוע עלות"""
@@ -142,8 +167,10 @@ class CostMonitor:
             cost=cost,
             details=details or {}
         )
-        self.events.append(event)
-        self.save_events()
+        self.store.append(event.timestamp, agent, operation, cost, event.details)
+        self.event_log.append(self.event_to_record(event))
+        self.aggregates.add(event.timestamp, agent, operation, cost)
+        self.dashboard.notify()
         
         # בדיקת חריגות
         self.check_limits()
@@ -152,18 +179,18 @@ class CostMonitor:
         """בדיקת חריגות מהמגבלות"""
         now = datetime.now()
         
-        # עלות יומית
-        daily_cost = self.get_cost_for_period(now - timedelta(days=1), now)
+        # עלות יומית (חלונות נגללים: 24 שעות ברזולוציה של דקה, שבוע וחודש של שעה)
+        daily_cost = self.aggregates.cost(DAY_WINDOW, now)
         if daily_cost > self.limits.daily_limit * self.limits.alert_threshold:
             self.send_alert(f"⚠️ Daily cost alert: ${daily_cost:.2f} / ${self.limits.daily_limit:.2f}")
             
         # עלות שבועית
-        weekly_cost = self.get_cost_for_period(now - timedelta(days=7), now)
+        weekly_cost = self.aggregates.cost(WEEK_WINDOW, now)
         if weekly_cost > self.limits.weekly_limit * self.limits.alert_threshold:
             self.send_alert(f"⚠️ Weekly cost alert: ${weekly_cost:.2f} / ${self.limits.weekly_limit:.2f}")
             
         # עלות חודשית
-        monthly_cost = self.get_cost_for_period(now - timedelta(days=30), now)
+        monthly_cost = self.aggregates.cost(MONTH_WINDOW, now)
         if monthly_cost > self.limits.monthly_limit * self.limits.alert_threshold:
             self.send_alert(f"⚠️ Monthly cost alert: ${monthly_cost:.2f} / ${self.limits.monthly_limit:.2f}")
             
@@ -179,92 +206,46 @@ class CostMonitor:
         # כאן אפשר להוסיף שליחת מייל/SMS/Slack
         
     def get_cost_for_period(self, start: datetime, end: datetime) -> float:
-        """חישוב עלות לתקופה"""
-        return sum(
-            e.cost for e in self.events
-            if start <= e.timestamp <= end
-        )
+        """חישוב עלות לתקופה שרירותית (מסכה על עמודת הזמן - לחלונות הקבועים יש aggregates)"""
+        return self.store.cost_between(start, end)
         
     def get_agent_costs_today(self) -> Dict[str, float]:
         """עלויות לפי סוכן היום"""
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        agent_costs = defaultdict(float)
-        
-        for event in self.events:
-            if event.timestamp >= today:
-                agent_costs[event.agent] += event.cost
-                
-        return dict(agent_costs)
+        return self.aggregates.window(TODAY_WINDOW).agent_costs()
         
-    def generate_dashboard(self):
-        """יצירת דשבורד ויזואלי"""
-        # הכנת נתונים
-        df = pd.DataFrame([
-            {
-                'timestamp': e.timestamp,
-                'agent': e.agent,
-                'operation': e.operation,
-                'cost': e.cost,
-                'hour': e.timestamp.hour,
-                'day': e.timestamp.date()
-            }
-            for e in self.events
-        ])
-        
-        if df.empty:
+    def generate_dashboard(self, path: str = DASHBOARD_PNG_FILE) -> Optional[str]:
+        """יצירת דשבורד ויזואלי (רק פאנלים שהשתנו מאז הקודם מצוירים מחדש)"""
+        if not len(self.store):
             logger.info("No cost events to display")
-            return
+            return None
             
-        # יצירת דשבורד
-        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-        fig.suptitle('MeUnique Cost Monitoring Dashboard', fontsize=16)
-        
-        # 1. עלות לפי יום
-        daily_costs = df.groupby('day')['cost'].sum()
-        axes[0, 0].plot(daily_costs.index, daily_costs.values, marker='o')
-        axes[0, 0].axhline(y=self.limits.daily_limit, color='r', linestyle='--', label='Daily Limit')
-        axes[0, 0].set_title('Daily Costs')
-        axes[0, 0].set_xlabel('Date')
-        axes[0, 0].set_ylabel('Cost ($)')
-        axes[0, 0].legend()
-        axes[0, 0].tick_params(axis='x', rotation=45)
+        self.dashboard.render_png(path)
+        logger.info(f"Dashboard saved to {path}")
+        return path
         
-        # 2. עלות לפי סוכן
-        agent_costs = df.groupby('agent')['cost'].sum().sort_values(ascending=False)
-        axes[0, 1].bar(agent_costs.index, agent_costs.values)
-        axes[0, 1].set_title('Total Cost by Agent')
-        axes[0, 1].set_xlabel('Agent')
-        axes[0, 1].set_ylabel('Total Cost ($)')
-        axes[0, 1].tick_params(axis='x', rotation=45)
+    def dashboard_data(self) -> Dict:
+        """נתוני הפאנלים בלבד (נשמרים גם ל-cost_dashboard.json) - בלי רסטור"""
+        self.dashboard.refresh()
+        return self.dashboard.data
         
-        # 3. התפלגות פעולות
-        operation_counts = df['operation'].value_counts()
-        axes[1, 0].pie(operation_counts.values, labels=operation_counts.index, autopct='%1.1f%%')
-        axes[1, 0].set_title('Operations Distribution')
-        
-        # 4. עלות לפי שעה ביום
-        hourly_costs = df.groupby('hour')['cost'].mean()
-        axes[1, 1].bar(hourly_costs.index, hourly_costs.values)
-        axes[1, 1].set_title('Average Cost by Hour')
-        axes[1, 1].set_xlabel('Hour')
-        axes[1, 1].set_ylabel('Average Cost ($)')
-        
-        plt.tight_layout()
-        plt.savefig('cost_dashboard.png', dpi=300, bbox_inches='tight')
-        logger.info("Dashboard saved to cost_dashboard.png")
+    def start_dashboard_worker(self) -> DashboardRenderer:
+        """רענון הדשבורד ברקע אחרי כל add_event (לכל היותר פעם ב-interval)"""
+        atexit.register(self.dashboard.stop)
+        return self.dashboard.start()
         
     def generate_report(self) -> Dict:
         """יצירת דוח מפורט"""
         now = datetime.now()
         
+        totals = self.aggregates.totals
         report = {
             'generated_at': now.isoformat(),
             'summary': {
-                'total_events': len(self.events),
-                'total_cost': sum(e.cost for e in self.events),
-                'daily_cost': self.get_cost_for_period(now - timedelta(days=1), now),
-                'weekly_cost': self.get_cost_for_period(now - timedelta(days=7), now),
-                'monthly_cost': self.get_cost_for_period(now - timedelta(days=30), now)
+                'total_events': totals.count,
+                'total_cost': totals.cost,
+                'daily_cost': self.aggregates.cost(DAY_WINDOW, now),
+                'weekly_cost': self.aggregates.cost(WEEK_WINDOW, now),
+                'monthly_cost': self.aggregates.cost(MONTH_WINDOW, now)
             },
             'by_agent': {},
             'by_operation': {},
@@ -272,33 +253,19 @@ class CostMonitor:
         }
         
         # עלות לפי סוכן
-        agent_costs = defaultdict(float)
-        agent_operations = defaultdict(int)
-        
-        for event in self.events:
-            agent_costs[event.agent] += event.cost
-            agent_operations[event.agent] += 1
-            
-        for agent, cost in agent_costs.items():
+        for agent, (cost, operations, _) in totals.by_agent.items():
             report['by_agent'][agent] = {
                 'total_cost': cost,
-                'operations': agent_operations[agent],
-                'avg_cost_per_operation': cost / agent_operations[agent] if agent_operations[agent] > 0 else 0
+                'operations': operations,
+                'avg_cost_per_operation': cost / operations if operations > 0 else 0
             }
             
         # עלות לפי פעולה
-        operation_costs = defaultdict(float)
-        operation_counts = defaultdict(int)
-        
-        for event in self.events:
-            operation_costs[event.operation] += event.cost
-            operation_counts[event.operation] += 1
-            
-        for operation, cost in operation_costs.items():
+        for operation, (cost, count, _) in totals.by_operation.items():
             report['by_operation'][operation] = {
                 'total_cost': cost,
-                'count': operation_counts[operation],
-                'avg_cost': cost / operation_counts[operation] if operation_counts[operation] > 0 else 0
+                'count': count,
+                'avg_cost': cost / count if count > 0 else 0
             }
             
         # המלצות
@@ -337,8 +304,8 @@ class CostMonitor:
         }
         
         # ניתוח שימוש במקורות בתשלום vs חינם
-        paid_operations = sum(1 for e in self.events if e.cost > 0)
-        total_operations = len(self.events)
+        paid_operations = self.store.paid_count()
+        total_operations = len(self.store)
         
         if paid_operations / total_operations > 0.5:
             optimizations['use_free_sources']['recommendations'].append(
@@ -346,19 +313,8 @@ class CostMonitor:
             )
             optimizations['use_free_sources']['potential_savings'] = paid_operations * 0.3 * 0.1
             
-        # המלצות לאיחוד פעולות
-        agent_frequency = defaultdict(list)
-        for event in self.events:
-            agent_frequency[event.agent].append(event.timestamp)
-            
-        for agent, timestamps in agent_frequency.items():
-            # בדיקה אם יש פעולות קרובות מדי
-            timestamps.sort()
-            close_operations = 0
-            for i in range(1, len(timestamps)):
-                if (timestamps[i] - timestamps[i-1]).seconds < 60:
-                    close_operations += 1
-                    
+        # המלצות לאיחוד פעולות - פעולות של אותו סוכן בהפרש של פחות מדקה
+        for agent, close_operations in self.store.close_operations_by_agent(60).items():
             if close_operations > 10:
                 optimizations['batch_operations']['recommendations'].append(
                     f"Batch operations for {agent} - {close_operations} operations within 1 minute"
@@ -369,13 +325,19 @@ class CostMonitor:
 
 def main():
     """פונקציה ראשית"""
-    monitor = CostMonitor()
+    monitor = CostMonitor(fsync_policy=os.getenv("COST_EVENTS_FSYNC", DEFAULT_FSYNC_POLICY))
+    
+    # snapshot של האירועים ל-cost_events.json לפי דרישה (COST_EVENTS_SNAPSHOT=1)
+    if os.getenv("COST_EVENTS_SNAPSHOT", "0") == "1":
+        logger.info(f"Cost events snapshot saved to {monitor.save_events()}")
     
     # הדגמה - הוספת אירועי עלות
     logger.info("Starting cost monitoring...")
     
-    # יצירת דשבורד
-    monitor.generate_dashboard()
+    # נתוני הדשבורד ל-JSON, ו-PNG רק לפי בקשה (COST_DASHBOARD_PNG=0 - בלי רסטור)
+    monitor.dashboard_data()
+    if os.getenv("COST_DASHBOARD_PNG", "1") == "1":
+        monitor.generate_dashboard()
     
     # יצירת דוח
     report = monitor.generate_report()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Rolling Cost Aggregates
+סכומי עלות מצטברים בחלונות זמן - דליים של דקה/שעה/יום במערך מעגלי לכל חלון, עם
+סכום רץ כולל ולפי סוכן ולפי פעולה. אירוע מתווסף ב-O(1), ודליים שיצאו מהחלון מופחתים
+כשהזמן מתקדם - כך שבדיקת מגבלות ודוחות קוראים סכומים מוכנים במקום לסרוק את ההיסטוריה
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+_EPOCH = datetime(2020, 1, 1)
+
+# שם חלון -> (גודל דלי בשניות, מספר דליים): 24 שעות ברזולוציה של דקה, 7 ו-30 ימים
+# ברזולוציה של שעה, ו-today - היום הקלנדרי (מחצות)
+DAY_WINDOW = 'day'
+WEEK_WINDOW = 'week'
+MONTH_WINDOW = 'month'
+TODAY_WINDOW = 'today'
+DEFAULT_WINDOWS: Dict[str, Tuple[int, int]] = {
+    DAY_WINDOW: (60, 24 * 60),
+    WEEK_WINDOW: (3600, 7 * 24),
+    MONTH_WINDOW: (3600, 30 * 24),
+    TODAY_WINDOW: (86400, 1),
+}
+
+# מיקומים ברשומת סכום של מפתח: [עלות, אירועים, יחידות (למשל טוקנים)]
+COST, COUNT, UNITS = 0, 1, 2
+
+
+def _local(timestamp: datetime) -> datetime:
+    # אירועים נרשמים בשעון מקומי נאיבי - חותמת עם אזור זמן מומרת אליו
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+
+class CostTotals:
+    """סכום עלות, מספר אירועים ויחידות - כולל, לפי סוכן ולפי פעולה"""
+
+    __slots__ = ('cost', 'count', 'units', 'by_agent', 'by_operation')
+
+    def __init__(self):
+        self.cost = 0.0
+        self.count = 0
+        self.units = 0
+        self.by_agent: Dict[str, List[float]] = {}
+        self.by_operation: Dict[str, List[float]] = {}
+
+    @staticmethod
+    def _bump(table: Dict[str, List[float]], key: str, cost: float, count: int, units: float) -> None:
+        entry = table.get(key)
+        if entry is None:
+            table[key] = [cost, count, units]
+            return
+        entry[COUNT] += count
+        if entry[COUNT] <= 0:
+            # מפתח שכל האירועים שלו יצאו מהחלון - בלי שארית עיגול
+            del table[key]
+            return
+        entry[COST] += cost
+        entry[UNITS] += units
+
+    def add(self, agent: str, operation: str, cost: float, units: float = 0, count: int = 1) -> None:
+        self.count += count
+        if self.count <= 0:
+            self.cost, self.count, self.units = 0.0, 0, 0
+            self.by_agent.clear()
+            self.by_operation.clear()
+            return
+        self.cost += cost
+        self.units += units
+        self._bump(self.by_agent, agent, cost, count, units)
+        self._bump(self.by_operation, operation, cost, count, units)
+
+    def merge(self, other: 'CostTotals', sign: int = 1) -> None:
+        """הוספה (או הפחתה עם sign=-1) של סכומים אחרים"""
+        self.count += sign * other.count
+        if self.count <= 0:
+            self.cost, self.count, self.units = 0.0, 0, 0
+            self.by_agent.clear()
+            self.by_operation.clear()
+            return
+        self.cost += sign * other.cost
+        self.units += sign * other.units
+        for table, other_table in ((self.by_agent, other.by_agent), (self.by_operation, other.by_operation)):
+            for key, (cost, count, units) in other_table.items():
+                self._bump(table, key, sign * cost, sign * count, sign * units)
+
+    def agent_costs(self) -> Dict[str, float]:
+        return {agent: entry[COST] for agent, entry in self.by_agent.items()}
+
+    def operation_costs(self) -> Dict[str, float]:
+        return {operation: entry[COST] for operation, entry in self.by_operation.items()}
+
+
+class RollingWindow:
+    """חלון זמן נגלל: מערך מעגלי של דליים וסכום רץ של הדליים שבתוכו
+
+    דלי b מכסה [b × bucket_seconds, (b + 1) × bucket_seconds) מ-_EPOCH. החלון
+    מכיל את הדלי של הזמן הנוכחי ואת buckets - 1 הדליים שלפניו; כשהזמן מתקדם
+    הדליים שיצאו מופחתים מהסכום הרץ (לכל היותר buckets הפחתות לקפיצה).
+    """
+
+    def __init__(self, bucket_seconds: int, buckets: int):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.totals = CostTotals()
+        self._slots: List[Optional[CostTotals]] = [None] * buckets
+        self._head: Optional[int] = None
+
+    def bucket(self, timestamp: datetime) -> int:
+        return int((_local(timestamp) - _EPOCH).total_seconds() // self.bucket_seconds)
+
+    def advance(self, bucket: int) -> None:
+        """הזזת סוף החלון לדלי bucket והפחתת הדליים שיצאו"""
+        if self._head is not None and bucket <= self._head:
+            return
+        if self._head is None or bucket - self._head >= self.buckets:
+            self._slots = [None] * self.buckets
+            self.totals = CostTotals()
+        else:
+            for expired in range(self._head + 1, bucket + 1):
+                slot = self._slots[expired % self.buckets]
+                if slot is not None:
+                    self.totals.merge(slot, -1)
+                    self._slots[expired % self.buckets] = None
+        self._head = bucket
+
+    def _slot(self, timestamp: datetime) -> Optional[CostTotals]:
+        """הדלי של timestamp (None אם הוא ישן מכדי להיכנס לחלון)"""
+        bucket = self.bucket(timestamp)
+        self.advance(bucket)
+        if bucket <= self._head - self.buckets:
+            return None
+        index = bucket % self.buckets
+        slot = self._slots[index]
+        if slot is None:
+            slot = self._slots[index] = CostTotals()
+        return slot
+
+    def add(self, timestamp: datetime, agent: str, operation: str, cost: float, units: float = 0) -> None:
+        slot = self._slot(timestamp)
+        if slot is not None:
+            slot.add(agent, operation, cost, units)
+            self.totals.add(agent, operation, cost, units)
+
+    def merge(self, timestamp: datetime, totals: CostTotals) -> None:
+        """סכומים מוכנים (למשל יום שמור) לדלי של timestamp"""
+        slot = self._slot(timestamp)
+        if slot is not None:
+            slot.merge(totals)
+            self.totals.merge(totals)
+
+    def read(self, now: Optional[datetime] = None) -> CostTotals:
+        """הסכומים בחלון שמסתיים ב-now"""
+        self.advance(self.bucket(now or datetime.now()))
+        return self.totals
+
+
+class CostAggregates:
+    """סכומים מצטברים לכל ההיסטוריה ולחלונות הזמן (ברירת מחדל: DEFAULT_WINDOWS)"""
+
+    def __init__(self, windows: Optional[Dict[str, Tuple[int, int]]] = None):
+        self.windows = {
+            name: RollingWindow(bucket_seconds, buckets)
+            for name, (bucket_seconds, buckets) in (windows or DEFAULT_WINDOWS).items()
+        }
+        self.totals = CostTotals()
+
+    def add(self, timestamp: datetime, agent: str, operation: str, cost: float, units: float = 0) -> None:
+        """אירוע עלות (operation - סוג הפעולה או המודל, units - למשל טוקנים)"""
+        self.totals.add(agent, operation, cost, units)
+        for window in self.windows.values():
+            window.add(timestamp, agent, operation, cost, units)
+
+    def merge(self, timestamp: datetime, totals: CostTotals) -> None:
+        """סכומים מוכנים שנצברו מחוץ למבנה (למשל יום שמור) כאילו קרו ב-timestamp"""
+        self.totals.merge(totals)
+        for window in self.windows.values():
+            window.merge(timestamp, totals)
+
+    def window(self, name: str, now: Optional[datetime] = None) -> CostTotals:
+        return self.windows[name].read(now)
+
+    def cost(self, name: str, now: Optional[datetime] = None) -> float:
+        return self.window(name, now).cost
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Cost Dashboard Renderer
+רינדור הדשבורד של העלויות ברקע - נתוני הפאנלים מחושבים מ-snapshot של מאגר האירועים
+ונכתבים כ-JSON קל (cost_dashboard.json) לפרונטאנד, רק פאנלים שהנתונים שלהם השתנו
+מצוירים מחדש, סדרות זמן ארוכות מדוללות לפני הציור, ו-PNG נוצר רק כשמבקשים אותו.
+הציור ב-Agg (בלי GUI) על Figure משלו - בלי מצב גלובלי של pyplot
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from cost_event_store import CostEventStore
+from serialization import dump
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_DATA_FILE = "cost_dashboard.json"
+DASHBOARD_PNG_FILE = "cost_dashboard.png"
+DEFAULT_DPI = 300
+# נקודות לכל היותר בסדרת זמן (זוגות מינימום/מקסימום לכל דלי)
+DEFAULT_MAX_POINTS = 500
+# לכל היותר רענון אחד ברקע בכל פרק זמן כזה - אירועים שמגיעים בינתיים מצטרפים לרענון הבא
+DEFAULT_REFRESH_INTERVAL = 2.0
+
+DAILY_PANEL = 'daily_costs'
+AGENT_PANEL = 'agent_costs'
+OPERATIONS_PANEL = 'operations'
+HOURLY_PANEL = 'hourly_costs'
+# פאנל -> מיקום ברשת 2x2
+PANELS = {
+    DAILY_PANEL: (0, 0),
+    AGENT_PANEL: (0, 1),
+    OPERATIONS_PANEL: (1, 0),
+    HOURLY_PANEL: (1, 1),
+}
+
+
+def downsample(values: np.ndarray, max_points: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """מיקומי הנקודות לציור: לכל דלי - המינימום והמקסימום שלו (שיאים לא נעלמים)"""
+    count = len(values)
+    if count <= max_points:
+        return np.arange(count)
+    edges = np.linspace(0, count, max_points // 2 + 1).astype(np.int64)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = values[start:end]
+            keep.append(start + int(np.argmin(bucket)))
+            keep.append(start + int(np.argmax(bucket)))
+    return np.unique(keep)
+
+
+def panel_data(store: CostEventStore, daily_limit: float, max_points: int = DEFAULT_MAX_POINTS) -> Dict[str, Dict]:
+    """נתוני ארבעת הפאנלים כרשימות (מוכן ל-JSON)"""
+    daily = store.daily_costs()
+    keep = downsample(daily.values, max_points)
+    agents = store.cost_by_agent().sort_values(ascending=False)
+    operations = store.count_by_operation().sort_values(ascending=False)
+    hourly = store.hourly_mean_cost()
+    return {
+        DAILY_PANEL: {
+            'dates': [daily.index[i].isoformat() for i in keep],
+            'costs': daily.values[keep].tolist(),
+            'days': len(daily),
+            'daily_limit': daily_limit
+        },
+        AGENT_PANEL: {
+            'agents': agents.index.tolist(),
+            'costs': agents.values.tolist()
+        },
+        OPERATIONS_PANEL: {
+            'operations': operations.index.tolist(),
+            'counts': operations.values.tolist()
+        },
+        HOURLY_PANEL: {
+            'hours': hourly.index.tolist(),
+            'avg_costs': hourly.values.tolist()
+        }
+    }
+
+
+def _draw_daily(ax, data: Dict) -> None:
+    ax.plot(pd.to_datetime(data['dates']), data['costs'], marker='o' if len(data['costs']) <= 60 else None)
+    ax.axhline(y=data['daily_limit'], color='r', linestyle='--', label='Daily Limit')
+    ax.set_title('Daily Costs')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Cost ($)')
+    ax.legend()
+    ax.tick_params(axis='x', rotation=45)
+
+
+def _draw_agents(ax, data: Dict) -> None:
+    ax.bar(data['agents'], data['costs'])
+    ax.set_title('Total Cost by Agent')
+    ax.set_xlabel('Agent')
+    ax.set_ylabel('Total Cost ($)')
+    ax.tick_params(axis='x', rotation=45)
+
+
+def _draw_operations(ax, data: Dict) -> None:
+    ax.pie(data['counts'], labels=data['operations'], autopct='%1.1f%%')
+    ax.set_title('Operations Distribution')
+
+
+def _draw_hourly(ax, data: Dict) -> None:
+    ax.bar(data['hours'], data['avg_costs'])
+    ax.set_title('Average Cost by Hour')
+    ax.set_xlabel('Hour')
+    ax.set_ylabel('Average Cost ($)')
+
+
+_DRAW = {
+    DAILY_PANEL: _draw_daily,
+    AGENT_PANEL: _draw_agents,
+    OPERATIONS_PANEL: _draw_operations,
+    HOURLY_PANEL: _draw_hourly,
+}
+
+
+class DashboardRenderer:
+    """דשבורד עלויות אינקרמנטלי
+
+    monitor - אובייקט עם store (CostEventStore) ו-limits.daily_limit. refresh
+    מחשב את נתוני הפאנלים (רק אם נוספו אירועים או שהמגבלה השתנתה), כותב את
+    ה-JSON ומסמן פאנלים שהשתנו; render_png מצייר מחדש רק אותם על ה-Figure
+    הקיים ושומר PNG. start מפעיל worker ברקע שמרענן אחרי notify, לכל היותר
+    פעם ב-interval שניות, ומרנדר PNG שהתבקש ב-request_png.
+    """
+
+    def __init__(self, monitor, data_file: str = DASHBOARD_DATA_FILE,
+                 max_points: int = DEFAULT_MAX_POINTS, interval: float = DEFAULT_REFRESH_INTERVAL):
+        self.monitor = monitor
+        self.data_file = data_file
+        self.max_points = max_points
+        self.interval = interval
+        self.data: Dict[str, Dict] = {}
+        self.stats_counts = {'refreshes': 0, 'skipped': 0, 'data_writes': 0, 'pngs': 0, 'png_cache_hits': 0,
+                             'panels_drawn': 0, 'panels_reused': 0}
+        self._version = None
+        self._dirty = set(PANELS)
+        self._figure: Optional[Figure] = None
+        self._axes = {}
+        # ה-PNG האחרון (dpi, bytes) - בלי שינוי בפאנלים לא מרסטרים שוב
+        self._png: Optional[tuple] = None
+        # refresh ו-render_png רצים גם מה-worker וגם מהקורא - Figure אחד לא בטוח ל-threads
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._png_request: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> List[str]:
+        """עדכון נתוני הפאנלים וה-JSON - מחזיר את הפאנלים שהשתנו"""
+        with self._lock:
+            store = self.monitor.store.snapshot()
+            daily_limit = self.monitor.limits.daily_limit
+            version = (id(self.monitor.store), len(store), daily_limit)
+            if version == self._version:
+                self.stats_counts['skipped'] += 1
+                return []
+            self._version = version
+            self.stats_counts['refreshes'] += 1
+            if not len(store):
+                return []
+
+            panels = panel_data(store, daily_limit, self.max_points)
+            changed = [name for name, data in panels.items() if self.data.get(name) != data]
+            self._dirty.update(changed)
+            self.data = panels
+            if changed:
+                dump({
+                    'generated_at': datetime.now().isoformat(),
+                    'events': len(store),
+                    'total_cost': float(store.costs.sum()),
+                    'panels': panels
+                }, self.data_file)
+                self.stats_counts['data_writes'] += 1
+            return changed
+
+    def _ensure_figure(self) -> None:
+        if self._figure is not None:
+            return
+        self._figure = Figure(figsize=(15, 10))
+        FigureCanvasAgg(self._figure)
+        self._figure.suptitle('MeUnique Cost Monitoring Dashboard', fontsize=16)
+        grid = self._figure.subplots(2, 2)
+        self._axes = {name: grid[row, col] for name, (row, col) in PANELS.items()}
+
+    def render_png(self, path: str = DASHBOARD_PNG_FILE, dpi: int = DEFAULT_DPI) -> Optional[str]:
+        """PNG של הדשבורד (None אם אין אירועים) - רק פאנלים שהשתנו מצוירים מחדש"""
+        with self._lock:
+            self.refresh()
+            if not self.data:
+                return None
+            if not self._dirty and self._png is not None and self._png[0] == dpi:
+                self._write_png(path, self._png[1])
+                self.stats_counts['png_cache_hits'] += 1
+                return path
+            self._ensure_figure()
+            for name, ax in self._axes.items():
+                if name not in self._dirty:
+                    self.stats_counts['panels_reused'] += 1
+                    continue
+                ax.clear()
+                _DRAW[name](ax, self.data[name])
+                self.stats_counts['panels_drawn'] += 1
+            self._dirty.clear()
+            self._figure.tight_layout()
+            buffer = io.BytesIO()
+            self._figure.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+            self._png = (dpi, buffer.getvalue())
+            self._write_png(path, self._png[1])
+            self.stats_counts['pngs'] += 1
+            return path
+
+    def _write_png(self, path: str, data: bytes) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    # worker ברקע
+    def start(self) -> 'DashboardRenderer':
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='cost-dashboard', daemon=True)
+            self._thread.start()
+        return self
+
+    def notify(self) -> None:
+        """נוספו אירועים - רענון ברקע (אם ה-worker פועל)"""
+        self._wake.set()
+
+    def request_png(self, path: str = DASHBOARD_PNG_FILE) -> None:
+        """בקשת PNG מה-worker (בלי לחכות לרסטור)"""
+        self._png_request = path
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            started = time.monotonic()
+            try:
+                self.refresh()
+                path, self._png_request = self._png_request, None
+                if path:
+                    self.render_png(path)
+            except Exception as e:
+                logger.error(f"Dashboard refresh failed: {e}")
+            # notify שהגיעו בינתיים מחכים לסוף ה-interval ומתאחדים לרענון אחד
+            self._stopping.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stop(self) -> None:
+        """עצירת ה-worker ורענון אחרון (כולל PNG שעוד לא רונדר)"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.refresh()
+        path, self._png_request = self._png_request, None
+        if path:
+            self.render_png(path)
+
+    def stats(self) -> Dict:
+        return dict(self.stats_counts)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Cost Event Log
+יומן append-only לאירועי העלות של הדשבורד (JSON Lines) - כל אירוע נכתב כשורה אחת
+עם group commit לפי כמות/זמן ו-fsync לפי מדיניות, במקום לכתוב מחדש את כל ההיסטוריה
+בכל אירוע. בעלייה היומן נקרא שורה אחר שורה, ו-snapshot של JSON נוצר רק לפי דרישה
+"""
+
+import os
+from typing import Dict, Iterable, Optional
+
+from append_log import DEFAULT_FSYNC_INTERVAL_MS, FSYNC_INTERVAL, AppendLog, fsync_dir
+from serialization import dumps, loads
+
+EVENTS_LOG_FILE = "cost_events.jsonl"
+DEFAULT_FLUSH_EVENTS = 1000
+DEFAULT_FLUSH_INTERVAL_MS = 50
+DEFAULT_FSYNC_POLICY = FSYNC_INTERVAL
+
+
+class CostEventLog(AppendLog):
+    """יומן אירועי העלות - שורת JSON לכל אירוע, fsync לפי fsync_policy"""
+
+    def __init__(self, path: str = EVENTS_LOG_FILE, flush_events: int = DEFAULT_FLUSH_EVENTS,
+                 flush_interval_ms: float = DEFAULT_FLUSH_INTERVAL_MS,
+                 fsync_policy: str = DEFAULT_FSYNC_POLICY,
+                 fsync_interval_ms: float = DEFAULT_FSYNC_INTERVAL_MS):
+        super().__init__(path, flush_events, flush_interval_ms, fsync_policy, fsync_interval_ms)
+
+    def append(self, record: Dict) -> None:
+        """רישום אירוע (נכתב לקובץ עם הקבוצה שלו)"""
+        self.append_line(dumps(record) + b'\n')
+
+    def decode_line(self, line: bytes) -> Optional[Dict]:
+        try:
+            return loads(line)
+        except ValueError:
+            return None
+
+    def append_all(self, records: Iterable[Dict]) -> int:
+        """כתיבת רשומות קיימות ליומן (למשל המרה מ-snapshot ישן) עם fsync בסוף"""
+        count = 0
+        for record in records:
+            self.append(record)
+            count += 1
+        self.flush(fsync=True)
+        fsync_dir(os.path.dirname(self.path) or '.')
+        return count
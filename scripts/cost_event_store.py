@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Columnar Cost Event Store
+אחסון עמודתי לאירועי העלות - זמן כ-int64 (מיקרו-שניות), קודים קטגוריאליים לסוכן
+ולפעולה, ועלות כ-float64, במערכים שגדלים בהכפלה. שאילתות הדוחות והדשבורד הן פעולות
+NumPy וקטוריות על views של המערכים, בלי לבנות מחדש אובייקט לכל אירוע בכל קריאה
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CAPACITY = 1024
+# מיקרו-שניות מ-1970-01-01 (שעון מקומי נאיבי, כמו חותמות האירועים)
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+US_PER_SECOND = 1_000_000
+US_PER_HOUR = 3600 * US_PER_SECOND
+US_PER_DAY = 24 * US_PER_HOUR
+
+
+def to_micros(timestamp: datetime) -> int:
+    """חותמת זמן נאיבית למיקרו-שניות (חשבון שלמים - בלי datetime64 לכל אירוע)"""
+    return (
+        (timestamp.toordinal() - _EPOCH_ORDINAL) * US_PER_DAY
+        + ((timestamp.hour * 60 + timestamp.minute) * 60 + timestamp.second) * US_PER_SECOND
+        + timestamp.microsecond
+    )
+
+
+class CostEventStore:
+    """מערכי עמודות לאירועי עלות עם גדילה מופחתת (הכפלת קיבולת)
+
+    הסוכנים והפעולות נשמרים כקודים (int32) לטבלאות שמות; details - רק
+    לאירועים שיש להם, במילון דליל לפי מיקום.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._size = 0
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._agent_codes = np.empty(capacity, dtype=np.int32)
+        self._operation_codes = np.empty(capacity, dtype=np.int32)
+        self._costs = np.empty(capacity, dtype=np.float64)
+        self.agents: List[str] = []
+        self.operations: List[str] = []
+        self._agent_lookup: Dict[str, int] = {}
+        self._operation_lookup: Dict[str, int] = {}
+        self.details: Dict[int, Dict] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _code(names: List[str], lookup: Dict[str, int], name: str) -> int:
+        code = lookup.get(name)
+        if code is None:
+            code = lookup[name] = len(names)
+            names.append(name)
+        return code
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._costs)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ('_timestamps', '_agent_codes', '_operation_codes', '_costs'):
+            old = getattr(self, name)
+            grown = np.empty(capacity, dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+
+    def append(self, timestamp: datetime, agent: str, operation: str, cost: float,
+               details: Optional[Dict] = None) -> int:
+        """הוספת אירוע - מחזיר את המיקום שלו"""
+        index = self._size
+        self._reserve(index + 1)
+        self._timestamps[index] = to_micros(timestamp)
+        self._agent_codes[index] = self._code(self.agents, self._agent_lookup, agent)
+        self._operation_codes[index] = self._code(self.operations, self._operation_lookup, operation)
+        self._costs[index] = cost
+        if details:
+            self.details[index] = details
+        self._size = index + 1
+        return index
+
+    def extend(self, timestamps: np.ndarray, agents: Sequence[str], operations: Sequence[str],
+               costs: np.ndarray) -> None:
+        """הוספת מנה שלמה (timestamps כ-datetime64 או מיקרו-שניות int64)"""
+        count = len(costs)
+        start = self._size
+        self._reserve(start + count)
+        timestamps = np.asarray(timestamps)
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[us]').astype(np.int64)
+        self._timestamps[start:start + count] = timestamps
+        for names, lookup, values, target in (
+                (self.agents, self._agent_lookup, agents, self._agent_codes),
+                (self.operations, self._operation_lookup, operations, self._operation_codes)):
+            codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+            mapping = np.array([self._code(names, lookup, name) for name in uniques], dtype=np.int32)
+            target[start:start + count] = mapping[codes]
+        self._costs[start:start + count] = costs
+        self._size = start + count
+
+    # views על החלק המלא של המערכים (בלי העתקה)
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self._size]
+
+    @property
+    def agent_codes(self) -> np.ndarray:
+        return self._agent_codes[:self._size]
+
+    @property
+    def operation_codes(self) -> np.ndarray:
+        return self._operation_codes[:self._size]
+
+    @property
+    def costs(self) -> np.ndarray:
+        return self._costs[:self._size]
+
+    def snapshot(self) -> 'CostEventStore':
+        """מאגר לקריאה בלבד עם האירועים שיש עכשיו, בלי העתקת המערכים
+
+        append כותב רק מעבר ל-_size וגדילה מעתיקה למערכים חדשים - כך שהחלק
+        שנתפס לא משתנה, ו-thread אחר (למשל רינדור הדשבורד) יכול לשאול עליו
+        בזמן שממשיכים להוסיף אירועים.
+        """
+        frozen = CostEventStore.__new__(CostEventStore)
+        frozen._size = self._size
+        frozen._timestamps = self._timestamps
+        frozen._agent_codes = self._agent_codes
+        frozen._operation_codes = self._operation_codes
+        frozen._costs = self._costs
+        frozen.agents = list(self.agents)
+        frozen.operations = list(self.operations)
+        frozen._agent_lookup = dict(self._agent_lookup)
+        frozen._operation_lookup = dict(self._operation_lookup)
+        frozen.details = self.details
+        return frozen
+
+    def record(self, index: int) -> Dict:
+        """האירוע במיקום index כרשומה (timestamp כ-datetime)"""
+        return {
+            'timestamp': _EPOCH + timedelta(microseconds=int(self._timestamps[index])),
+            'agent': self.agents[self._agent_codes[index]],
+            'operation': self.operations[self._operation_codes[index]],
+            'cost': float(self._costs[index]),
+            'details': self.details.get(index, {})
+        }
+
+    def iter_records(self) -> Iterator[Dict]:
+        for index in range(self._size):
+            yield self.record(index)
+
+    # שאילתות
+    def _sum_by(self, codes: np.ndarray, names: List[str], weights: Optional[np.ndarray] = None) -> pd.Series:
+        totals = np.bincount(codes, weights=weights, minlength=len(names))
+        return pd.Series(totals, index=pd.Index(names, dtype=object))
+
+    def cost_by_agent(self) -> pd.Series:
+        return self._sum_by(self.agent_codes, self.agents, self.costs)
+
+    def count_by_agent(self) -> pd.Series:
+        return self._sum_by(self.agent_codes, self.agents).astype(np.int64)
+
+    def cost_by_operation(self) -> pd.Series:
+        return self._sum_by(self.operation_codes, self.operations, self.costs)
+
+    def count_by_operation(self) -> pd.Series:
+        return self._sum_by(self.operation_codes, self.operations).astype(np.int64)
+
+    def cost_between(self, start: datetime, end: datetime) -> float:
+        """עלות האירועים ב-[start, end]"""
+        timestamps = self.timestamps
+        mask = (timestamps >= to_micros(start)) & (timestamps <= to_micros(end))
+        return float(self.costs[mask].sum())
+
+    def paid_count(self) -> int:
+        return int(np.count_nonzero(self.costs > 0))
+
+    def daily_costs(self) -> pd.Series:
+        """עלות לכל יום שיש בו אירועים (אינדקס - תאריכים)"""
+        if not self._size:
+            return pd.Series(dtype=np.float64)
+        days = self.timestamps // US_PER_DAY
+        first = days.min()
+        totals = np.bincount(days - first, weights=self.costs)
+        present = np.flatnonzero(np.bincount(days - first))
+        dates = pd.to_datetime((present + first) * US_PER_DAY, unit='us').date
+        return pd.Series(totals[present], index=dates)
+
+    def hourly_mean_cost(self) -> pd.Series:
+        """עלות ממוצעת לאירוע לפי שעה ביום (רק שעות שיש בהן אירועים)"""
+        hours = (self.timestamps // US_PER_HOUR) % 24
+        counts = np.bincount(hours, minlength=24)
+        totals = np.bincount(hours, weights=self.costs, minlength=24)
+        present = np.flatnonzero(counts)
+        return pd.Series(totals[present] / counts[present], index=present)
+
+    def close_operations_by_agent(self, gap_seconds: int = 60) -> pd.Series:
+        """מספר הפעולות של כל סוכן שהגיעו פחות מ-gap_seconds אחרי הקודמת שלו
+
+        כמו timedelta.seconds - רכיב השניות של הפער, בלי הימים.
+        """
+        if not self._size:
+            return pd.Series(dtype=np.int64)
+        timestamps = self.timestamps
+        agent_codes = self.agent_codes
+        # פער של פחות מ-gap_seconds שניות שלמות ברכיב השניות (מודולו יום)
+        limit = gap_seconds * US_PER_SECOND
+        counts = np.bincount(agent_codes, minlength=len(self.agents))
+        present = np.flatnonzero(counts)
+        if np.all(timestamps[1:] >= timestamps[:-1]):
+            # אירועים נרשמים בדרך כלל לפי סדר הזמן - אז מספיק לסנן לכל סוכן, בלי מיון
+            close = np.zeros(len(self.agents), dtype=np.int64)
+            for code in present:
+                agent_timestamps = timestamps[agent_codes == code]
+                close[code] = np.count_nonzero(np.diff(agent_timestamps) % US_PER_DAY < limit)
+        else:
+            order = np.lexsort((timestamps, agent_codes))
+            agents = agent_codes[order]
+            same_agent = agents[1:] == agents[:-1]
+            gaps = np.diff(timestamps[order]) % US_PER_DAY
+            close = np.bincount(agents[1:][same_agent & (gaps < limit)], minlength=len(self.agents))
+        return pd.Series(close[present], index=pd.Index([self.agents[code] for code in present], dtype=object))
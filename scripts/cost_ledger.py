@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Shared Cost Ledger
+ספר עלויות משותף לכמה תהליכים - SQLite במצב WAL עם הגדלות אטומיות (UPSERT) של סכומים
+יומיים (כולל, לפי מודל ולפי סוכן) ודליי זמן (דקה/שעה) לחלונות נגללים. כל תהליך כותב
+ישר לספר במקום להחזיק עותק משלו של daily_costs.json ולדרוס אותו, וקריאת ההוצאה היומית
+היא חיפוש לפי מפתח. daily_costs.json נשאר כ-rollup שנכתב מהספר מדי פעם.
+הזמנות תקציב: לפני קריאה שומרים את העלות המשוערת (אם היא נכנסת בתקציב יחד עם מה
+שכבר הוצא והזמנות פתוחות), ואחריה מסגרים לעלות בפועל; הזמנה של תהליך שמת פגה
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+LEDGER_FILE = "costs/cost_ledger.db"
+DAILY_COSTS_FILE = "costs/daily_costs.json"
+# שניות להמתנה לנעילת הכתיבה לפני שנכשלים (כותבים אחרים מחזיקים טרנזקציה)
+DEFAULT_BUSY_TIMEOUT = 30.0
+
+# רשומות יומיות: סכום כולל (key ריק), לפי מודל ולפי סוכן
+TOTAL = 'total'
+BY_MODEL = 'model'
+BY_AGENT = 'agent'
+
+# דליי זמן לחלונות נגללים: דקה (24 שעות אחרונות) ושעה (שבוע/חודש), ולכמה זמן נשמרים
+MINUTE = 60
+HOUR = 3600
+BUCKET_RETENTION = {
+    MINUTE: 2 * 86400,
+    HOUR: 31 * 86400,
+}
+
+# שניות עד שהזמנה שלא נסגרה פגה (התהליך שהזמין מת או נתקע)
+DEFAULT_RESERVATION_TTL = 120.0
+
+# מוני סטטיסטיקת ההזמנות ליום ומודל
+RESERVATION_COUNTERS = ('reserved', 'refused', 'settled', 'cancelled', 'expired', 'late',
+                        'estimated_cost', 'actual_cost', 'abs_error', 'underestimated')
+
+_EPOCH = datetime(1970, 1, 1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    cost REAL NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    calls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, kind, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS spend_buckets (
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    cost REAL NOT NULL DEFAULT 0,
+    calls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (resolution, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY,
+    model TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    estimated_cost REAL NOT NULL,
+    estimated_tokens INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reservations_expiry ON reservations (expires_at);
+CREATE TABLE IF NOT EXISTS reservation_stats (
+    day TEXT NOT NULL,
+    model TEXT NOT NULL,
+    reserved INTEGER NOT NULL DEFAULT 0,
+    refused INTEGER NOT NULL DEFAULT 0,
+    settled INTEGER NOT NULL DEFAULT 0,
+    cancelled INTEGER NOT NULL DEFAULT 0,
+    expired INTEGER NOT NULL DEFAULT 0,
+    late INTEGER NOT NULL DEFAULT 0,
+    estimated_cost REAL NOT NULL DEFAULT 0,
+    actual_cost REAL NOT NULL DEFAULT 0,
+    abs_error REAL NOT NULL DEFAULT 0,
+    underestimated INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, model)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_ADD_DAILY = """
+INSERT INTO daily_totals (day, kind, key, cost, tokens, calls) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, kind, key) DO UPDATE SET
+    cost = cost + excluded.cost,
+    tokens = tokens + excluded.tokens,
+    calls = calls + excluded.calls
+"""
+
+_ADD_BUCKET = """
+INSERT INTO spend_buckets (resolution, bucket, cost, calls) VALUES (?, ?, ?, ?)
+ON CONFLICT (resolution, bucket) DO UPDATE SET
+    cost = cost + excluded.cost,
+    calls = calls + excluded.calls
+"""
+
+
+def _seconds(timestamp: datetime) -> int:
+    # שעון מקומי נאיבי, כמו המפתחות היומיים
+    return int((timestamp - _EPOCH).total_seconds())
+
+
+def _bump_stats(conn: sqlite3.Connection, day: str, model: str, **counters) -> None:
+    columns = ', '.join(counters)
+    updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in counters)
+    conn.execute(
+        f"INSERT INTO reservation_stats (day, model, {columns}) VALUES (?, ?{', ?' * len(counters)}) "
+        f"ON CONFLICT (day, model) DO UPDATE SET {updates}",
+        (day, model, *counters.values())
+    )
+
+
+@dataclass
+class Reservation:
+    """תקציב שמור לקריאה אחת - נסגר ב-settle או מבוטל ב-cancel"""
+    id: int
+    model: str
+    agent: str
+    estimated_cost: float
+    estimated_tokens: int
+    expires_at: float
+
+
+class CostLedger:
+    """סכומי עלות משותפים ב-SQLite (WAL)
+
+    כל record היא טרנזקציה אחת (BEGIN IMMEDIATE) שמגדילה את הסכום היומי
+    הכולל, של המודל ושל הסוכן ואת דליי הדקה והשעה - אין קריאה-שינוי-כתיבה
+    בצד Python, כך שעדכונים של תהליכים שונים לא דורסים זה את זה. קוראים לא
+    חוסמים כותבים (WAL). בפתיחה הראשונה daily_costs.json קיים מיובא פעם אחת.
+    לכל thread חיבור משלו - טרנזקציות של threads שונים לא חולקות חיבור.
+    """
+
+    def __init__(self, path: str = LEDGER_FILE, timeout: float = DEFAULT_BUSY_TIMEOUT,
+                 legacy_file: Optional[str] = DAILY_COSTS_FILE):
+        self.path = path
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._conn.executescript(_SCHEMA)
+        if legacy_file:
+            self._import_legacy(legacy_file)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """החיבור של ה-thread הנוכחי (נפתח בשימוש הראשון)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None - הטרנזקציות מנוהלות כאן במפורש
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # ב-WAL, NORMAL שורד קריסת תהליך; בנפילת חשמל אובדות רק הטרנזקציות האחרונות
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE - נעילת הכתיבה נלקחת בהתחלה (בלי שדרוג מקריאה שעלול להיתקע)
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _import_legacy(self, legacy_file: str) -> None:
+        """ייבוא חד-פעמי של daily_costs.json (תהליך אחד בלבד מבצע אותו)"""
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                return
+            imported = 0
+            if os.path.exists(legacy_file):
+                with open(legacy_file, 'r') as f:
+                    daily_costs = json.load(f)
+                for day, data in daily_costs.items():
+                    self._add_day(conn, day, data)
+                    imported += 1
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (str(imported),))
+        if imported:
+            logger.info(f"Imported {imported} days from {legacy_file} into {self.path}")
+
+    @staticmethod
+    def _add_day(conn: sqlite3.Connection, day: str, data: Dict) -> None:
+        # יום שמור - בלי מספר קריאות לכל מודל/סוכן; הדליים מקבלים אותו בחצות (כמו יום שלם)
+        total = data.get("total", 0)
+        calls = data.get("api_calls", 0)
+        conn.execute(_ADD_DAILY, (day, TOTAL, '', total, sum(
+            model.get("tokens", 0) for model in data.get("by_model", {}).values()), calls))
+        for model, model_data in data.get("by_model", {}).items():
+            conn.execute(_ADD_DAILY, (day, BY_MODEL, model, model_data.get("cost", 0), model_data.get("tokens", 0), 0))
+        for agent, cost in data.get("by_agent", {}).items():
+            conn.execute(_ADD_DAILY, (day, BY_AGENT, agent, cost, 0, 0))
+        midnight = _seconds(datetime.strptime(day, "%Y-%m-%d"))
+        for resolution in BUCKET_RETENTION:
+            conn.execute(_ADD_BUCKET, (resolution, midnight // resolution, total, calls))
+
+    def record(self, model: str, tokens: int, agent: str, cost: float,
+               timestamp: Optional[datetime] = None) -> None:
+        """רישום קריאה אחת - הגדלה אטומית של כל הסכומים"""
+        with self._transaction() as conn:
+            self._add_usage(conn, model, tokens, agent, cost, timestamp or datetime.now())
+
+    @staticmethod
+    def _add_usage(conn: sqlite3.Connection, model: str, tokens: int, agent: str, cost: float,
+                   timestamp: datetime) -> None:
+        day = timestamp.strftime("%Y-%m-%d")
+        seconds = _seconds(timestamp)
+        conn.execute(_ADD_DAILY, (day, TOTAL, '', cost, tokens, 1))
+        conn.execute(_ADD_DAILY, (day, BY_MODEL, model, cost, tokens, 1))
+        conn.execute(_ADD_DAILY, (day, BY_AGENT, agent, cost, tokens, 1))
+        for resolution in BUCKET_RETENTION:
+            conn.execute(_ADD_BUCKET, (resolution, seconds // resolution, cost, 1))
+
+    # הזמנות תקציב
+    @staticmethod
+    def _expire(conn: sqlite3.Connection, now: float, day: str) -> int:
+        """מחיקת הזמנות שפגו (נספרות כ-expired ביום הנוכחי)"""
+        expired = conn.execute(
+            "SELECT model, COUNT(*) FROM reservations WHERE expires_at <= ? GROUP BY model", (now,)
+        ).fetchall()
+        if not expired:
+            return 0
+        conn.execute("DELETE FROM reservations WHERE expires_at <= ?", (now,))
+        for model, count in expired:
+            _bump_stats(conn, day, model, expired=count)
+        return sum(count for _, count in expired)
+
+    def reserve(self, model: str, agent: str, estimated_cost: float, estimated_tokens: int = 0,
+                ttl: float = DEFAULT_RESERVATION_TTL, limit: Optional[float] = None) -> Optional[Reservation]:
+        """שמירת estimated_cost - None אם ההוצאה היום, ההזמנות הפתוחות וההזמנה חורגות מ-limit
+
+        הבדיקה וההוספה בטרנזקציה אחת, כך ששתי הזמנות מקבילות לא רואות שתיהן
+        את אותו תקציב פנוי.
+        """
+        now = time.time()
+        day = datetime.now().strftime("%Y-%m-%d")
+        with self._transaction() as conn:
+            self._expire(conn, now, day)
+            if limit is not None and estimated_cost > 0:
+                committed = self.daily_spend(day) + self.outstanding(now)
+                if committed + estimated_cost > limit:
+                    _bump_stats(conn, day, model, refused=1)
+                    return None
+            cursor = conn.execute(
+                "INSERT INTO reservations (model, agent, estimated_cost, estimated_tokens, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (model, agent, estimated_cost, estimated_tokens, now + ttl)
+            )
+            _bump_stats(conn, day, model, reserved=1)
+        return Reservation(cursor.lastrowid, model, agent, estimated_cost, estimated_tokens, now + ttl)
+
+    def settle(self, reservation: Reservation, tokens: int, cost: float,
+               timestamp: Optional[datetime] = None) -> bool:
+        """סגירת הזמנה לעלות בפועל ורישום הקריאה - False אם ההזמנה כבר פגה (הקריאה נרשמת בכל זאת)"""
+        timestamp = timestamp or datetime.now()
+        day = timestamp.strftime("%Y-%m-%d")
+        with self._transaction() as conn:
+            # הזמנה שפגה לפני הסגירה נספרת כ-expired, והסגירה כ-late
+            self._expire(conn, time.time(), datetime.now().strftime("%Y-%m-%d"))
+            found = conn.execute("DELETE FROM reservations WHERE id = ?", (reservation.id,)).rowcount > 0
+            self._add_usage(conn, reservation.model, tokens, reservation.agent, cost, timestamp)
+            if found:
+                _bump_stats(
+                    conn, day, reservation.model, settled=1,
+                    estimated_cost=reservation.estimated_cost, actual_cost=cost,
+                    abs_error=abs(cost - reservation.estimated_cost),
+                    underestimated=int(cost > reservation.estimated_cost)
+                )
+            else:
+                _bump_stats(conn, day, reservation.model, late=1)
+        return found
+
+    def cancel(self, reservation: Reservation) -> bool:
+        """ביטול הזמנה של קריאה שלא בוצעה - False אם כבר פגה"""
+        day = datetime.now().strftime("%Y-%m-%d")
+        with self._transaction() as conn:
+            self._expire(conn, time.time(), day)
+            found = conn.execute("DELETE FROM reservations WHERE id = ?", (reservation.id,)).rowcount > 0
+            if found:
+                _bump_stats(conn, day, reservation.model, cancelled=1)
+        return found
+
+    def outstanding(self, now: Optional[float] = None) -> float:
+        """סכום ההזמנות הפתוחות שעוד לא פגו"""
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(estimated_cost), 0) FROM reservations WHERE expires_at > ?",
+            (time.time() if now is None else now,)
+        ).fetchone()
+        return row[0]
+
+    def reservation_stats(self, day: Optional[str] = None) -> Dict:
+        """דיוק ההערכות ביום (ברירת מחדל: היום) - לפי מודל ובסך הכול"""
+        rows = self._conn.execute(
+            f"SELECT model, {', '.join(RESERVATION_COUNTERS)} FROM reservation_stats WHERE day = ?",
+            (day or datetime.now().strftime("%Y-%m-%d"),)
+        ).fetchall()
+        by_model = {row[0]: dict(zip(RESERVATION_COUNTERS, row[1:])) for row in rows}
+        total = {counter: sum(stats[counter] for stats in by_model.values()) for counter in RESERVATION_COUNTERS}
+        for stats in list(by_model.values()) + [total]:
+            settled = stats['settled']
+            # actual/estimated - מתחת ל-1 הערכות שמרניות, מעל 1 הערכות חסר
+            stats['actual_to_estimated'] = stats['actual_cost'] / stats['estimated_cost'] if stats['estimated_cost'] else None
+            stats['mean_abs_error'] = stats['abs_error'] / settled if settled else None
+            stats['underestimate_rate'] = stats['underestimated'] / settled if settled else None
+        total['outstanding'] = self.outstanding()
+        return {'total': total, 'by_model': by_model}
+
+    def daily_spend(self, day: Optional[str] = None) -> float:
+        """ההוצאה הכוללת ביום (ברירת מחדל: היום) - חיפוש לפי מפתח"""
+        row = self._conn.execute(
+            "SELECT cost FROM daily_totals WHERE day = ? AND kind = ? AND key = ''",
+            (day or datetime.now().strftime("%Y-%m-%d"), TOTAL)
+        ).fetchone()
+        return row[0] if row else 0.0
+
+    def day(self, day: Optional[str] = None) -> Dict:
+        """סכומי יום במבנה של daily_costs.json"""
+        day = day or datetime.now().strftime("%Y-%m-%d")
+        return self.daily_costs(day).get(day, {"total": 0, "by_model": {}, "by_agent": {}, "api_calls": 0})
+
+    def daily_costs(self, day: Optional[str] = None) -> Dict[str, Dict]:
+        """כל הימים (או יום אחד) במבנה של daily_costs.json"""
+        query = "SELECT day, kind, key, cost, tokens, calls FROM daily_totals"
+        rows = self._conn.execute(query + " WHERE day = ?", (day,)) if day else self._conn.execute(query)
+        days: Dict[str, Dict] = {}
+        for row_day, kind, key, cost, tokens, calls in rows:
+            entry = days.setdefault(row_day, {"total": 0, "by_model": {}, "by_agent": {}, "api_calls": 0})
+            if kind == TOTAL:
+                entry["total"] = cost
+                entry["api_calls"] = calls
+            elif kind == BY_MODEL:
+                entry["by_model"][key] = {"cost": cost, "tokens": tokens}
+            elif kind == BY_AGENT:
+                entry["by_agent"][key] = cost
+        return days
+
+    def rolling_cost(self, seconds: int, now: Optional[datetime] = None) -> float:
+        """ההוצאה בחלון של seconds שניות שמסתיים ב-now (דליי דקה עד יומיים, אחר כך שעה)"""
+        resolution = MINUTE if seconds <= BUCKET_RETENTION[MINUTE] else HOUR
+        current = _seconds(now or datetime.now()) // resolution
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(cost), 0) FROM spend_buckets WHERE resolution = ? AND bucket > ? AND bucket <= ?",
+            (resolution, current - seconds // resolution, current)
+        ).fetchone()
+        return row[0]
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """מחיקת דליים ישנים מתקופת השמירה שלהם"""
+        seconds = _seconds(now or datetime.now())
+        removed = 0
+        with self._transaction() as conn:
+            for resolution, retention in BUCKET_RETENTION.items():
+                removed += conn.execute(
+                    "DELETE FROM spend_buckets WHERE resolution = ? AND bucket < ?",
+                    (resolution, (seconds - retention) // resolution)
+                ).rowcount
+        return removed
+
+    def export(self, path: str = DAILY_COSTS_FILE) -> str:
+        """rollup של הסכומים היומיים ל-daily_costs.json (קובץ זמני לכל תהליך ו-rename)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps(self.daily_costs(), pretty=True))
+        os.replace(tmp_path, path)
+        return path
+
+    def close(self) -> None:
+        """סגירת החיבורים של כל ה-threads"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
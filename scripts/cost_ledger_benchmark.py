@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Shared Cost Ledger Benchmark
+בנצ'מרק לספר העלויות המשותף - תהליכים רבים (ברירת מחדל 32) רושמים קריאות במקביל
+ובודקים את ההוצאה היומית אחרי כל רישום (כמו log_usage), ומול זה הדרך הקודמת: עותק
+של daily_costs.json בזיכרון של כל תהליך שנכתב כולו בכל קריאה - כמה עדכונים אבדו.
+הזמנות תקציב: תהליכים שמזמינים לפני קריאה (עם השהיה של קריאה אמיתית) מול בדיקה של
+ההוצאה ואז קריאה - בכמה התקציב נחרג, ודיוק ההערכות
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict
+
+from cost_ledger import CostLedger
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WRITERS = 32
+DEFAULT_CALLS_PER_WRITER = 2000
+# הדרך הקודמת כותבת את כל הקובץ בכל קריאה - פחות קריאות לתהליך
+LEGACY_CALLS_PER_WRITER = 200
+MODELS = ['gpt-4-turbo', 'gpt-3.5-turbo', 'claude-3-sonnet', 'ollama/llama3']
+COST_PER_CALL = 0.001
+# תרחיש ההזמנות: עלות משוערת לקריאה, תקציב שמספיק לחלק מהביקוש, והשהיית קריאה
+RESERVATION_ESTIMATE = 0.01
+RESERVATION_CALLS_PER_WRITER = 100
+RESERVATION_LIMIT = 10.0
+CALL_LATENCY = 0.005
+
+
+def _ledger_writer(path: str, writer: int, calls: int, start: multiprocessing.Event) -> None:
+    ledger = CostLedger(path, legacy_file=None)
+    start.wait()
+    for call in range(calls):
+        ledger.record(MODELS[call % len(MODELS)], 100, f"agent_{writer % 8}", COST_PER_CALL)
+        ledger.daily_spend()
+    ledger.close()
+
+
+def _reserving_writer(path: str, writer: int, calls: int, start: multiprocessing.Event) -> None:
+    """הזמנה, קריאה מדומה, סגירה לעלות בפועל (60%-105% מההערכה)"""
+    ledger = CostLedger(path, legacy_file=None)
+    rng = random.Random(writer)
+    start.wait()
+    for _ in range(calls):
+        reservation = ledger.reserve('gpt-4-turbo', f"agent_{writer % 8}", RESERVATION_ESTIMATE, 1000,
+                                     limit=RESERVATION_LIMIT)
+        if reservation is None:
+            continue
+        time.sleep(CALL_LATENCY)
+        ledger.settle(reservation, 1000, RESERVATION_ESTIMATE * rng.uniform(0.6, 1.05))
+    ledger.close()
+
+
+def _check_then_spend_writer(path: str, writer: int, calls: int, start: multiprocessing.Event) -> None:
+    """בלי הזמנות: בדיקת ההוצאה, קריאה, ורישום אחריה"""
+    ledger = CostLedger(path, legacy_file=None)
+    rng = random.Random(writer)
+    start.wait()
+    for _ in range(calls):
+        if ledger.daily_spend() + RESERVATION_ESTIMATE > RESERVATION_LIMIT:
+            continue
+        time.sleep(CALL_LATENCY)
+        ledger.record('gpt-4-turbo', 1000, f"agent_{writer % 8}", RESERVATION_ESTIMATE * rng.uniform(0.6, 1.05))
+    ledger.close()
+
+
+def _legacy_writer(path: str, writer: int, calls: int, start: multiprocessing.Event) -> None:
+    """כמו log_usage הקודם: טעינה פעם אחת, עדכון בזיכרון ושכתוב כל הקובץ"""
+    try:
+        with open(path, 'r') as f:
+            daily_costs = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        daily_costs = {}
+    start.wait()
+    today = datetime.now().strftime("%Y-%m-%d")
+    for call in range(calls):
+        day = daily_costs.setdefault(today, {"total": 0, "by_model": {}, "by_agent": {}, "api_calls": 0})
+        day["total"] += COST_PER_CALL
+        day["api_calls"] += 1
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(daily_costs, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def _run(target, path: str, writers: int, calls: int) -> float:
+    start = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=target, args=(path, writer, calls, start))
+        for writer in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    # כל התהליכים פתחו את הספר / טענו את הקובץ - מתחילים יחד
+    time.sleep(1.0)
+    started = time.perf_counter()
+    start.set()
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Writer exited with code {process.exitcode}")
+    return time.perf_counter() - started
+
+
+def benchmark_ledger(work_dir: str, writers: int, calls: int) -> Dict:
+    path = os.path.join(work_dir, 'cost_ledger.db')
+    CostLedger(path, legacy_file=None).close()
+    seconds = _run(_ledger_writer, path, writers, calls)
+    ledger = CostLedger(path, legacy_file=None)
+    today = ledger.day()
+    expected_calls = writers * calls
+    result = {
+        'writers': writers,
+        'calls': expected_calls,
+        'seconds': round(seconds, 3),
+        'calls_per_second': round(expected_calls / seconds, 1),
+        'recorded_calls': today['api_calls'],
+        'recorded_spend': round(today['total'], 6),
+        'expected_spend': round(expected_calls * COST_PER_CALL, 6),
+        'lost_calls': expected_calls - today['api_calls'],
+        'rolling_24h_matches': abs(ledger.rolling_cost(86400) - today['total']) < 1e-6
+    }
+    started = time.perf_counter()
+    for _ in range(10000):
+        ledger.daily_spend()
+    result['daily_spend_read_us'] = round((time.perf_counter() - started) / 10000 * 1e6, 2)
+    ledger.close()
+    return result
+
+
+def benchmark_reservations(work_dir: str, writers: int, calls: int) -> Dict:
+    """חריגה מהתקציב עם הזמנות ובלעדיהן, ותפוגה של הזמנה שלא נסגרה"""
+    results = {}
+    for name, target in (('reservations', _reserving_writer), ('check_then_spend', _check_then_spend_writer)):
+        path = os.path.join(work_dir, f'{name}.db')
+        CostLedger(path, legacy_file=None).close()
+        seconds = _run(target, path, writers, calls)
+        ledger = CostLedger(path, legacy_file=None)
+        spend = ledger.daily_spend()
+        results[name] = {
+            'writers': writers,
+            'attempts': writers * calls,
+            'seconds': round(seconds, 3),
+            'limit': RESERVATION_LIMIT,
+            'spend': round(spend, 4),
+            'overshoot': round(max(0.0, spend - RESERVATION_LIMIT), 4),
+            'calls': ledger.day()['api_calls']
+        }
+        if name == 'reservations':
+            stats = ledger.reservation_stats()['total']
+            results[name]['accuracy'] = {
+                key: round(stats[key], 4) if isinstance(stats[key], float) else stats[key]
+                for key in ('reserved', 'refused', 'settled', 'actual_to_estimated',
+                            'mean_abs_error', 'underestimate_rate')
+            }
+        ledger.close()
+
+    # הזמנה של "תהליך שמת" - לא נסגרת, ואחרי ה-ttl לא תופסת תקציב
+    ledger = CostLedger(os.path.join(work_dir, 'expiry.db'), legacy_file=None)
+    ledger.reserve('gpt-4-turbo', 'crashed', 5.0, ttl=0.2, limit=RESERVATION_LIMIT)
+    held = ledger.outstanding()
+    time.sleep(0.3)
+    released = ledger.outstanding()
+    ledger.reserve('gpt-4-turbo', 'next', 5.0, limit=RESERVATION_LIMIT)
+    results['expiry'] = {'held_before_ttl': held, 'held_after_ttl': released,
+                         'expired': ledger.reservation_stats()['total']['expired']}
+    ledger.close()
+    return results
+
+
+def benchmark_legacy(work_dir: str, writers: int, calls: int) -> Dict:
+    path = os.path.join(work_dir, 'daily_costs.json')
+    seconds = _run(_legacy_writer, path, writers, calls)
+    with open(path, 'r') as f:
+        day = json.load(f)[datetime.now().strftime("%Y-%m-%d")]
+    expected_calls = writers * calls
+    return {
+        'writers': writers,
+        'calls': expected_calls,
+        'seconds': round(seconds, 3),
+        'calls_per_second': round(expected_calls / seconds, 1),
+        'recorded_calls': day['api_calls'],
+        'lost_calls': expected_calls - day['api_calls'],
+        'lost_percent': round(100 * (expected_calls - day['api_calls']) / expected_calls, 1)
+    }
+
+
+def main():
+    """python cost_ledger_benchmark.py [תהליכים] [קריאות לתהליך]"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_WRITERS
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CALLS_PER_WRITER
+    work_dir = tempfile.mkdtemp(prefix='cost_ledger_benchmark_')
+    try:
+        scaling = {}
+        for count in sorted({1, 4, writers}):
+            scaling[count] = benchmark_ledger(tempfile.mkdtemp(dir=work_dir), count, calls)
+            logger.info(
+                f"Ledger, {count} writers: {scaling[count]['calls_per_second']:,.0f} calls/s, "
+                f"lost {scaling[count]['lost_calls']}"
+            )
+        reservations = benchmark_reservations(work_dir, writers, RESERVATION_CALLS_PER_WRITER)
+        for name in ('reservations', 'check_then_spend'):
+            logger.info(
+                f"Budget {RESERVATION_LIMIT}, {name}: spend {reservations[name]['spend']}, "
+                f"overshoot {reservations[name]['overshoot']}"
+            )
+        legacy = benchmark_legacy(work_dir, writers, LEGACY_CALLS_PER_WRITER)
+        logger.info(
+            f"Legacy JSON, {writers} writers: {legacy['calls_per_second']:,.0f} calls/s, "
+            f"lost {legacy['lost_calls']} of {legacy['calls']} ({legacy['lost_percent']}%)"
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = {
+        'benchmark': 'cost_ledger',
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'ledger': scaling,
+        'reservations': reservations,
+        'legacy': legacy
+    }
+    output_file = f'cost_ledger_benchmark_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    logger.info(f"Benchmark saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,30 @@ Real-time cost tracking and budget protection
 """
 
 import os
-import json
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import requests
 
+from cost_ledger import DAILY_COSTS_FILE, LEDGER_FILE, CostLedger, Reservation
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
 # Configuration
 MAX_DAILY_SPEND = float(os.getenv("MAX_DAILY_SPEND", "500"))
 ALERT_THRESHOLD = float(os.getenv("COST_ALERT_THRESHOLD", "100"))
 FALLBACK_THRESHOLD = 0.2  # Switch to free models at 20% budget
+# How often (seconds) each process rolls the shared ledger up into daily_costs.json
+ROLLUP_INTERVAL = float(os.getenv("COST_ROLLUP_INTERVAL", "60"))
+# Budget reservations: expected completion size when the caller gives none, and
+# how long (seconds) an unsettled reservation holds budget before it expires
+DEFAULT_OUTPUT_TOKENS = int(os.getenv("COST_DEFAULT_OUTPUT_TOKENS", "500"))
+RESERVATION_TTL = float(os.getenv("COST_RESERVATION_TTL", "120"))
+CHARS_PER_TOKEN = 4  # Rough estimate when tiktoken is not installed
 
 # Model pricing (per 1K tokens)
 MODEL_PRICING = {
@@ -28,74 +42,120 @@ MODEL_PRICING = {
     "ollama/codellama": 0.0,  # Free
 }
 
+# Cheaper models to try, in order, when a reservation does not fit the budget
+FALLBACK_MODELS = ["gpt-3.5-turbo", "ollama/llama3"]
+
+_encoding = None
+
+def count_tokens(text: str) -> int:
+    """Pre-flight prompt token count (tiktoken cl100k if available)"""
+    global _encoding
+    if HAS_TIKTOKEN:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
 class CostMonitor:
-    def __init__(self):
-        self.daily_costs = {}
-        self.load_cost_history()
-        
-    def load_cost_history(self):
-        """Load cost history from file"""
-        try:
-            with open("costs/daily_costs.json", "r") as f:
-                self.daily_costs = json.load(f)
-        except FileNotFoundError:
-            self.daily_costs = {}
+    def __init__(self, ledger_file: str = LEDGER_FILE):
+        # Shared SQLite ledger - every process increments the same totals atomically
+        self.ledger = CostLedger(ledger_file)
+        self.last_rollup = time.monotonic()
+        
+    @property
+    def daily_costs(self) -> Dict[str, Dict]:
+        """Per-day totals read from the shared ledger (includes other processes' spend)"""
+        return self.ledger.daily_costs()
     
     def save_cost_history(self):
-        """Save cost history to file"""
-        os.makedirs("costs", exist_ok=True)
-        with open("costs/daily_costs.json", "w") as f:
-            json.dump(self.daily_costs, f, indent=2)
+        """Roll the shared ledger up into costs/daily_costs.json"""
+        self.ledger.export(DAILY_COSTS_FILE)
+        self.ledger.prune()
+        self.last_rollup = time.monotonic()
     
     def log_usage(self, model: str, tokens: int, agent: str):
         """Log API usage and cost"""
-        today = datetime.now().strftime("%Y-%m-%d")
+        now = datetime.now()
+        today = now.strftime("%Y-%m-%d")
         cost = self.calculate_cost(model, tokens)
         
-        if today not in self.daily_costs:
-            self.daily_costs[today] = {
-                "total": 0,
-                "by_model": {},
-                "by_agent": {},
-                "api_calls": 0
-            }
-        
-        # Update totals
-        self.daily_costs[today]["total"] += cost
-        self.daily_costs[today]["api_calls"] += 1
-        
-        # Update by model
-        if model not in self.daily_costs[today]["by_model"]:
-            self.daily_costs[today]["by_model"][model] = {"cost": 0, "tokens": 0}
-        self.daily_costs[today]["by_model"][model]["cost"] += cost
-        self.daily_costs[today]["by_model"][model]["tokens"] += tokens
-        
-        # Update by agent
-        if agent not in self.daily_costs[today]["by_agent"]:
-            self.daily_costs[today]["by_agent"][agent] = 0
-        self.daily_costs[today]["by_agent"][agent] += cost
+        # Atomic increments in the shared ledger (no read-modify-write of the JSON file)
+        self.ledger.record(model, tokens, agent, cost, now)
+        
+        self.after_usage(today)
         
+        return cost
+    
+    def after_usage(self, today: str):
+        """Threshold check and periodic rollup after a call is recorded"""
         # Check thresholds
         self.check_thresholds(today)
         
-        # Save
-        self.save_cost_history()
+        # Periodic rollup instead of rewriting the file on every call
+        if time.monotonic() - self.last_rollup >= ROLLUP_INTERVAL:
+            self.save_cost_history()
+    
+    def estimate_cost(self, model: str, prompt_tokens: int, max_output_tokens: int = DEFAULT_OUTPUT_TOKENS) -> float:
+        """Pre-flight cost estimate for a call"""
+        return self.calculate_cost(model, prompt_tokens + max_output_tokens)
+    
+    def reserve(self, priority: str = "medium", agent: str = "unknown", prompt_tokens: int = 0,
+                prompt: Optional[str] = None, max_output_tokens: int = DEFAULT_OUTPUT_TOKENS,
+                ttl: float = RESERVATION_TTL) -> Reservation:
+        """Select a model and reserve its estimated cost before the call
         
+        The check against MAX_DAILY_SPEND counts spend and outstanding
+        reservations of every process, atomically with the reservation. If the
+        selected model does not fit, cheaper fallbacks are tried (the free model
+        always fits). Settle with the actual tokens, or cancel if the call is
+        not made; a reservation of a caller that dies expires after ttl.
+        """
+        if prompt is not None:
+            prompt_tokens = count_tokens(prompt)
+        estimated_tokens = prompt_tokens + max_output_tokens
+        selected = self.select_model(priority, agent)
+        price = MODEL_PRICING.get(selected, 0.002)
+        candidates = [selected] + [
+            model for model in FALLBACK_MODELS
+            if model != selected and MODEL_PRICING.get(model, 0.002) < price
+        ]
+        for model in candidates:
+            reservation = self.ledger.reserve(
+                model, agent, self.calculate_cost(model, estimated_tokens), estimated_tokens,
+                ttl=ttl, limit=MAX_DAILY_SPEND
+            )
+            if reservation is not None:
+                return reservation
+        raise RuntimeError(f"No model fits the remaining budget for {agent}")
+    
+    def settle(self, reservation: Reservation, tokens: int) -> float:
+        """Record the actual usage of a reserved call and release the reservation"""
+        now = datetime.now()
+        cost = self.calculate_cost(reservation.model, tokens)
+        self.ledger.settle(reservation, tokens, cost, now)
+        self.after_usage(now.strftime("%Y-%m-%d"))
         return cost
     
+    def cancel(self, reservation: Reservation):
+        """Release a reservation whose call was not made"""
+        self.ledger.cancel(reservation)
+    
     def calculate_cost(self, model: str, tokens: int) -> float:
         """Calculate cost for tokens"""
         price_per_1k = MODEL_PRICING.get(model, 0.002)  # Default to GPT-3.5 price
         return (tokens / 1000) * price_per_1k
     
     def get_daily_spend(self) -> float:
-        """Get today's total spend"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        return self.daily_costs.get(today, {}).get("total", 0)
+        """Get today's total spend (across all processes)"""
+        return self.ledger.daily_spend()
+    
+    def get_reserved_spend(self) -> float:
+        """Estimated cost of outstanding (unsettled, unexpired) reservations"""
+        return self.ledger.outstanding()
     
     def get_remaining_budget(self) -> float:
-        """Get remaining daily budget"""
-        return MAX_DAILY_SPEND - self.get_daily_spend()
+        """Get remaining daily budget (after spend and outstanding reservations)"""
+        return MAX_DAILY_SPEND - self.get_daily_spend() - self.get_reserved_spend()
     
     def select_model(self, priority: str = "medium", agent: str = "unknown") -> str:
         """Select best model based on budget and priority"""
@@ -122,7 +182,7 @@ class CostMonitor:
     
     def check_thresholds(self, date: str):
         """Check cost thresholds and alert if needed"""
-        total = self.daily_costs[date]["total"]
+        total = self.ledger.daily_spend(date)
         
         if total >= MAX_DAILY_SPEND * 0.95:
             self.send_alert("CRITICAL", f"Daily spend at 95%: ${total:.2f}")
@@ -146,17 +206,24 @@ class CostMonitor:
     
     def get_report(self) -> Dict:
         """Generate cost report"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        daily_data = self.daily_costs.get(today, {})
+        now = datetime.now()
+        today = self.ledger.day(now.strftime("%Y-%m-%d"))
         
         return {
-            "date": today,
-            "total_spend": daily_data.get("total", 0),
+            "date": now.strftime("%Y-%m-%d"),
+            "total_spend": today["total"],
+            "reserved_spend": self.get_reserved_spend(),
             "remaining_budget": self.get_remaining_budget(),
             "budget_used_percent": (self.get_daily_spend() / MAX_DAILY_SPEND) * 100,
-            "api_calls": daily_data.get("api_calls", 0),
-            "by_model": daily_data.get("by_model", {}),
-            "by_agent": daily_data.get("by_agent", {}),
+            "api_calls": today["api_calls"],
+            "by_model": today["by_model"],
+            "by_agent": today["by_agent"],
+            "rolling_spend": {
+                "last_24h": self.ledger.rolling_cost(86400, now),
+                "last_7_days": self.ledger.rolling_cost(7 * 86400, now),
+                "last_30_days": self.ledger.rolling_cost(30 * 86400, now)
+            },
+            "reservation_accuracy": self.ledger.reservation_stats(now.strftime("%Y-%m-%d"))["total"],
             "recommended_model": self.select_model(),
             "alerts": []
         }
@@ -181,6 +248,7 @@ def main():
         print("=" * 50)
         print(f"📅 Date: {report['date']}")
         print(f"💵 Total Spend: ${report['total_spend']:.2f}")
+        print(f"🔒 Reserved: ${report['reserved_spend']:.2f}")
         print(f"💰 Remaining: ${report['remaining_budget']:.2f}")
         print(f"📊 Budget Used: {report['budget_used_percent']:.1f}%")
         print(f"🔧 API Calls: {report['api_calls']}")
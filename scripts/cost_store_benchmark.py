@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Cost Event Store Benchmark
+בנצ'מרק לאחסון העמודתי של אירועי העלות - שאילתות הדוח והדשבורד (קיבוץ לפי סוכן
+ופעולה, עלות יומית, ממוצע שעתי, פערים בין פעולות של סוכן) על 10M אירועים, מול
+המימוש הקודם (רשימת אובייקטים, DataFrame שנבנה בכל קריאה ולולאות defaultdict)
+"""
+
+import json
+import logging
+import platform
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cost_event_store import CostEventStore, to_micros
+from cost_event_store import _EPOCH as STORE_EPOCH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENTS = 10_000_000
+# המימוש הקודם מוחזק כאובייקט Python לכל אירוע - נמדד על מדגם קטן יותר
+DEFAULT_LEGACY_EVENTS = 1_000_000
+DEFAULT_SEED = 42
+APPEND_SAMPLE = 200_000
+AGENTS = [
+    'smart_database', 'auto_recruiter', 'culture_matcher', 'ideal_profiler',
+    'dictionary_bot', 'profile_analyzer', 'message_crafter', 'team_matching_manager'
+]
+OPERATIONS = ['search', 'enrich', 'match', 'message', 'analyze', 'export']
+
+
+def generate_columns(events: int, seed: int = DEFAULT_SEED) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """אירועים סינתטיים כעמודות: 90 יום, פער אקספוננציאלי, סוכנים ופעולות בהתפלגות לא אחידה"""
+    rng = np.random.default_rng(seed)
+    start = to_micros(datetime(2026, 1, 1))
+    span = 90 * 24 * 3600 * 1_000_000
+    gaps = rng.exponential(span / events, events)
+    timestamps = start + np.cumsum(gaps).astype(np.int64)
+    agent_weights = rng.dirichlet(np.ones(len(AGENTS)))
+    agents = rng.choice(len(AGENTS), events, p=agent_weights)
+    operations = rng.choice(len(OPERATIONS), events)
+    costs = np.round(rng.choice([0.0, 0.02, 0.05, 0.1, 0.15], events), 2)
+    return timestamps, agents, operations, costs
+
+
+def _timed(query: Callable, repeat: int = 3) -> Tuple[float, object]:
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = query()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _queries(store: CostEventStore) -> Dict[str, Callable]:
+    timestamps = store.timestamps
+    middle = STORE_EPOCH + timedelta(microseconds=int(timestamps[len(timestamps) // 2]))
+    return {
+        'cost_by_agent': store.cost_by_agent,
+        'count_by_operation': store.count_by_operation,
+        'daily_costs': store.daily_costs,
+        'hourly_mean_cost': store.hourly_mean_cost,
+        'close_operations_by_agent': store.close_operations_by_agent,
+        'cost_last_week': lambda: store.cost_between(middle - timedelta(days=7), middle),
+        'paid_count': store.paid_count
+    }
+
+
+def benchmark_store(events: int, seed: int = DEFAULT_SEED) -> Dict:
+    """מילוי המאגר העמודתי וזמני השאילתות"""
+    timestamps, agents, operations, costs = generate_columns(events, seed)
+    store = CostEventStore()
+    started = time.perf_counter()
+    store.extend(timestamps, np.array(AGENTS, dtype=object)[agents],
+                 np.array(OPERATIONS, dtype=object)[operations], costs)
+    extend_seconds = time.perf_counter() - started
+
+    # append לכל אירוע (כמו add_event) על מדגם
+    sample = CostEventStore()
+    sample_times = [STORE_EPOCH + timedelta(microseconds=int(t)) for t in timestamps[:APPEND_SAMPLE]]
+    started = time.perf_counter()
+    for i, timestamp in enumerate(sample_times):
+        sample.append(timestamp, AGENTS[agents[i]], OPERATIONS[operations[i]], costs[i])
+    append_seconds = time.perf_counter() - started
+
+    queries = {}
+    for name, query in _queries(store).items():
+        seconds, _ = _timed(query)
+        queries[name] = round(seconds, 4)
+    column_bytes = sum(column.nbytes for column in (
+        store.timestamps, store.agent_codes, store.operation_codes, store.costs))
+    return {
+        'events': events,
+        'extend_seconds': round(extend_seconds, 3),
+        'append_events_per_second': round(APPEND_SAMPLE / append_seconds, 1),
+        'column_mb': round(column_bytes / 1024 ** 2, 1),
+        'query_seconds': queries,
+        'all_queries_seconds': round(sum(queries.values()), 4)
+    }
+
+
+def _legacy_queries(events: List[Dict]) -> Dict[str, Callable]:
+    """השאילתות כמו במימוש הקודם - DataFrame מרשימה בכל קריאה ולולאות על האירועים"""
+    def frame():
+        return pd.DataFrame([
+            {
+                'timestamp': e['timestamp'],
+                'agent': e['agent'],
+                'operation': e['operation'],
+                'cost': e['cost'],
+                'hour': e['timestamp'].hour,
+                'day': e['timestamp'].date()
+            }
+            for e in events
+        ])
+
+    def dashboard():
+        df = frame()
+        return (df.groupby('day')['cost'].sum(), df.groupby('agent')['cost'].sum(),
+                df['operation'].value_counts(), df.groupby('hour')['cost'].mean())
+
+    def by_agent():
+        agent_costs = defaultdict(float)
+        for event in events:
+            agent_costs[event['agent']] += event['cost']
+        return agent_costs
+
+    def close_operations():
+        agent_frequency = defaultdict(list)
+        for event in events:
+            agent_frequency[event['agent']].append(event['timestamp'])
+        close = {}
+        for agent, timestamps in agent_frequency.items():
+            timestamps.sort()
+            close[agent] = sum(
+                1 for i in range(1, len(timestamps)) if (timestamps[i] - timestamps[i - 1]).seconds < 60
+            )
+        return close
+
+    return {'dashboard_frame_and_groupbys': dashboard, 'cost_by_agent': by_agent,
+            'close_operations_by_agent': close_operations}
+
+
+def benchmark_legacy(events: int, seed: int = DEFAULT_SEED) -> Dict:
+    timestamps, agents, operations, costs = generate_columns(events, seed)
+    records = [
+        {
+            'timestamp': STORE_EPOCH + timedelta(microseconds=int(timestamps[i])),
+            'agent': AGENTS[agents[i]],
+            'operation': OPERATIONS[operations[i]],
+            'cost': float(costs[i])
+        }
+        for i in range(events)
+    ]
+    queries = {}
+    for name, query in _legacy_queries(records).items():
+        seconds, _ = _timed(query, repeat=1)
+        queries[name] = round(seconds, 3)
+
+    # אותן שאילתות במאגר העמודתי באותו גודל - להשוואה ישירה
+    store = CostEventStore()
+    store.extend(timestamps, np.array(AGENTS, dtype=object)[agents],
+                 np.array(OPERATIONS, dtype=object)[operations], costs)
+    columnar = {}
+    for name, query in (
+            ('dashboard_frame_and_groupbys', lambda: (store.daily_costs(), store.cost_by_agent(),
+                                                      store.count_by_operation(), store.hourly_mean_cost())),
+            ('cost_by_agent', store.cost_by_agent),
+            ('close_operations_by_agent', store.close_operations_by_agent)):
+        seconds, _ = _timed(query)
+        columnar[name] = round(seconds, 4)
+    return {
+        'events': events,
+        'legacy_query_seconds': queries,
+        'columnar_query_seconds': columnar,
+        'speedup': {
+            name: round(queries[name] / columnar[name], 1) if columnar[name] else None
+            for name in queries
+        }
+    }
+
+
+def main():
+    """python cost_store_benchmark.py [אירועים] [אירועים למימוש הקודם]"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EVENTS
+    legacy_events = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LEGACY_EVENTS
+    store = benchmark_store(events)
+    logger.info(
+        f"Columnar store: {events:,} events, {store['column_mb']} MB of columns, "
+        f"all report/dashboard queries in {store['all_queries_seconds']:.3f}s"
+    )
+    legacy = benchmark_legacy(legacy_events)
+    logger.info(f"Legacy vs columnar at {legacy_events:,} events (speedup): {legacy['speedup']}")
+
+    output = {
+        'benchmark': 'cost_event_store',
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'store': store,
+        'legacy': legacy
+    }
+    output_file = f'cost_store_benchmark_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    logger.info(f"Benchmark saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
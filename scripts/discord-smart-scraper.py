@@ -6,11 +6,12 @@ Discord Smart Scraper
 
 import discord
 import asyncio
-import json
 from datetime import datetime, timedelta
 from typing import List, Dict
 import re
 
+from serialization import dump
+
 class DiscordTalentScraper:
     def __init__(self):
         self.israeli_tech_servers = {
@@ -310,8 +311,7 @@ Let me know if you'd like to hear more!
             "members": sorted(all_members, key=lambda x: x["relevance_score"], reverse=True)
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        dump(output, filename)
             
         print(f"✅ Saved {len(all_members)} Discord profiles to {filename}")
         return filename
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Async GitHub Enrichment
+העשרת GitHub מרוכזת - בקשות מקביליות על session משותף, מגבלת קצב שעתית
+ומטמון על הדיסק עם אימות ETag (If-None-Match)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+# מגבלת ה-API השעתית (גם מקור המגבלה של האורקסטרטור)
+GITHUB_HOURLY_LIMIT = 5000
+DEFAULT_CONCURRENCY = 10
+# רשומה במטמון שנבדקה לאחרונה - בלי בקשה בכלל
+DEFAULT_MAX_AGE_HOURS = 24
+
+_USERNAME_PATTERN = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})$')
+_RESERVED_PATHS = {'orgs', 'settings', 'topics', 'features', 'about', 'marketplace', 'sponsors'}
+
+
+def github_username(url: Optional[str]) -> Optional[str]:
+    """חילוץ שם משתמש מ-URL של GitHub (או שם משתמש בודד)"""
+    if not url:
+        return None
+    path = url.strip().split('?')[0].split('#')[0].rstrip('/')
+    if 'github.com' in path:
+        path = path.split('github.com', 1)[1].lstrip('/')
+        path = path.split('/')[0]
+    if path.lower() in _RESERVED_PATHS or not _USERNAME_PATTERN.match(path):
+        return None
+    return path.lower()
+
+
+def account_age_years(created_at: Optional[str], now: Optional[datetime] = None) -> float:
+    """גיל חשבון בשנים מתאריך created_at של GitHub"""
+    if not created_at:
+        return 0.0
+    created = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (now - created).days / 365.25)
+
+
+@dataclass
+class GitHubProfile:
+    """נתוני GitHub של מועמד"""
+    username: str
+    public_repos: int = 0
+    followers: int = 0
+    stars: int = 0
+    created_at: Optional[str] = None
+
+    def account_age_years(self, now: Optional[datetime] = None) -> float:
+        return account_age_years(self.created_at, now)
+
+
+class HourlyBudget:
+    """מגבלת בקשות בחלון של שעה - מסונכרנת גם לכותרות X-RateLimit של GitHub"""
+
+    def __init__(self, limit: int = GITHUB_HOURLY_LIMIT, window_start: Optional[str] = None, used: int = 0):
+        self.limit = limit
+        self.window_start = datetime.fromisoformat(window_start) if window_start else datetime.now()
+        self.used = used
+        self._roll()
+
+    def _roll(self) -> None:
+        if datetime.now() - self.window_start >= timedelta(hours=1):
+            self.window_start = datetime.now()
+            self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        self._roll()
+        return max(0, self.limit - self.used)
+
+    def try_acquire(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.used += 1
+        return True
+
+    def refund(self) -> None:
+        self.used = max(0, self.used - 1)
+
+    def observe(self, headers) -> None:
+        """עדכון לפי מה שהשרת מדווח (בקשות של תהליכים אחרים נספרות שם)"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is not None and remaining.isdigit():
+            self.used = max(self.used, self.limit - int(remaining))
+
+    def to_dict(self) -> Dict:
+        return {'window_start': self.window_start.isoformat(), 'used': self.used}
+
+
+class GitHubCache:
+    """מטמון תשובות לפי שם משתמש: ETag + נתונים מסוכמים לכל endpoint"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.users: Dict[str, Dict] = {}
+        self.budget_state: Dict = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.users = data.get('users', {})
+                self.budget_state = data.get('budget', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable GitHub cache {path}: {e}")
+
+    def get(self, username: str, endpoint: str) -> Optional[Dict]:
+        return self.users.get(username, {}).get(endpoint)
+
+    def put(self, username: str, endpoint: str, etag: Optional[str], data) -> None:
+        self.users.setdefault(username, {})[endpoint] = {
+            'etag': etag,
+            'data': data,
+            'checked_at': datetime.now().isoformat()
+        }
+
+    def touch(self, username: str, endpoint: str) -> None:
+        entry = self.get(username, endpoint)
+        if entry is not None:
+            entry['checked_at'] = datetime.now().isoformat()
+
+    def is_fresh(self, username: str, endpoint: str, max_age: timedelta) -> bool:
+        entry = self.get(username, endpoint)
+        if not entry:
+            return False
+        return datetime.now() - datetime.fromisoformat(entry['checked_at']) < max_age
+
+    def save(self, budget: HourlyBudget) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'budget': budget.to_dict(), 'users': self.users}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+
+class GitHubEnricher:
+    """שליפה מקבילית של פרופילי GitHub לכל שמות המשתמשים בריצה"""
+
+    def __init__(self, cache_path: str = "github_cache.json", hourly_limit: int = GITHUB_HOURLY_LIMIT,
+                 concurrency: int = DEFAULT_CONCURRENCY, token: Optional[str] = None,
+                 base_url: str = GITHUB_API_URL, max_age_hours: float = DEFAULT_MAX_AGE_HOURS,
+                 timeout: float = 10.0):
+        self.cache = GitHubCache(cache_path)
+        self.budget = HourlyBudget(hourly_limit, **self.cache.budget_state)
+        self.concurrency = concurrency
+        self.token = token if token is not None else os.getenv('GITHUB_TOKEN')
+        self.base_url = base_url.rstrip('/')
+        self.max_age = timedelta(hours=max_age_hours)
+        self.timeout = timeout
+
+        self.requests = 0
+        self.fetched = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+        self.budget_skipped = 0
+        self.errors = 0
+        self._unreachable = False
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'MeUnique-candidate-integrator'
+        }
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        return headers
+
+    async def _get(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                   username: str, endpoint: str, url: str, summarize):
+        """בקשה אחת עם If-None-Match - מחזיר את הנתונים המסוכמים (מהשרת או מהמטמון)"""
+        cached = self.cache.get(username, endpoint)
+        if self.cache.is_fresh(username, endpoint, self.max_age):
+            self.cache_hits += 1
+            return cached['data']
+
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+
+        async with semaphore:
+            # נבדק אחרי ההמתנה - בקשות שחיכו בתור לא יוצאות אחרי כישלון חיבור
+            if self._unreachable:
+                return cached['data'] if cached else None
+            if not self.budget.try_acquire():
+                self.budget_skipped += 1
+                return cached['data'] if cached else None
+            try:
+                self.requests += 1
+                async with session.get(url, headers=headers) as response:
+                    self.budget.observe(response.headers)
+                    if response.status == 304:
+                        # בקשה מותנית שלא השתנתה לא נספרת במגבלה של GitHub
+                        self.budget.refund()
+                        self.not_modified += 1
+                        self.cache.touch(username, endpoint)
+                        return cached['data']
+                    if response.status == 200:
+                        data = summarize(await response.json())
+                        self.cache.put(username, endpoint, response.headers.get('ETag'), data)
+                        self.fetched += 1
+                        return data
+                    if response.status == 404:
+                        self.cache.put(username, endpoint, None, None)
+                        return None
+                    logger.warning(f"GitHub API {response.status} for {url}")
+                    self.errors += 1
+            except aiohttp.ClientConnectorError as e:
+                # אין חיבור - לא מנסים את שאר המשתמשים בריצה הזו
+                logger.error(f"GitHub API unreachable: {e}")
+                self._unreachable = True
+                self.budget.refund()
+                self.errors += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"GitHub request failed for {url}: {e}")
+                self.errors += 1
+        return cached['data'] if cached else None
+
+    async def fetch_profile(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                            username: str) -> Optional[GitHubProfile]:
+        """פרופיל + סכום כוכבים מהריפוזיטוריז (עמוד ראשון, 100 הפעילים לאחרונה)"""
+        user = await self._get(
+            session, semaphore, username, 'user', f"{self.base_url}/users/{username}",
+            lambda d: {
+                'public_repos': d.get('public_repos', 0),
+                'followers': d.get('followers', 0),
+                'created_at': d.get('created_at')
+            }
+        )
+        if user is None:
+            return None
+        repos = await self._get(
+            session, semaphore, username, 'repos',
+            f"{self.base_url}/users/{username}/repos?per_page=100&sort=pushed",
+            lambda d: {'stars': sum(repo.get('stargazers_count', 0) for repo in d)}
+        )
+        return GitHubProfile(
+            username=username,
+            public_repos=user['public_repos'],
+            followers=user['followers'],
+            stars=repos['stars'] if repos else 0,
+            created_at=user['created_at']
+        )
+
+    async def fetch_all(self, usernames: Iterable[str]) -> Dict[str, GitHubProfile]:
+        """כל הפרופילים במקביל על session אחד"""
+        usernames = sorted(set(usernames))
+        if not usernames:
+            return {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(headers=self._headers(), connector=connector, timeout=timeout) as session:
+            results = await asyncio.gather(
+                *(self.fetch_profile(session, semaphore, username) for username in usernames)
+            )
+        return {profile.username: profile for profile in results if profile is not None}
+
+    def enrich(self, usernames: Iterable[str]) -> Dict[str, GitHubProfile]:
+        """הרצה סינכרונית + שמירת המטמון"""
+        profiles = asyncio.run(self.fetch_all(usernames))
+        self.cache.save(self.budget)
+        logger.info(
+            f"GitHub enrichment: {len(profiles)} profiles ({self.fetched} fetched, "
+            f"{self.not_modified} not modified, {self.cache_hits} cached, "
+            f"{self.budget_skipped} over budget, {self.errors} errors)"
+        )
+        return profiles
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'fetched': self.fetched,
+            'not_modified': self.not_modified,
+            'cache_hits': self.cache_hits,
+            'budget_skipped': self.budget_skipped,
+            'errors': self.errors,
+            'budget_remaining': self.budget.remaining
+        }
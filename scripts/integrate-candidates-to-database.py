@@ -7,18 +7,44 @@ Integrate Candidates to Database with Smart Deduplication
 import json
 import os
 import sys
+import time
 import pandas as pd
-import numpy as np
-from datetime import datetime
-from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
 import hashlib
 import re
 from collections import defaultdict
+from itertools import chain, islice
 import logging
-from dataclasses import dataclass, asdict
+import multiprocessing
+from dataclasses import dataclass
 import requests
-from fuzzywuzzy import fuzz, process
-import phonenumbers
+from fuzzywuzzy import fuzz
+
+from candidate_index import DedupIndex, UnionFind
+from candidate_normalize import (
+    INTEGRATION_SENIORITY, cache_stats, dedup_keys,
+    normalize_email, normalize_linkedin_url, normalize_location, normalize_phone
+)
+from candidate_lsh import LSH_INDEX_FILE, MinHashLSH
+from skill_matcher import SkillMatcher
+from candidate_ledger import SKIP, IngestionLedger, IngestionPlan
+from candidate_wal import DEFAULT_CHECKPOINT_OPS, DELETE, PROGRESS, PUT, WAL_FILE, WriteAheadLog
+from candidate_stream import DEFAULT_CHUNK_SIZE, IngestionStats, iter_record_chunks
+from candidate_store import CandidateStore, LazyCandidateMap
+from candidate_compact import CompactCandidate, candidate_fields
+from candidate_report import ReportAggregator
+from candidate_reenrichment import DEFAULT_TOP_K, ReenrichmentScheduler
+from candidate_resolution import ClusterResolver
+from candidate_scoring import (
+    EXPERIENCED_LEVELS, EXPERIENCED_TAG, LOCATION_TAGS, QUALITY_FIELDS, QUALITY_LISTS, QUALITY_TOTAL,
+    SCORING_BATCH_SIZE, SENIORITY_YEARS, SKILL_TAGS, SOURCE_TAGS, records_frame, score_frame
+)
+from serialization import dump, loads, output_formats
+from arrow_io import ParquetWriter, schema_for_dataclass
+from github_enrichment import (
+    GITHUB_HOURLY_LIMIT, GitHubEnricher, GitHubProfile, account_age_years, github_username
+)
 
 # הגדרת לוגינג
 logging.basicConfig(
@@ -56,6 +82,8 @@ class EnrichedCandidate:
     
     # מטריקות
     github_stars: int = 0
+    github_repos: int = 0
+    github_created_at: Optional[str] = None  # תאריך פתיחת החשבון (ISO, מה-API)
     stackoverflow_reputation: int = 0
     engagement_score: float = 0.0
     match_score: float = 0.0
@@ -70,6 +98,12 @@ class EnrichedCandidate:
     enrichment_status: str = "pending"
     data_quality_score: float = 0.0
     
+    # מפתחות כפילויות מנורמלים - מחושבים פעם אחת ונשמרים עם הרשומה
+    email_key: Optional[str] = None
+    linkedin_key: Optional[str] = None
+    name_key: Optional[str] = None
+    company_key: Optional[str] = None
+    
     def __post_init__(self):
         if self.skills is None:
             self.skills = []
@@ -85,32 +119,238 @@ class EnrichedCandidate:
             self.created_at = datetime.now()
         if self.updated_at is None:
             self.updated_at = datetime.now()
+        if self.email_key is None:
+            self.email_key, self.linkedin_key, self.name_key, self.company_key = dedup_keys(
+                self.email, self.linkedin_url, self.name, self.current_company
+            )
 
 class CandidateIntegrator:
     """מערכת אינטגרציה חכמה למועמדים"""
     
-    def __init__(self):
-        self.existing_candidates: Dict[str, EnrichedCandidate] = {}
+    def __init__(self, load_database: bool = True, lazy_load: bool = True, partial_report_rows: int = 0,
+                 wal_checkpoint_ops: int = DEFAULT_CHECKPOINT_OPS):
+        self.lazy_load = lazy_load
         self.new_candidates: List[EnrichedCandidate] = []
+        self.new_candidates_by_id: Dict[str, EnrichedCandidate] = {}
+        self.merged_ids: Set[str] = set()
+        # מועמדים קיימים שאוחדו לרשומה אחרת - יוסרו מהמאגר בשמירה
+        self.removed_ids: Set[str] = set()
+        self.resolution_stats: Optional[Dict] = None
         self.duplicates_found = 0
         self.enriched_count = 0
+        self.ingestion_stats: List[Dict] = []
         
-        # טעינת מאגר קיים
-        self.load_existing_database()
+        # מדדי הדוח מתעדכנים תוך כדי ריצה; דוח ביניים כל partial_report_rows שורות (0 = כבוי)
+        self.report_aggregator = ReportAggregator()
+        self.partial_report_rows = partial_report_rows
+        self.rows_processed = 0
+        self._rows_at_last_report = 0
+        
+        # מאגר אינקרמנטלי (סגמנטים + manifest)
+        self.store = CandidateStore()
+        self.existing_candidates = LazyCandidateMap(self.store.path, [], self.existing_from_record)
+        self.legacy_db_file = "candidates_master_database.json"
+        self.migrate_legacy = False
+        
+        # אינדקס כפילויות - מתוחזק יחד עם המאגר
+        self.dedup_index = DedupIndex()
+        self.lsh_index_file = os.path.join(self.store.path, LSH_INDEX_FILE)
+        self.report_state_file = os.path.join(self.store.path, "report_state.json")
+        self.github_cache_file = os.path.join(self.store.path, "github_cache.json")
+        self.github_stats: Optional[Dict] = None
+        # תור העשרה מחדש לפי התיישנות × ערך
+        self.reenrichment_state_file = os.path.join(self.store.path, "reenrichment_queue.json")
+        self._reenrichment: Optional[ReenrichmentScheduler] = ReenrichmentScheduler()
+        self._reenrichment_generation: Optional[int] = None
+        self.reenrichment_stats: Optional[Dict] = None
+        self.rescoring_stats: Optional[Dict] = None
+        self.name_lsh = MinHashLSH.load(self.lsh_index_file) if load_database else MinHashLSH()
+        
+        # ספר הקבצים שנקלטו - קבצים שלא השתנו מדולגים, קבצים שגדלו ממשיכים
+        ledger_file = os.path.join(self.store.path, "ingestion_ledger.json")
+        self.ingestion_ledger = IngestionLedger.load(ledger_file) if load_database else IngestionLedger(ledger_file)
+        
+        # יומן WAL של יצירות ומיזוגים - שינויים שלא נשמרו שורדים קריסה (רק בתהליך הראשי)
+        self.unsaved_ids: Set[str] = set()
+        self.wal: Optional[WriteAheadLog] = None
+        self.wal_checkpoint_ops = wal_checkpoint_ops
+        self.wal_recovery: Optional[Dict] = None
+        self._recovered_progress: Dict[str, Dict] = {}
+        self._current_progress: Optional[Dict] = None
+        
+        # טעינת מאגר קיים (workers של מצב מקבילי עובדים בלי מאגר)
+        if load_database:
+            self.load_existing_database()
+            self.wal = WriteAheadLog(os.path.join(self.store.path, WAL_FILE))
+            self.recover_from_wal()
         
         # מאגרי מידע לאימות
         self.load_verification_data()
         
     def load_existing_database(self):
         """טעינת מאגר מועמדים קיים"""
-        db_file = "candidates_master_database.json"
-        if os.path.exists(db_file):
-            with open(db_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for candidate_data in data:
-                    candidate = EnrichedCandidate(**candidate_data)
+        if self.store.exists():
+            # טעינה עצלה: רק מפתחות הכפילויות, רשומות מלאות נשלפות לפי דרישה
+            self.existing_candidates = LazyCandidateMap.open(self.store, self.existing_from_record)
+            if not self.lazy_load:
+                for candidate_id in self.existing_candidates:
+                    self.existing_candidates[candidate_id]
+        elif os.path.exists(self.legacy_db_file):
+            # מאגר JSON ישן - יומר למאגר האינקרמנטלי בשמירה הבאה
+            with open(self.legacy_db_file, 'r', encoding='utf-8') as f:
+                for candidate_data in json.load(f):
+                    candidate = self.candidate_from_record(candidate_data)
                     self.existing_candidates[candidate.id] = candidate
-            logger.info(f"Loaded {len(self.existing_candidates)} existing candidates")
+            self.migrate_legacy = True
+            
+        # מפות הכפילויות נבנות ישירות מעמודות המפתחות - בלי אובייקט לכל רשומה
+        columns = self.existing_candidates.key_columns()
+        self.dedup_index.add_columns(columns['id'], columns['email_key'], columns['linkedin_key'],
+                                     columns['name'], columns['current_company'])
+        logger.info(f"Loaded {len(self.existing_candidates)} existing candidates")
+            
+        # חתימות LSH מחושבות רק לרשומות חדשות או שהשתנו - אינדקס שנשמר באותו דור של המאגר כבר מסונכרן
+        if self.migrate_legacy or self.name_lsh.generation != self.store.manifest['generation']:
+            lsh_sync = self.name_lsh.sync(self.existing_candidates.key_entries())
+            logger.info(f"LSH index synced: {lsh_sync}")
+        
+        # מדדי הדוח של המאגר - מהמצב השמור, או במעבר יחיד אם הוא לא תואם
+        aggregator = None
+        if not self.migrate_legacy:
+            aggregator = ReportAggregator.load(self.report_state_file, self.store.manifest['generation'])
+        if aggregator is None:
+            aggregator = ReportAggregator()
+            aggregator.rebuild(self.existing_candidates.iter_candidates())
+        self.report_aggregator = aggregator
+        
+        # תור ההעשרה מחדש נטען רק בגישה הראשונה - לפי הדור של המאגר בטעינה
+        self._reenrichment = None
+        self._reenrichment_generation = None if self.migrate_legacy else self.store.manifest['generation']
+        
+    @property
+    def reenrichment(self) -> ReenrichmentScheduler:
+        """תור ההעשרה מחדש - מהמצב השמור, או במעבר יחיד אם הוא לא תואם"""
+        if self._reenrichment is None:
+            scheduler = None
+            if self._reenrichment_generation is not None:
+                scheduler = ReenrichmentScheduler.load(self.reenrichment_state_file, self._reenrichment_generation)
+            if scheduler is None:
+                scheduler = ReenrichmentScheduler()
+                scheduler.rebuild(self.existing_candidates.iter_candidates(), self.paid_sources)
+            self._reenrichment = scheduler
+        return self._reenrichment
+        
+    def recover_from_wal(self) -> Optional[Dict]:
+        """שחזור שינויים מריצה שקרסה - מצב אחרון לכל מועמד ביומן מוחל מעל המאגר השמור"""
+        started = time.perf_counter()
+        states: Dict[str, Optional[Dict]] = {}
+        ops = 0
+        for entry in self.wal.replay():
+            ops += 1
+            if entry['op'] == PUT:
+                states[entry['record']['id']] = entry['record']
+            elif entry['op'] == DELETE:
+                states[entry['id']] = None
+            elif entry['op'] == PROGRESS:
+                self._recovered_progress[entry['path']] = entry
+        if not ops:
+            return None
+            
+        # לפי סדר ההופעה הראשונה - מועמדים חדשים חוזרים בסדר היצירה שלהם
+        removed = 0
+        for candidate_id, record in states.items():
+            if record is None:
+                if candidate_id in self.existing_candidates:
+                    self.report_aggregator.remove(self.existing_candidates.peek(candidate_id))
+                    self.dedup_index.remove(candidate_id)
+                    self.name_lsh.remove(candidate_id)
+                    del self.existing_candidates[candidate_id]
+                    self.removed_ids.add(candidate_id)
+                    removed += 1
+                continue
+            candidate = self.candidate_from_record(record)
+            previous = self.existing_candidates.peek(candidate_id)
+            self.track_in_report(candidate, previous)
+            if previous is not None:
+                self.existing_candidates[candidate_id] = candidate
+                self.merged_ids.add(candidate_id)
+                self.dedup_index.update(candidate)
+            else:
+                self.new_candidates.append(candidate)
+                self.new_candidates_by_id[candidate_id] = candidate
+                self.dedup_index.add(candidate)
+            self.name_lsh.add(candidate_id, candidate.name, candidate.current_company)
+            self.unsaved_ids.add(candidate_id)
+            
+        self.wal_recovery = {
+            'ops': ops,
+            'candidates': len(states) - sum(1 for record in states.values() if record is None),
+            'removed': removed,
+            'files_in_progress': len(self._recovered_progress),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        logger.info(f"Recovered unsaved changes from write-ahead log: {self.wal_recovery}")
+        return self.wal_recovery
+        
+    def apply_recovered_progress(self, plan: IngestionPlan) -> None:
+        """המשך קובץ מהשורה שאחרי מה שכבר שוחזר מהיומן (אם הקובץ לא השתנה מאז)"""
+        progress = self._recovered_progress.pop(IngestionLedger.key(plan.path), None)
+        if progress is None:
+            return
+        if (progress['size'], progress['mtime'], progress['offset'], progress['skip']) != (
+                plan.size, plan.mtime, plan.offset, plan.skip_rows):
+            logger.info(f"{plan.path} changed since the interrupted run, reading it again")
+            return
+        plan.recovered_rows = progress['rows']
+        logger.info(f"Resuming {plan.path} after {plan.recovered_rows} rows recovered from the write-ahead log")
+        
+    def log_change(self, candidate: EnrichedCandidate) -> None:
+        """רישום המצב החדש של מועמד ביומן (לפני שהוא נשמר במאגר)"""
+        self.unsaved_ids.add(candidate.id)
+        if self.wal is not None:
+            self.wal.put(self.candidate_to_record(candidate))
+            
+    def log_removal(self, candidate_id: str) -> None:
+        self.unsaved_ids.discard(candidate_id)
+        if self.wal is not None:
+            self.wal.delete(candidate_id)
+            
+    def log_progress(self, plan: IngestionPlan, rows: int) -> None:
+        """כמה שורות מהקובץ כבר הוחלו - נרשם אחרי הפעולות שלהן, כך שהמשך אחרי שחזור לא מכפיל"""
+        self._current_progress = {
+            'path': IngestionLedger.key(plan.path),
+            'size': plan.size,
+            'mtime': plan.mtime,
+            'offset': plan.offset,
+            'skip': plan.skip_rows,
+            'rows': plan.recovered_rows + rows
+        }
+        self.wal.append(PROGRESS, **self._current_progress)
+        
+    def checkpoint_if_due(self) -> None:
+        if self.wal is not None and self.wal_checkpoint_ops and self.wal.ops_since_checkpoint >= self.wal_checkpoint_ops:
+            self.checkpoint()
+            
+    def checkpoint(self) -> bool:
+        """snapshot: השינויים שלא נשמרו כסגמנט delta במאגר, ואז קטימת היומן"""
+        if self.migrate_legacy or self.removed_ids:
+            # מחיקות והמרת מאגר ישן נכתבות רק בדחיסה של save_database
+            return False
+        changed = self.unsaved_changes()
+        self.store.commit(self.candidate_to_record(c) for c in changed)
+        self.sync_reenrichment(changed)
+        # מצב ה-LSH, הדוח ותור ההעשרה תואם עכשיו למאגר השמור
+        self.name_lsh.save(self.lsh_index_file, self.store.manifest['generation'])
+        self.report_aggregator.save(self.report_state_file, self.store.manifest['generation'])
+        self.reenrichment.save(self.reenrichment_state_file, self.store.manifest['generation'])
+        self.ingestion_ledger.save()
+        self.unsaved_ids = set()
+        self.wal.truncate()
+        if self._current_progress is not None:
+            # הקובץ שבאמצע קליטה - ההתקדמות עוברת ליומן החדש
+            self.wal.append(PROGRESS, **self._current_progress)
+        logger.info(f"Checkpoint: {len(changed)} candidates saved, write-ahead log truncated")
+        return True
     
     def load_verification_data(self):
         """טעינת מאגרי מידע לאימות"""
@@ -133,28 +373,249 @@ class CandidateIntegrator:
             'data': ['spark', 'kafka', 'airflow', 'databricks', 'snowflake', 'bigquery']
         }
         
-    def process_candidates_file(self, file_path: str):
-        """עיבוד קובץ מועמדים"""
+        # מאמת כישורים מקומפל - נבנה פעם אחת לכל הריצה
+        self.skill_matcher = SkillMatcher(self.verified_skills)
+        
+    def process_candidates_file(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                plan: Optional[IngestionPlan] = None):
+        """עיבוד קובץ מועמדים בקריאה זורמת (CSV במנות, JSON הדרגתי)"""
         logger.info(f"Processing file: {file_path}")
         
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
-        elif file_path.endswith('.json'):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                df = pd.DataFrame(data)
-        else:
+        try:
+            if plan is not None:
+                chunks = iter_record_chunks(file_path, chunk_size, offset=plan.offset,
+                                            skip=plan.skip_rows + plan.recovered_rows)
+            else:
+                chunks = iter_record_chunks(file_path, chunk_size)
+        except ValueError:
             logger.error(f"Unsupported file format: {file_path}")
             return
             
-        # עיבוד כל מועמד
-        for _, row in df.iterrows():
-            candidate = self.parse_candidate(row)
-            if candidate:
+        stats = IngestionStats(file_path)
+        for records in chunks:
+            candidates = []
+            for record in records:
+                candidate = self.parse_candidate(record)
+                if candidate:
+                    candidates.append(candidate)
+                    
+            # אימות מרוכז של כל הכישורים הייחודיים במנה
+            self.skill_matcher.prepare(skill for c in candidates for skill in c.skills)
+            
+            # עיבוד כל מועמד
+            for candidate in candidates:
                 self.process_candidate(candidate)
                 
-    def parse_candidate(self, row) -> Optional[EnrichedCandidate]:
-        """פרסור מועמד מ-row"""
+            stats.add_chunk(len(records))
+            self.rows_processed += len(records)
+            if plan is not None and self.wal is not None:
+                self.log_progress(plan, stats.rows)
+            self.checkpoint_if_due()
+            if self.partial_report_rows and self.rows_processed - self._rows_at_last_report >= self.partial_report_rows:
+                self.generate_report(partial=True)
+            
+        file_stats = stats.finish()
+        self.ingestion_stats.append(file_stats)
+        if plan is not None:
+            self.ingestion_ledger.record(plan, stats.rows)
+        self._current_progress = None
+        rss = file_stats['peak_rss_mb']
+        logger.info(
+            f"Ingested {file_stats['rows']} rows from {file_path} ({file_stats['rows_per_second']:.0f} rows/s, "
+            + (f"peak RSS {rss:.0f} MB)" if rss is not None
+               else f"process peak RSS {file_stats['process_peak_rss_mb']:.0f} MB)")
+        )
+                
+    def integrate_files(self, file_paths: List[str], workers: int = 1,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """אינטגרציה של רשימת קבצים - סדרתית או מקבילית (רק מה שלא נקלט כבר)"""
+        plans = [self.ingestion_ledger.plan(file_path) for file_path in file_paths]
+        plans = [plan for plan in plans if plan.action != SKIP]
+        for plan in plans:
+            self.apply_recovered_progress(plan)
+        if workers <= 1:
+            for plan in plans:
+                self.process_candidates_file(plan.path, chunk_size, plan)
+        else:
+            self.integrate_files_parallel(plans, workers, chunk_size)
+            
+    def integrate_files_parallel(self, plans: List[IngestionPlan], workers: int,
+                                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """אינטגרציה מקבילית: פרסור במאגר תהליכים, חלוקה לשארדים לפי מפתחות זהות ומיזוג סופי
+        
+        מועמדים שלא חולקים אף מפתח זהות (email, LinkedIn, בלוק שם + חברה, פס LSH)
+        לעולם לא נבדקים זה מול זה, ולכן כל רכיב קשירות של מפתחות משויך לשארד אחד
+        ומעובד שם לפי הסדר הסדרתי המקורי - התוצאה זהה לריצה הסדרתית.
+        """
+        # שלב 1: פרסור ונרמול מקבילי במנות
+        parsed: List[Tuple[int, EnrichedCandidate, Any, List]] = []
+        rows_by_file: Dict[str, int] = defaultdict(int)
+        with multiprocessing.Pool(workers, initializer=_init_parse_worker) as pool:
+            tasks = _iter_parse_tasks(plans, chunk_size)
+            current_stats = None
+            for file_path, rows, results in pool.imap(_parse_records, tasks):
+                rows_by_file[file_path] += rows
+                if current_stats is None or current_stats.file_path != file_path:
+                    if current_stats is not None:
+                        self.ingestion_stats.append(current_stats.finish())
+                    current_stats = IngestionStats(file_path)
+                current_stats.add_chunk(rows)
+                parsed.extend(results)
+            if current_stats is not None:
+                self.ingestion_stats.append(current_stats.finish())
+        for plan in plans:
+            self.ingestion_ledger.record(plan, rows_by_file[plan.path])
+                
+        for file_stats in self.ingestion_stats:
+            logger.info(
+                f"Parsed {file_stats['rows']} rows from {file_stats['file']} "
+                f"({file_stats['rows_per_second']:.0f} rows/s)"
+            )
+            
+        # שלב 2: רכיבי קשירות לפי מפתחות זהות (מועמדים קיימים ואז חדשים)
+        existing = list(self.existing_candidates.key_entries())
+        union_find = UnionFind(len(existing) + len(parsed))
+        key_owner: Dict = {}
+        
+        def link(position: int, keys):
+            for key in keys:
+                owner = key_owner.setdefault(key, position)
+                if owner != position:
+                    union_find.union(owner, position)
+                    
+        for position, candidate in enumerate(existing):
+            link(position, self.identity_keys(candidate))
+        for offset, (_, _, _, keys) in enumerate(parsed):
+            link(len(existing) + offset, keys)
+            
+        components: Dict[int, List[int]] = defaultdict(list)
+        for position in range(len(existing) + len(parsed)):
+            components[union_find.find(position)].append(position)
+            
+        # שיבוץ רכיבים לשארדים - הגדול ביותר לשארד הפנוי ביותר
+        shard_count = workers * 4
+        shards = [([], [], {}) for _ in range(shard_count)]
+        shard_sizes = [0] * shard_count
+        for members in sorted(components.values(), key=len, reverse=True):
+            target = shard_sizes.index(min(shard_sizes))
+            shard_sizes[target] += len(members)
+            for position in members:
+                if position < len(existing):
+                    candidate = existing[position]
+                    shards[target][0].append(candidate.id)
+                    # חתימות LSH קיימות עוברות לשארד כדי לא לחשב מחדש
+                    if candidate.id in self.name_lsh:
+                        shards[target][2][candidate.id] = (
+                            self.name_lsh.get_fingerprint(candidate.id),
+                            self.name_lsh.get_signature(candidate.id)
+                        )
+                else:
+                    seq, candidate, signature, _ = parsed[position - len(existing)]
+                    shards[target][1].append((seq, candidate, signature))
+                    
+        # סדר מקורי בתוך כל שארד
+        for _, shard_new, _ in shards:
+            shard_new.sort(key=lambda item: item[0])
+        # מועמדים קיימים עוברים כמיקומים בסגמנטים - ה-worker קורא אותם לפי דרישה
+        shards = [
+            (self.existing_candidates.export(existing_ids), shard_new, signatures)
+            for existing_ids, shard_new, signatures in shards
+            if shard_new
+        ]
+        logger.info(f"Deduplicating {len(parsed)} records in {len(shards)} shards ({len(components)} identity components)")
+        
+        # שלב 3: דה-דופליקציה והעשרה בכל שארד
+        with multiprocessing.Pool(workers) as pool:
+            shard_results = pool.map(_integrate_shard, shards)
+            
+        # שלב 4: מיזוג בין השארדים
+        new_with_seq = []
+        for merged, merged_ids, new_candidates, signatures, duplicates, enriched in shard_results:
+            for candidate in merged:
+                self.track_in_report(candidate, self.existing_candidates.peek(candidate.id))
+                self.existing_candidates[candidate.id] = candidate
+                self.dedup_index.update(candidate)
+                self.log_change(candidate)
+            self.merged_ids |= merged_ids
+            new_with_seq.extend(new_candidates)
+            for candidate_id, (fingerprint, signature) in signatures.items():
+                self.name_lsh.put(candidate_id, signature, fingerprint)
+            self.duplicates_found += duplicates
+            self.enriched_count += enriched
+            
+        new_with_seq.sort(key=lambda item: item[0])
+        for _, candidate in new_with_seq:
+            self.track_in_report(candidate, self.previous_version(candidate.id))
+            self.new_candidates.append(candidate)
+            self.new_candidates_by_id[candidate.id] = candidate
+            self.dedup_index.add(candidate)
+            self.log_change(candidate)
+            
+    def resolve_duplicates(self, partitions: int = 1) -> Dict:
+        """איחוד כפילויות טרנזיטיבי (A~B~C לרשומה אחת) על כל המאגר והמועמדים החדשים"""
+        # הגרסה שתישמר לכל ID - מועמד חדש גובר על רשומה קיימת עם אותו ID
+        ids = list(self.existing_candidates)
+        ids.extend(cid for cid in self.new_candidates_by_id if cid not in self.existing_candidates)
+        
+        def current(candidate_id: str):
+            candidate = self.new_candidates_by_id.get(candidate_id)
+            return candidate if candidate is not None else self.existing_candidates.peek(candidate_id)
+            
+        entries = [
+            self.new_candidates_by_id.get(cid) or self.existing_candidates.key_entry(cid)
+            for cid in ids
+        ]
+        resolver = ClusterResolver(self.name_lsh, partitions=partitions)
+        resolved, stats = resolver.resolve(entries, lambda cid: self.candidate_to_record(current(cid)))
+        
+        for merged_record, member_ids in resolved:
+            survivor = self.candidate_from_record(merged_record)
+            for candidate_id in member_ids:
+                self.report_aggregator.remove(current(candidate_id))
+                self.dedup_index.remove(candidate_id, keep_order=candidate_id == survivor.id)
+                if candidate_id == survivor.id:
+                    continue
+                self.name_lsh.remove(candidate_id)
+                self.log_removal(candidate_id)
+                self.new_candidates_by_id.pop(candidate_id, None)
+                if candidate_id in self.existing_candidates:
+                    del self.existing_candidates[candidate_id]
+                    self.removed_ids.add(candidate_id)
+                    self.merged_ids.discard(candidate_id)
+                    
+            if survivor.id in self.new_candidates_by_id:
+                self.new_candidates_by_id[survivor.id] = survivor
+            else:
+                self.existing_candidates[survivor.id] = survivor
+                self.merged_ids.add(survivor.id)
+            self.report_aggregator.add(survivor)
+            self.log_change(survivor)
+            self.dedup_index.add(survivor)
+            self.name_lsh.add(survivor.id, survivor.name, survivor.current_company)
+            
+        # רשומה אחת לכל ID (בגרסה העדכנית) - ID שמופיע פעמיים ברשימה היה יוצר כפילות בשמירה ובדוח
+        seen: Set[str] = set()
+        new_candidates = []
+        for candidate in self.new_candidates:
+            if candidate.id in self.new_candidates_by_id and candidate.id not in seen:
+                seen.add(candidate.id)
+                new_candidates.append(self.new_candidates_by_id[candidate.id])
+        self.new_candidates = new_candidates
+        self.resolution_stats = stats
+        return stats
+        
+    def identity_keys(self, candidate: EnrichedCandidate, signature=None) -> List:
+        """מפתחות זהות של מועמד - כולל פסי LSH של שם + חברה (signature - אם כבר חושבה)"""
+        keys = list(self.dedup_index.identity_keys(candidate))
+        if signature is None:
+            signature = self.name_lsh.get_signature(candidate.id)
+        if signature is None:
+            signature = self.name_lsh.signature(candidate.name, candidate.current_company)
+        keys.extend(self.name_lsh.band_tokens(signature))
+        return keys
+        
+    def parse_candidate(self, row: Dict) -> Optional[EnrichedCandidate]:
+        """פרסור מועמד מרשומה (dict פשוט)"""
         try:
             # יצירת ID ייחודי
             unique_id = self.generate_candidate_id(row)
@@ -207,10 +668,16 @@ class CandidateIntegrator:
         else:
             return f"candidate_{datetime.now().timestamp()}"
             
-    def process_candidate(self, candidate: EnrichedCandidate):
-        """עיבוד מועמד - בדיקת כפילויות והעשרה"""
+    def process_candidate(self, candidate: EnrichedCandidate, signature=None):
+        """עיבוד מועמד - בדיקת כפילויות והעשרה
+        
+        חתימת ה-MinHash של שם + חברה מחושבת פעם אחת (או מגיעה מה-worker של הפרסור)
+        ומשמשת גם לשליפה מה-LSH וגם להוספה אליו - ההעשרה לא משנה שם או חברה.
+        """
+        if signature is None:
+            signature = self.name_lsh.signature(candidate.name, candidate.current_company)
         # בדיקת כפילויות
-        duplicate_id = self.find_duplicate(candidate)
+        duplicate_id = self.find_duplicate(candidate, signature)
         
         if duplicate_id:
             # מיזוג עם מועמד קיים
@@ -219,46 +686,77 @@ class CandidateIntegrator:
         else:
             # העשרת מועמד חדש
             enriched = self.enrich_candidate(candidate)
+            self.track_in_report(enriched, self.previous_version(enriched.id))
             self.new_candidates.append(enriched)
+            self.new_candidates_by_id[enriched.id] = enriched
+            # מועמדים חדשים נבדקים גם אחד מול השני
+            self.dedup_index.add(enriched)
+            self.name_lsh.add(enriched.id, enriched.name, enriched.current_company, signature)
+            self.log_change(enriched)
             
-    def find_duplicate(self, candidate: EnrichedCandidate) -> Optional[str]:
+    def previous_version(self, candidate_id: str) -> Optional[EnrichedCandidate]:
+        """הגרסה שמועמד חדש עם אותו ID יחליף בשמירה (אם יש)"""
+        previous = self.new_candidates_by_id.get(candidate_id)
+        if previous is None:
+            previous = self.existing_candidates.peek(candidate_id)
+        return previous
+        
+    def track_in_report(self, candidate: EnrichedCandidate, previous: Optional[EnrichedCandidate] = None):
+        """עדכון מדדי הדוח: הסרת הגרסה הקודמת והוספת החדשה"""
+        if previous is not None:
+            self.report_aggregator.remove(previous)
+        self.report_aggregator.add(candidate)
+        
+    def candidate_keys(self, candidate_id: str):
+        """מפתחות הכפילויות של מועמד - בלי לשלוף רשומה מלאה מהמאגר"""
+        if candidate_id in self.existing_candidates:
+            return self.existing_candidates.key_entry(candidate_id)
+        return self.new_candidates_by_id.get(candidate_id)
+        
+    def get_candidate(self, candidate_id: str) -> Optional[EnrichedCandidate]:
+        """שליפת מועמד מהמאגר הקיים או מהמועמדים החדשים"""
+        candidate = self.existing_candidates.get(candidate_id)
+        if candidate is None:
+            candidate = self.new_candidates_by_id.get(candidate_id)
+        return candidate
+        
+    def find_duplicate(self, candidate: EnrichedCandidate, signature=None) -> Optional[str]:
         """חיפוש כפילויות חכם"""
-        for existing_id, existing in self.existing_candidates.items():
-            # בדיקת email
-            if candidate.email and existing.email:
-                if candidate.email.lower() == existing.email.lower():
-                    return existing_id
-                    
-            # בדיקת LinkedIn URL
-            if candidate.linkedin_url and existing.linkedin_url:
-                if self.normalize_linkedin_url(candidate.linkedin_url) == \
-                   self.normalize_linkedin_url(existing.linkedin_url):
-                    return existing_id
-                    
-            # בדיקת שם + חברה
-            if candidate.name and existing.name:
-                name_similarity = fuzz.ratio(
-                    candidate.name.lower(), 
-                    existing.name.lower()
-                )
-                if name_similarity > 90:
-                    if candidate.current_company and existing.current_company:
-                        company_similarity = fuzz.ratio(
-                            candidate.current_company.lower(),
-                            existing.current_company.lower()
-                        )
-                        if company_similarity > 80:
-                            return existing_id
-                            
-        return None
+        # בדיקת email ו-LinkedIn URL - חיפוש O(1) באינדקס
+        matches = set(self.dedup_index.lookup_exact(candidate.email_key, candidate.linkedin_key))
+        
+        # בדיקת שם + חברה - רק מול מועמדים מאותו בלוק
+        if candidate.name_key and candidate.company_key:
+            block = self.dedup_index.block_candidates(candidate.name, candidate.current_company)
+            # השלמת recall לשגיאות הקלדה שחוצות את מפתחות החסימה
+            if signature is None:
+                signature = self.name_lsh.signature(candidate.name, candidate.current_company)
+            block |= self.name_lsh.query_signature(signature)
+            for existing_id in block:
+                if existing_id in matches:
+                    continue
+                existing = self.candidate_keys(existing_id)
+                if not existing or not existing.name_key or not existing.company_key:
+                    continue
+                if fuzz.ratio(candidate.name_key, existing.name_key) > 90:
+                    if fuzz.ratio(candidate.company_key, existing.company_key) > 80:
+                        matches.add(existing_id)
+                        
+        # ההתאמה הראשונה לפי סדר הטעינה - כמו בסריקה המלאה
+        return self.dedup_index.first_in_order(matches)
         
     def merge_candidates(self, existing_id: str, new_candidate: EnrichedCandidate):
         """מיזוג מועמדים"""
-        existing = self.existing_candidates[existing_id]
+        existing = self.get_candidate(existing_id)
+        # התרומה לדוח מתעדכנת אחרי המיזוג (אם זו הגרסה שתישמר - מועמד חדש עם אותו ID גובר)
+        tracked = self.new_candidates_by_id.get(existing_id, existing) is existing
+        if tracked:
+            self.report_aggregator.remove(existing)
         
         # עדכון שדות ריקים
         if not existing.email and new_candidate.email:
             existing.email = new_candidate.email
+            existing.email_key = new_candidate.email_key
             
         if not existing.phone and new_candidate.phone:
             existing.phone = new_candidate.phone
@@ -274,6 +772,13 @@ class CandidateIntegrator:
         
         # עדכון תאריך
         existing.updated_at = datetime.now()
+        self.merged_ids.add(existing_id)
+        
+        # סנכרון האינדקס (ייתכן שנוסף email)
+        self.dedup_index.update(existing)
+        if tracked:
+            self.report_aggregator.add(existing)
+        self.log_change(existing)
         
         logger.info(f"Merged duplicate candidate: {existing.name}")
         
@@ -296,9 +801,7 @@ class CandidateIntegrator:
         # 5. חישוב ציון איכות נתונים
         candidate.data_quality_score = self.calculate_data_quality(candidate)
         
-        # 6. העשרה מ-APIs חיצוניים (אם זמין)
-        if candidate.github_url:
-            candidate = self.enrich_from_github(candidate)
+        # 6. העשרה מ-GitHub נעשית במרוכז לכל הריצה (enrich_github_profiles)
             
         candidate.enrichment_status = "completed"
         
@@ -309,21 +812,11 @@ class CandidateIntegrator:
         verified_skills = []
         skill_confidence = {}
         
+        # בדיקה מול רשימת כישורים מאומתים (מדויק ואז דמיון, עם מטמון)
         for skill in candidate.skills:
-            skill_lower = skill.lower()
-            
-            # בדיקה מול רשימת כישורים מאומתים
-            for category, skills_list in self.verified_skills.items():
-                if skill_lower in skills_list:
-                    verified_skills.append(skill)
-                    skill_confidence[skill] = 1.0
-                    break
-                else:
-                    # חיפוש דמיון
-                    match = process.extractOne(skill_lower, skills_list, scorer=fuzz.ratio)
-                    if match and match[1] > 80:
-                        verified_skills.append(match[0])
-                        skill_confidence[match[0]] = match[1] / 100.0
+            for canonical, confidence in self.skill_matcher.lookup(skill):
+                verified_skills.append(canonical)
+                skill_confidence[canonical] = confidence
                         
         # הוספת כישורים משלימים
         inferred_skills = self.infer_skills(candidate)
@@ -365,43 +858,16 @@ class CandidateIntegrator:
         
     def extract_seniority(self, title: Optional[str]) -> str:
         """חילוץ רמת בכירות מתפקיד"""
-        if not title:
-            return "unknown"
-            
-        title_lower = title.lower()
-        
-        if any(word in title_lower for word in ['cto', 'vp', 'vice president', 'chief']):
-            return "executive"
-        elif any(word in title_lower for word in ['director', 'head of']):
-            return "director"
-        elif any(word in title_lower for word in ['principal', 'staff', 'architect']):
-            return "principal"
-        elif any(word in title_lower for word in ['senior', 'lead']):
-            return "senior"
-        elif any(word in title_lower for word in ['junior', 'entry']):
-            return "junior"
-        else:
-            return "mid-level"
+        return INTEGRATION_SENIORITY(title)
             
-    def estimate_experience(self, candidate: EnrichedCandidate) -> int:
+    def estimate_experience(self, candidate: EnrichedCandidate, now: Optional[datetime] = None) -> int:
         """הערכת שנות ניסיון"""
         # בסיס על רמת בכירות
-        seniority_years = {
-            'executive': 15,
-            'director': 12,
-            'principal': 10,
-            'senior': 5,
-            'mid-level': 3,
-            'junior': 1,
-            'unknown': 0
-        }
+        base_years = SENIORITY_YEARS.get(candidate.seniority_level, 0)
         
-        base_years = seniority_years.get(candidate.seniority_level, 0)
-        
-        # התאמה לפי גיל החשבון ב-GitHub
-        if candidate.github_url:
-            # כאן אפשר להוסיף לוגיקה לחישוב גיל החשבון
-            pass
+        # התאמה לפי גיל החשבון ב-GitHub - לפחות כמו ותק החשבון
+        if candidate.github_created_at:
+            base_years = max(base_years, int(account_age_years(candidate.github_created_at, now)))
             
         return base_years
         
@@ -412,82 +878,287 @@ class CandidateIntegrator:
         # תגיות מיקום
         if candidate.location:
             location_lower = candidate.location.lower()
-            if any(city in location_lower for city in ['tel aviv', 'תל אביב']):
-                tags.append('tel-aviv-tech')
-            if 'israel' in location_lower or 'ישראל' in location_lower:
-                tags.append('israeli-talent')
+            for tag, words in LOCATION_TAGS:
+                if any(word in location_lower for word in words):
+                    tags.append(tag)
                 
         # תגיות טכנולוגיה
         for skill in candidate.verified_skills:
-            if skill in ['react', 'angular', 'vue']:
-                tags.append('frontend-specialist')
-            elif skill in ['python', 'django', 'flask']:
-                tags.append('python-developer')
-            elif skill in ['kubernetes', 'docker']:
-                tags.append('devops-engineer')
+            for tag, tag_skills in SKILL_TAGS:
+                if skill in tag_skills:
+                    tags.append(tag)
+                    break
                 
         # תגיות בכירות
-        if candidate.seniority_level in ['senior', 'principal', 'director']:
-            tags.append('experienced-hire')
+        if candidate.seniority_level in EXPERIENCED_LEVELS:
+            tags.append(EXPERIENCED_TAG)
             
         # תגיות מקור
         for source in candidate.sources:
-            if 'github' in source.lower():
-                tags.append('open-source-contributor')
-            elif 'linkedin' in source.lower():
-                tags.append('linkedin-active')
+            source_lower = source.lower()
+            for word, tag in SOURCE_TAGS:
+                if word in source_lower:
+                    tags.append(tag)
+                    break
                 
         return list(set(tags))
         
     def calculate_data_quality(self, candidate: EnrichedCandidate) -> float:
         """חישוב ציון איכות נתונים"""
         score = 0.0
-        total_fields = 10
-        
-        # שדות חובה
-        if candidate.name:
-            score += 1
-        if candidate.email:
-            score += 1
-        if candidate.phone:
-            score += 0.5
-        if candidate.location:
-            score += 0.5
-        if candidate.linkedin_url:
-            score += 1
-        if candidate.github_url:
-            score += 1
-        if candidate.current_title:
-            score += 1
-        if candidate.current_company:
-            score += 1
-        if len(candidate.verified_skills) > 0:
-            score += 1
-        if len(candidate.tags) > 0:
-            score += 1
-            
-        return score / total_fields
         
-    def enrich_from_github(self, candidate: EnrichedCandidate) -> EnrichedCandidate:
-        """העשרה מ-GitHub API"""
-        try:
-            # חילוץ username מ-URL
-            username = candidate.github_url.split('/')[-1]
+        # שדות שיש להם ערך, ורשימות לא ריקות (כישורים מאומתים, תגיות)
+        for field, weight in QUALITY_FIELDS:
+            if getattr(candidate, field):
+                score += weight
+        for field, weight in QUALITY_LISTS:
+            if len(getattr(candidate, field)) > 0:
+                score += weight
             
-            # כאן אפשר להוסיף קריאה ל-GitHub API
-            # לצורך הדגמה, נוסיף ערכים דמה
-            candidate.github_stars = np.random.randint(0, 1000)
+        return score / QUALITY_TOTAL
+        
+    def score_candidate(self, candidate: EnrichedCandidate, now: Optional[datetime] = None) -> EnrichedCandidate:
+        """בכירות, ניסיון, תגיות חכמות (תגיות קיימות נשמרות) ואיכות - ההגדרה לכל רשומה של score_frame"""
+        candidate.seniority_level = self.extract_seniority(candidate.current_title)
+        candidate.years_experience = self.estimate_experience(candidate, now)
+        candidate.tags = candidate.tags + [
+            tag for tag in self.generate_smart_tags(candidate) if tag not in candidate.tags
+        ]
+        candidate.data_quality_score = self.calculate_data_quality(candidate)
+        return candidate
+        
+    def enrich_github_profiles(self) -> Dict:
+        """העשרת GitHub מרוכזת ואסינכרונית לכל המועמדים שנוצרו או מוזגו בריצה"""
+        by_username: Dict[str, List[EnrichedCandidate]] = defaultdict(list)
+        for candidate in self.changed_candidates():
+            username = github_username(candidate.github_url)
+            if username:
+                by_username[username].append(candidate)
+        if not by_username:
+            return {}
             
-            # הוספת תג אם יש הרבה כוכבים
-            if candidate.github_stars > 100:
-                if 'github-influencer' not in candidate.tags:
-                    candidate.tags.append('github-influencer')
-                    
-        except Exception as e:
-            logger.error(f"Error enriching from GitHub: {e}")
+        enricher = GitHubEnricher(
+            cache_path=self.github_cache_file,
+            hourly_limit=GITHUB_HOURLY_LIMIT
+        )
+        profiles = enricher.enrich(by_username)
+        for username, profile in profiles.items():
+            for candidate in by_username[username]:
+                self.enrich_from_github(candidate, profile)
+                self.log_change(candidate)
+                
+        self.github_stats = enricher.stats()
+        return self.github_stats
+        
+    def enrich_from_github(self, candidate: EnrichedCandidate, profile: GitHubProfile) -> EnrichedCandidate:
+        """העשרה מנתוני GitHub API"""
+        candidate.github_stars = profile.stars
+        candidate.github_repos = profile.public_repos
+        candidate.github_created_at = profile.created_at
+        candidate.years_experience = self.estimate_experience(candidate)
+        
+        # הוספת תג אם יש הרבה כוכבים
+        if candidate.github_stars > 100:
+            if 'github-influencer' not in candidate.tags:
+                candidate.tags.append('github-influencer')
+                
+        return candidate
+        
+    @staticmethod
+    def paid_sources(candidate: EnrichedCandidate) -> Tuple[str, ...]:
+        """מקורות API בתשלום שהעשרה מחדש של המועמד תצרוך"""
+        return ('github',) if github_username(candidate.github_url) else ()
+        
+    def sync_reenrichment(self, changed: List[EnrichedCandidate]) -> None:
+        """עדכון תור ההעשרה מחדש במועמדים שנשמרים עכשיו (ובמחיקות)"""
+        for candidate_id in self.removed_ids:
+            self.reenrichment.remove(candidate_id)
+        for candidate in changed:
+            self.reenrichment.update(candidate, self.paid_sources(candidate))
             
+    def refresh_enrichment(self, candidate: EnrichedCandidate) -> EnrichedCandidate:
+        """העשרה מקומית מחדש - כמו enrich_candidate, אבל תגיות קיימות (גם ידניות) נשמרות"""
+        self.skill_matcher.prepare(candidate.skills)
+        previous_confidence = candidate.skill_confidence
+        candidate = self.enrich_skills(candidate)
+        # כישורים מוסקים שכבר נוספו בהעשרה הקודמת שומרים את רמת הביטחון שלהם
+        for skill, confidence in previous_confidence.items():
+            if skill in candidate.skills:
+                candidate.skill_confidence.setdefault(skill, confidence)
+        self.score_candidate(candidate)
+        candidate.enrichment_status = "completed"
         return candidate
         
+    def reenrich_stale(self, top_k: int = DEFAULT_TOP_K, budgets: Optional[Dict[str, int]] = None) -> Dict:
+        """מחזור העשרה מחדש: K הרשומות הדחופות בתקציב לכל מקור - רק מועמדים ששדה אצלם השתנה נכתבים"""
+        started = time.perf_counter()
+        budgets = dict(budgets or {})
+        enricher = None
+        if budgets.get('github'):
+            enricher = GitHubEnricher(cache_path=self.github_cache_file, hourly_limit=GITHUB_HOURLY_LIMIT)
+            # לא יותר ממה שנשאר במגבלה השעתית
+            budgets['github'] = min(budgets['github'], enricher.budget.remaining)
+        # מועמדים שהשתנו בריצה הנוכחית נכנסים לתור במפתח העדכני שלהם, אבל לא נבחרים -
+        # הם הועשרו זה עתה
+        self.sync_reenrichment(self.unsaved_changes())
+        fresh_ids = self.merged_ids | self.new_candidates_by_id.keys()
+        selected, stats = self.reenrichment.next_batch(top_k, budgets, exclude=fresh_ids)
+        
+        candidates = []
+        for candidate_id in selected:
+            candidate = self.new_candidates_by_id.get(candidate_id)
+            if candidate is None:
+                candidate = self.existing_candidates.get(candidate_id)
+            if candidate is not None:
+                candidates.append(candidate)
+        before = {candidate.id: self._field_snapshot(candidate) for candidate in candidates}
+        for candidate in candidates:
+            self.report_aggregator.remove(candidate)
+            self.refresh_enrichment(candidate)
+            
+        if enricher is not None:
+            by_username: Dict[str, List[EnrichedCandidate]] = defaultdict(list)
+            for candidate in candidates:
+                username = github_username(candidate.github_url)
+                if username:
+                    by_username[username].append(candidate)
+            profiles = enricher.enrich(by_username)
+            for username, profile in profiles.items():
+                for candidate in by_username[username]:
+                    self.enrich_from_github(candidate, profile)
+            stats['github'] = enricher.stats()
+            
+        now = datetime.now()
+        changed_fields: Dict[str, int] = defaultdict(int)
+        updated = 0
+        for candidate in candidates:
+            fields = self._changed_fields(before[candidate.id], candidate)
+            if fields:
+                candidate.updated_at = now
+                if candidate.id not in self.new_candidates_by_id:
+                    self.merged_ids.add(candidate.id)
+                self.log_change(candidate)
+                updated += 1
+                for field in fields:
+                    changed_fields[field] += 1
+            self.report_aggregator.add(candidate)
+            # גם מועמד שלא השתנה חוזר לסוף התור (נבדק עכשיו)
+            self.reenrichment.update(candidate, self.paid_sources(candidate), checked_at=now)
+            
+        stats.update({
+            'updated': updated,
+            'unchanged': len(candidates) - updated,
+            'changed_fields': dict(changed_fields),
+            'queue_size': len(self.reenrichment),
+            'seconds': round(time.perf_counter() - started, 3)
+        })
+        self.reenrichment_stats = stats
+        logger.info(f"Re-enriched {len(candidates)} stale candidates ({updated} updated, budget spent {stats['spent']})")
+        return stats
+        
+    def iter_current_records(self):
+        """הרשומות של המצב הנוכחי (dict) - מועמד חדש מחליף רשומה שמורה עם אותו ID"""
+        for record in self.existing_candidates.iter_store_records(self.candidate_to_record):
+            if isinstance(record, tuple):
+                entry, raw = record
+                if entry.id in self.new_candidates_by_id:
+                    continue
+                record = loads(raw)
+            elif record['id'] in self.new_candidates_by_id:
+                continue
+            yield record
+        for candidate in self.new_candidates:
+            if self.new_candidates_by_id.get(candidate.id) is candidate:
+                yield self.candidate_to_record(candidate)
+                
+    def rescore_database(self, batch_size: int = SCORING_BATCH_SIZE, verify: bool = False) -> Dict:
+        """ניקוד מחדש של כל המאגר במנות עמודתיות (candidate_scoring) - רק מועמדים שהשתנו נכתבים
+        
+        verify משווה כל שורה לפונקציות לכל רשומה (score_candidate) ומונה אי-התאמות.
+        """
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        stats = {'candidates': 0, 'updated': 0, 'batches': 0, 'scoring_seconds': 0.0}
+        if verify:
+            stats['mismatches'] = 0
+        changed_fields: Dict[str, int] = defaultdict(int)
+        
+        records = self.iter_current_records()
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            scoring_started = time.perf_counter()
+            scores = score_frame(records_frame(batch), now=now)
+            stats['scoring_seconds'] += time.perf_counter() - scoring_started
+            stats['candidates'] += len(batch)
+            stats['batches'] += 1
+            if verify:
+                stats['mismatches'] += self._verify_scores(batch, scores, now)
+                
+            for row in scores[scores['changed']].itertuples(index=False):
+                candidate = self.new_candidates_by_id.get(row.id)
+                if candidate is None:
+                    candidate = self.existing_candidates[row.id]
+                    self.merged_ids.add(row.id)
+                self.report_aggregator.remove(candidate)
+                for field, value in (('seniority_level', row.seniority_level),
+                                     ('years_experience', int(row.years_experience)),
+                                     ('data_quality_score', float(row.data_quality_score))):
+                    if getattr(candidate, field) != value:
+                        setattr(candidate, field, value)
+                        changed_fields[field] += 1
+                if row.added_tags:
+                    candidate.tags = candidate.tags + list(row.added_tags)
+                    changed_fields['tags'] += 1
+                self.report_aggregator.add(candidate)
+                self.log_change(candidate)
+                stats['updated'] += 1
+                
+        stats.update({
+            'changed_fields': dict(changed_fields),
+            'scoring_seconds': round(stats['scoring_seconds'], 3),
+            'seconds': round(time.perf_counter() - started, 3)
+        })
+        self.rescoring_stats = stats
+        logger.info(
+            f"Rescored {stats['candidates']} candidates in {stats['seconds']:.2f}s "
+            f"({stats['updated']} updated{', %d mismatches' % stats['mismatches'] if verify else ''})"
+        )
+        return stats
+        
+    def _verify_scores(self, batch: List[Dict], scores: pd.DataFrame, now: datetime) -> int:
+        """מספר השורות שבהן הניקוד העמודתי שונה מהפונקציות לכל רשומה"""
+        mismatches = 0
+        for record, row in zip(batch, scores.itertuples(index=False)):
+            reference = self.score_candidate(self.candidate_from_record(record), now)
+            tags = list(record['tags']) + list(row.added_tags)
+            if (reference.seniority_level, reference.years_experience, reference.data_quality_score,
+                    sorted(reference.tags)) != (row.seniority_level, row.years_experience,
+                                                row.data_quality_score, sorted(tags)):
+                mismatches += 1
+                if mismatches <= 10:
+                    logger.warning(f"Batch scoring mismatch for {record['id']}: {row} vs {reference}")
+        return mismatches
+        
+    @staticmethod
+    def _field_snapshot(candidate: EnrichedCandidate) -> Dict:
+        # עותק של רשימות ומילונים - ההעשרה משנה חלק מהן במקום
+        return candidate_fields(candidate)
+        
+    @staticmethod
+    def _changed_fields(before: Dict, candidate: EnrichedCandidate) -> List[str]:
+        """שדות שהערך שלהם השתנה (רשימות בלי תלות בסדר)"""
+        changed = []
+        for field, value in candidate_fields(candidate).items():
+            old = before.get(field)
+            if isinstance(value, list) and isinstance(old, list):
+                if sorted(map(str, value)) != sorted(map(str, old)):
+                    changed.append(field)
+            elif value != old:
+                changed.append(field)
+        return changed
+        
     def clean_name(self, name: str) -> str:
         """ניקוי שם"""
         if not name:
@@ -500,62 +1171,19 @@ class CandidateIntegrator:
         
     def normalize_email(self, email: str) -> Optional[str]:
         """נרמול כתובת מייל"""
-        if not email:
-            return None
-        email = email.lower().strip()
-        # בדיקת תקינות בסיסית
-        if '@' in email and '.' in email.split('@')[1]:
-            return email
-        return None
+        return normalize_email(email)
         
     def normalize_phone(self, phone: str) -> Optional[str]:
         """נרמול מספר טלפון"""
-        if not phone:
-            return None
-        try:
-            # ניסיון לפרסר כמספר ישראלי
-            parsed = phonenumbers.parse(phone, "IL")
-            if phonenumbers.is_valid_number(parsed):
-                return phonenumbers.format_number(
-                    parsed, 
-                    phonenumbers.PhoneNumberFormat.INTERNATIONAL
-                )
-        except:
-            pass
-        return None
+        return normalize_phone(phone)
         
     def normalize_location(self, location: str) -> Optional[str]:
         """נרמול מיקום"""
-        if not location:
-            return None
-            
-        # מיפוי שמות ערים
-        location_map = {
-            'tlv': 'Tel Aviv',
-            'jerusalem': 'Jerusalem',
-            'haifa': 'Haifa',
-            'תל אביב': 'Tel Aviv',
-            'ירושלים': 'Jerusalem',
-            'חיפה': 'Haifa'
-        }
-        
-        location_lower = location.lower().strip()
-        
-        for key, value in location_map.items():
-            if key in location_lower:
-                return value
-                
-        return location.title()
+        return normalize_location(location)
         
     def normalize_linkedin_url(self, url: str) -> str:
         """נרמול URL של LinkedIn"""
-        if not url:
-            return ""
-        # הסרת פרמטרים מיותרים
-        url = url.split('?')[0]
-        # הסרת / בסוף
-        url = url.rstrip('/')
-        return url.lower()
+        return normalize_linkedin_url(url)
         
     def extract_skills(self, row) -> List[str]:
         """חילוץ כישורים מ-row"""
@@ -578,54 +1206,133 @@ class CandidateIntegrator:
         
         return skills
         
+    @staticmethod
+    def candidate_to_record(candidate: EnrichedCandidate) -> Dict:
+        """המרת מועמד לרשומה לשמירה"""
+        if not isinstance(candidate, EnrichedCandidate):
+            # CompactCandidate / CandidateView
+            return candidate.to_record()
+        # עותק רדוד - הרשומה מקודדת מיד, אין צורך בהעתקה עמוקה של asdict
+        candidate_dict = dict(vars(candidate))
+        # המרת datetime לstring
+        candidate_dict['created_at'] = candidate.created_at.isoformat()
+        candidate_dict['updated_at'] = candidate.updated_at.isoformat()
+        return candidate_dict
+        
+    @staticmethod
+    def candidate_from_record(record: Dict) -> EnrichedCandidate:
+        """המרת רשומה שמורה למועמד"""
+        record = dict(record)
+        for field in ('created_at', 'updated_at'):
+            if isinstance(record.get(field), str):
+                record[field] = datetime.fromisoformat(record[field])
+        return EnrichedCandidate(**record)
+        
+    @staticmethod
+    def existing_from_record(record: Dict) -> CompactCandidate:
+        """מועמד קיים מהמאגר - רשומה קומפקטית (מחרוזות משותפות, רשימות כמזהים)
+        
+        מועמדים שנשלפים למיזוג או להעשרה מחדש נשארים בזיכרון עד השמירה.
+        """
+        return CompactCandidate.from_record(record)
+        
+    def changed_candidates(self) -> List[EnrichedCandidate]:
+        """מועמדים שנוצרו או מוזגו בריצה הנוכחית"""
+        merged = [
+            self.existing_candidates[candidate_id]
+            for candidate_id in self.merged_ids
+            if candidate_id in self.existing_candidates
+        ]
+        return merged + self.new_candidates
+        
+    def unsaved_changes(self) -> List[EnrichedCandidate]:
+        """מועמדים שהשתנו מאז השמירה או ה-checkpoint האחרונים"""
+        return [c for c in self.changed_candidates() if c.id in self.unsaved_ids]
+        
     def save_database(self):
-        """שמירת המאגר המעודכן"""
-        # איחוד מועמדים קיימים וחדשים
-        all_candidates = list(self.existing_candidates.values()) + self.new_candidates
-        
-        # המרה ל-dict לשמירה
-        data = []
-        for candidate in all_candidates:
-            candidate_dict = asdict(candidate)
-            # המרת datetime לstring
-            candidate_dict['created_at'] = candidate.created_at.isoformat()
-            candidate_dict['updated_at'] = candidate.updated_at.isoformat()
-            data.append(candidate_dict)
-            
-        # שמירה ל-JSON
-        output_file = f'candidates_master_database_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
-        logger.info(f"Saved {len(all_candidates)} candidates to {output_file}")
-        
-        # יצירת דוח סיכום
-        self.generate_report(all_candidates)
-        
-    def generate_report(self, all_candidates: List[EnrichedCandidate]):
-        """יצירת דוח סיכום"""
+        """שמירת המאגר המעודכן - רק רשומות חדשות ומוזגות נכתבות"""
+        total = len(self.existing_candidates) + len(self.new_candidates)
+        changed = self.unsaved_changes()
+        self.sync_reenrichment(changed)
+        
+        # מחיקות (איחוד אשכולות) נכתבות רק בדחיסה
+        if self.migrate_legacy or self.removed_ids or self.store.needs_compaction():
+            # דחיסה: המצב המלא כסגמנט בסיס אחד (רשומות שלא נשלפו מועתקות כמו שהן)
+            records = chain(
+                self.existing_candidates.iter_store_records(self.candidate_to_record),
+                (self.candidate_to_record(c) for c in self.new_candidates)
+            )
+            self.store.compact(records)
+            logger.info(f"Compacted database: {total} candidates in {self.store.path}")
+            self.migrate_legacy = False
+            self.removed_ids = set()
+        else:
+            self.store.commit(self.candidate_to_record(c) for c in changed)
+            logger.info(f"Saved {len(changed)} new/merged candidates ({total} total) to {self.store.path}")
+        
+        # שמירת אינדקס ה-LSH ומדדי הדוח ליד המאגר
+        self.name_lsh.save(self.lsh_index_file, self.store.manifest['generation'])
+        self.report_aggregator.save(self.report_state_file, self.store.manifest['generation'])
+        self.reenrichment.save(self.reenrichment_state_file, self.store.manifest['generation'])
+        # הקבצים נרשמים כנקלטו רק אחרי שהרשומות שלהם נשמרו
+        self.ingestion_ledger.save()
+        # הכול במאגר - היומן כבר לא נדרש לשחזור
+        self.unsaved_ids = set()
+        self._current_progress = None
+        if self.wal is not None:
+            self.wal.truncate()
+        
+        # יצירת דוח סיכום - מהמדדים שנצברו, בלי סריקה נוספת
+        self.generate_report()
+        
+    def export_dataset(self, path: str) -> int:
+        """ייצוא המאגר כולו ל-Parquet (רשימות כרשימות, חברה/מיקום כמילון) - מחזיר מספר רשומות"""
+        records = chain(
+            self.existing_candidates.iter_store_records(self.candidate_to_record),
+            (self.candidate_to_record(c) for c in self.new_candidates)
+        )
+        with ParquetWriter(path, schema=schema_for_dataclass(EnrichedCandidate)) as writer:
+            for record in records:
+                if isinstance(record, tuple):
+                    # שורה גולמית מהסגמנט (רשומה שלא נשלפה)
+                    record = json.loads(record[1])
+                writer.write(record)
+        logger.info(f"Exported {writer.count} candidates to {path}")
+        return writer.count
+        
+    def generate_report(self, partial: bool = False):
+        """יצירת דוח סיכום (או דוח ביניים במהלך ריצה ארוכה)"""
+        metrics = self.report_aggregator.metrics()
         report = {
             'summary': {
-                'total_candidates': len(all_candidates),
+                'total_candidates': self.report_aggregator.total,
                 'new_candidates': len(self.new_candidates),
                 'duplicates_found': self.duplicates_found,
                 'enriched_candidates': self.enriched_count
             },
-            'quality_metrics': {
-                'avg_data_quality': np.mean([c.data_quality_score for c in all_candidates]),
-                'high_quality_candidates': sum(1 for c in all_candidates if c.data_quality_score > 0.8),
-                'verified_skills_coverage': sum(1 for c in all_candidates if len(c.verified_skills) > 0) / len(all_candidates)
-            },
-            'skill_distribution': self.analyze_skills(all_candidates),
-            'seniority_distribution': self.analyze_seniority(all_candidates),
-            'source_distribution': self.analyze_sources(all_candidates),
-            'location_distribution': self.analyze_locations(all_candidates)
+            **metrics,
+            'ingestion': self.ingestion_stats,
+            'ingestion_ledger': self.ingestion_ledger.summary(),
+            'normalization_cache': cache_stats(),
+            'resolution': self.resolution_stats,
+            'github_enrichment': self.github_stats,
+            'reenrichment': self.reenrichment_stats,
+            'rescoring': self.rescoring_stats,
+            'write_ahead_log': {'recovery': self.wal_recovery, **self.wal.stats()} if self.wal is not None else None
         }
         
+        if partial:
+            # דוח ביניים נדרס בכל עדכון
+            report['partial'] = True
+            report['rows_processed'] = self.rows_processed
+            self._rows_at_last_report = self.rows_processed
+            dump(report, 'integration_report_partial.json', pretty=True)
+            logger.info(f"Partial report after {self.rows_processed} rows: {report['summary']['total_candidates']} candidates")
+            return
+        
         # שמירת הדוח
         report_file = f'integration_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        dump(report, report_file, pretty=True)
             
         # הדפסת סיכום
         logger.info("\n" + "="*50)
@@ -635,80 +1342,140 @@ class CandidateIntegrator:
         logger.info(f"New candidates added: {report['summary']['new_candidates']}")
         logger.info(f"Duplicates merged: {report['summary']['duplicates_found']}")
         logger.info(f"Candidates enriched: {report['summary']['enriched_candidates']}")
+        ledger = report['ingestion_ledger']
+        logger.info(
+            f"Files: {ledger['files_processed']} processed, {ledger['files_resumed']} resumed, "
+            f"{ledger['files_skipped']} skipped (unchanged)"
+        )
         logger.info(f"Average data quality: {report['quality_metrics']['avg_data_quality']:.2%}")
         logger.info("="*50)
-        
-    def analyze_skills(self, candidates: List[EnrichedCandidate]) -> Dict:
-        """ניתוח התפלגות כישורים"""
-        skill_count = defaultdict(int)
-        
-        for candidate in candidates:
-            for skill in candidate.verified_skills:
-                skill_count[skill] += 1
-                
-        # Top 20 skills
-        top_skills = sorted(skill_count.items(), key=lambda x: x[1], reverse=True)[:20]
-        
-        return {
-            'top_skills': dict(top_skills),
-            'total_unique_skills': len(skill_count)
-        }
-        
-    def analyze_seniority(self, candidates: List[EnrichedCandidate]) -> Dict:
-        """ניתוח התפלגות בכירות"""
-        seniority_count = defaultdict(int)
-        
-        for candidate in candidates:
-            seniority_count[candidate.seniority_level] += 1
+
+# מצב מקבילי - פונקציות worker ברמת המודול (נדרש ל-pickle)
+_PARSE_WORKER: Optional[CandidateIntegrator] = None
+
+def _init_parse_worker():
+    """אתחול worker לפרסור - בלי טעינת מאגר"""
+    global _PARSE_WORKER
+    _PARSE_WORKER = CandidateIntegrator(load_database=False)
+    
+def _iter_parse_tasks(plans: List[IngestionPlan], chunk_size: int):
+    """משימות פרסור: (קובץ, מספר סידורי ראשון, רשומות) לפי הסדר הסדרתי"""
+    seq = 0
+    for plan in plans:
+        file_path = plan.path
+        logger.info(f"Processing file: {file_path}")
+        try:
+            chunks = iter_record_chunks(file_path, chunk_size, offset=plan.offset,
+                                        skip=plan.skip_rows + plan.recovered_rows)
+        except ValueError:
+            logger.error(f"Unsupported file format: {file_path}")
+            continue
+        for records in chunks:
+            yield file_path, seq, records
+            seq += len(records)
             
-        return dict(seniority_count)
-        
-    def analyze_sources(self, candidates: List[EnrichedCandidate]) -> Dict:
-        """ניתוח מקורות"""
-        source_count = defaultdict(int)
-        
-        for candidate in candidates:
-            for source in candidate.sources:
-                source_count[source] += 1
-                
-        return dict(source_count)
-        
-    def analyze_locations(self, candidates: List[EnrichedCandidate]) -> Dict:
-        """ניתוח מיקומים"""
-        location_count = defaultdict(int)
-        
-        for candidate in candidates:
-            if candidate.location:
-                location_count[candidate.location] += 1
-                
-        # Top 10 locations
-        top_locations = sorted(location_count.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        return dict(top_locations)
+def _parse_records(task):
+    """פרסור מנת רשומות + חישוב חתימת LSH ומפתחות זהות (החתימה עוברת לשארד)"""
+    file_path, start_seq, records = task
+    results = []
+    lsh = _PARSE_WORKER.name_lsh
+    for offset, record in enumerate(records):
+        candidate = _PARSE_WORKER.parse_candidate(record)
+        if candidate:
+            signature = lsh.signature(candidate.name, candidate.current_company)
+            results.append((start_seq + offset, candidate, signature,
+                            _PARSE_WORKER.identity_keys(candidate, signature)))
+    return file_path, len(records), results
+    
+def _integrate_shard(shard):
+    """דה-דופליקציה והעשרה של שארד לפי הסדר הסדרתי"""
+    existing, new_records, existing_signatures = shard
+    integrator = CandidateIntegrator(load_database=False)
+    integrator.existing_candidates = LazyCandidateMap.from_export(existing, CandidateIntegrator.existing_from_record)
+    for entry in integrator.existing_candidates.key_entries():
+        integrator.dedup_index.add(entry)
+    for candidate_id, (fingerprint, signature) in existing_signatures.items():
+        integrator.name_lsh.put(candidate_id, signature, fingerprint)
+    integrator.name_lsh.sync(integrator.existing_candidates.key_entries())
+    integrator.skill_matcher.prepare(skill for _, c, _ in new_records for skill in c.skills)
+    
+    new_with_seq = []
+    for seq, candidate, signature in new_records:
+        before = len(integrator.new_candidates)
+        integrator.process_candidate(candidate, signature)
+        if len(integrator.new_candidates) > before:
+            new_with_seq.append((seq, integrator.new_candidates[-1]))
+            
+    merged = [integrator.existing_candidates[cid] for cid in integrator.merged_ids
+              if cid in integrator.existing_candidates]
+    signatures = {
+        candidate.id: (integrator.name_lsh.get_fingerprint(candidate.id), integrator.name_lsh.get_signature(candidate.id))
+        for _, candidate in new_with_seq
+        if candidate.id in integrator.name_lsh
+    }
+    return (merged, integrator.merged_ids, new_with_seq, signatures,
+            integrator.duplicates_found, integrator.enriched_count)
 
 def main():
     """פונקציה ראשית"""
-    integrator = CandidateIntegrator()
+    integrator = CandidateIntegrator(
+        partial_report_rows=int(os.getenv("INTEGRATION_PARTIAL_REPORT_ROWS", "0")),
+        wal_checkpoint_ops=int(os.getenv("INTEGRATION_WAL_CHECKPOINT_OPS", str(DEFAULT_CHECKPOINT_OPS)))
+    )
     
     # רשימת קבצים לעיבוד
     files_to_process = [
         'candidates_multi_platform_*.csv',
+        'candidates_multi_platform_*.parquet',
         'candidates_discord_*.csv',
         'imported_candidates_*.csv',
         'frontend_candidates.csv',
         'kubernetes_engineers.csv'
     ]
     
-    # עיבוד כל הקבצים
+    # איסוף כל הקבצים לפי הסדר
     import glob
-    for pattern in files_to_process:
-        for file_path in glob.glob(pattern):
-            if os.path.exists(file_path):
-                integrator.process_candidates_file(file_path)
+    file_paths = [
+        file_path
+        for pattern in files_to_process
+        for file_path in glob.glob(pattern)
+        if os.path.exists(file_path)
+    ]
+    
+    # עיבוד כל הקבצים (INTEGRATION_WORKERS > 1 מפעיל מצב מקבילי)
+    workers = int(os.getenv("INTEGRATION_WORKERS", "1"))
+    integrator.integrate_files(file_paths, workers=workers)
+    
+    # איחוד כפילויות טרנזיטיבי (INTEGRATION_RESOLVE=1)
+    if os.getenv("INTEGRATION_RESOLVE", "0") == "1":
+        integrator.resolve_duplicates(partitions=int(os.getenv("INTEGRATION_RESOLVE_PARTITIONS", "1")))
+        
+    # העשרת GitHub מרוכזת (GITHUB_ENRICHMENT=0 מכבה)
+    if os.getenv("GITHUB_ENRICHMENT", "1") == "1":
+        integrator.enrich_github_profiles()
+        
+    # העשרה מחדש של הרשומות הכי מיושנות ושוות (REENRICH_TOP_K=0 מכבה)
+    reenrich_top_k = int(os.getenv("REENRICH_TOP_K", str(DEFAULT_TOP_K)))
+    if reenrich_top_k > 0:
+        budgets = {}
+        if os.getenv("GITHUB_ENRICHMENT", "1") == "1":
+            budgets['github'] = int(os.getenv("REENRICH_GITHUB_BUDGET", "200"))
+        integrator.reenrich_stale(reenrich_top_k, budgets)
+        
+    # ניקוד מחדש עמודתי של כל המאגר (INTEGRATION_RESCORE=1, INTEGRATION_RESCORE_VERIFY=1 משווה לכל רשומה)
+    if os.getenv("INTEGRATION_RESCORE", "0") == "1":
+        integrator.rescore_database(
+            batch_size=int(os.getenv("INTEGRATION_RESCORE_BATCH", str(SCORING_BATCH_SIZE))),
+            verify=os.getenv("INTEGRATION_RESCORE_VERIFY", "0") == "1"
+        )
                 
     # שמירת המאגר המאוחד
     integrator.save_database()
     
+    # ייצוא עמודתי של כל המאגר (OUTPUT_FORMATS כולל parquet)
+    if 'parquet' in output_formats():
+        integrator.export_dataset('candidates_master_database.parquet')
+    
     logger.info("\n✅ Integration completed successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Integration Pipeline Benchmark
+בנצ'מרק לצינור האינטגרציה - קבצי מועמדים סינתטיים (עם seed) בגדלים 10k/100k/1M
+וכפילויות מבוקרות, הרצה מלאה parse → dedup → enrich → save ומדידת זמן לכל שלב,
+rows/s, שיא זיכרון ו-precision/recall של זיהוי הכפילויות מול האמת הידועה
+"""
+
+import csv
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from candidate_stream import peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+DEFAULT_SEED = 42
+# חלק השורות שהן כפילות של ישות שכבר הופיעה
+DEFAULT_DUPLICATE_RATE = 0.3
+# התפלגות סוגי הכפילויות
+DEFAULT_VARIANTS = {
+    'exact_email': 0.4,   # אותו email, שאר השדות משתנים
+    'url_variant': 0.35,  # בלי email, וריאציה של URL ה-LinkedIn
+    'name_typo': 0.25     # בלי email/LinkedIn, שגיאת הקלדה בשם ואותה חברה
+}
+
+STAGES = ('read', 'parse', 'dedup', 'merge', 'enrich', 'index', 'save')
+
+FIRST_NAMES = [
+    "Daniel", "David", "Michael", "Yossi", "Avi", "Ron", "Tal", "Guy", "Amit", "Oren",
+    "Sarah", "Maya", "Noa", "Shira", "Liora", "Tamar", "Yael", "Dana", "Michal", "Inbal",
+    "Alex", "Max", "Ben", "Tom", "Eli", "Gal", "Nir", "Ido", "Itai", "Eran"
+]
+_SURNAME_PARTS = (
+    ["Co", "Le", "Mi", "Pe", "Bi", "Da", "Fri", "Ka", "Gol", "Sha", "Wei", "Ro", "Schw", "Kle", "Hof",
+     "Ben", "Az", "Ash", "Bar", "Ya"],
+    ["hen", "vi", "zra", "ret", "ton", "han", "ed", "tz", "dbe", "pi", "ss", "sen", "ar", "in", "fm",
+     "ul", "ke", "ron", "ak", "ir"],
+    ["", "", "i", "man", "berg", "ov", "el", "ay", "son", "ski"]
+)
+COMPANIES = [
+    "Wix", "Monday.com", "Fiverr", "Gong", "Snyk", "Wiz", "Taboola", "Outbrain", "SimilarWeb",
+    "IronSource", "Payoneer", "Lemonade", "OrCam", "Mobileye", "Check Point", "CyberArk", "Imperva"
+]
+# שמות סטארטאפים שונים זה מזה (חסימת החברה היא לפי תחילית - "Startup N" היה בלוק אחד)
+_COMPANY_PARTS = (
+    ["Nex", "Vol", "Quan", "Lumi", "Tera", "Arb", "Cyt", "Orb", "Zen", "Pix", "Hel", "Kin", "Mav",
+     "Ryt", "Sol", "Tov", "Umb", "Vey", "Wav", "Yam"],
+    ["ora", "tix", "ify", "ex", "io", "ara", "on", "ly", "era", "ix"],
+    ["", " Labs", " AI", " Security", " Data"]
+)
+TITLES = [
+    "Senior Backend Engineer", "Principal Engineer", "Staff Engineer", "DevOps Engineer",
+    "Frontend Tech Lead", "Full Stack Developer", "Software Engineer", "Data Engineer",
+    "Junior Developer", "VP R&D", "Head of Engineering", "Team Lead"
+]
+SKILLS = [
+    "python", "javascript", "typescript", "react", "node.js", "go", "java", "kubernetes", "docker",
+    "aws", "gcp", "postgresql", "mongodb", "redis", "kafka", "terraform", "django", "vue",
+    "reactjs", "pyhton", "k8s", "nodejs"
+]
+LOCATIONS = ["Tel Aviv", "tlv", "Haifa", "Jerusalem", "Herzliya", "Remote", "תל אביב", ""]
+SOURCES = ["linkedin", "github", "discord", "stackoverflow", "meetup"]
+
+FIELDNAMES = ['entity_id', 'name', 'email', 'linkedin_url', 'github_url', 'title', 'company',
+              'skills', 'source', 'location', 'phone']
+
+
+def _typo(rng: random.Random, name: str) -> str:
+    """שגיאת הקלדה אחת: החלפת אותיות סמוכות, השמטה או הכפלה"""
+    first, _, last = name.partition(' ')
+    in_last = len(last) > 3
+    word = last if in_last else first
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        typo = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    elif kind == 1:
+        typo = word[:i] + word[i + 1:]
+    else:
+        typo = word[:i] + word[i] + word[i:]
+    return f"{first} {typo}" if in_last else f"{typo} {last}"
+
+
+def _linkedin_variant(rng: random.Random, url: str) -> str:
+    """אותו פרופיל LinkedIn בכתיבה אחרת (סלאש, פרמטרי מעקב, אותיות גדולות)"""
+    kind = rng.randrange(3)
+    if kind == 0:
+        return url + '/'
+    if kind == 1:
+        return url + rng.choice(['?trk=public_profile', '?originalSubdomain=il'])
+    prefix, _, slug = url.rpartition('/')
+    return f"{prefix}/{slug.capitalize()}"
+
+
+def generate_dataset(path: str, rows: int, seed: int = DEFAULT_SEED,
+                     duplicate_rate: float = DEFAULT_DUPLICATE_RATE,
+                     variants: Optional[Dict[str, float]] = None) -> Dict:
+    """קובץ CSV סינתטי בפורמט candidates_multi_platform עם עמודת entity_id (האמת הידועה)"""
+    rng = random.Random(seed)
+    variants = variants or DEFAULT_VARIANTS
+    variant_names = list(variants)
+    variant_weights = [variants[name] for name in variant_names]
+    surnames = [a + b + c for a in _SURNAME_PARTS[0] for b in _SURNAME_PARTS[1] for c in _SURNAME_PARTS[2]]
+    companies = COMPANIES + [a + b + c for a in _COMPANY_PARTS[0] for b in _COMPANY_PARTS[1] for c in _COMPANY_PARTS[2]]
+
+    entities: List[Dict] = []
+    counts: Counter = Counter()
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for _ in range(rows):
+            row = {
+                'title': rng.choice(TITLES),
+                'skills': ','.join(rng.sample(SKILLS, rng.randint(2, 6))),
+                'source': rng.choice(SOURCES),
+                'location': rng.choice(LOCATIONS),
+                'github_url': '',
+                'phone': ''
+            }
+            if entities and rng.random() < duplicate_rate:
+                entity = rng.choice(entities)
+                variant = rng.choices(variant_names, variant_weights)[0]
+                row.update(entity_id=entity['id'], name=entity['name'], company=entity['company'],
+                           email='', linkedin_url='')
+                if variant == 'exact_email' and entity['email']:
+                    row['email'] = entity['email'].upper() if rng.random() < 0.2 else entity['email']
+                elif variant == 'url_variant' and entity['linkedin_url']:
+                    row['linkedin_url'] = _linkedin_variant(rng, entity['linkedin_url'])
+                else:
+                    variant = 'name_typo'
+                    row['name'] = _typo(rng, entity['name'])
+                counts[variant] += 1
+            else:
+                number = len(entities)
+                first, last = rng.choice(FIRST_NAMES), rng.choice(surnames)
+                entity = {
+                    'id': f"e{number}",
+                    'name': f"{first} {last}",
+                    'company': rng.choice(companies),
+                    'email': f"{first}.{last}{number}@example.com".lower() if rng.random() < 0.7 else '',
+                    'linkedin_url': f"https://linkedin.com/in/{first}{last}{number}".lower() if rng.random() < 0.6 else ''
+                }
+                entities.append(entity)
+                row.update(entity_id=entity['id'], name=entity['name'], company=entity['company'],
+                           email=entity['email'], linkedin_url=entity['linkedin_url'])
+                if rng.random() < 0.3:
+                    row['github_url'] = f"https://github.com/{first}{last}{number}".lower()
+                counts['unique'] += 1
+            writer.writerow(row)
+
+    return {
+        'rows': rows,
+        'entities': len(entities),
+        'seed': seed,
+        'duplicate_rate': duplicate_rate,
+        'row_kinds': dict(counts)
+    }
+
+
+def pair_metrics(predicted: Sequence[str], truth: Sequence[str]) -> Dict:
+    """precision/recall על זוגות שורות: זוג חיובי = שתי שורות שמוזגו לאותו מועמד"""
+    def pairs(counts) -> int:
+        return sum(n * (n - 1) // 2 for n in counts)
+
+    predicted_pairs = pairs(Counter(predicted).values())
+    true_pairs = pairs(Counter(truth).values())
+    correct_pairs = pairs(Counter(zip(predicted, truth)).values())
+    precision = correct_pairs / predicted_pairs if predicted_pairs else 1.0
+    recall = correct_pairs / true_pairs if true_pairs else 1.0
+    return {
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+        'f1': round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        'true_pairs': true_pairs,
+        'predicted_pairs': predicted_pairs,
+        'correct_pairs': correct_pairs
+    }
+
+
+def _load_integrator_class():
+    """טעינת CandidateIntegrator מסקריפט האינטגרציה (שם הקובץ מכיל מקפים)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'integrate-candidates-to-database.py')
+    spec = importlib.util.spec_from_file_location('integrate_candidates_to_database', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module.CandidateIntegrator
+
+
+def _timed_integrator(base):
+    """תת-מחלקה שמודדת זמן לכל שלב ורושמת לאיזה מועמד כל שורה הגיעה"""
+
+    class TimedIntegrator(base):
+        def __init__(self, *args, **kwargs):
+            self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+            self.row_entities: List[str] = []
+            self.row_assignments: List[str] = []
+            super().__init__(*args, **kwargs)
+
+        def _timed(self, stage: str, func, *args):
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.stage_seconds[stage] += time.perf_counter() - started
+
+        def parse_candidate(self, row):
+            candidate = self._timed('parse', super().parse_candidate, row)
+            if candidate is not None:
+                self.row_entities.append(row.get('entity_id'))
+            return candidate
+
+        def process_candidate(self, candidate, signature=None):
+            started = time.perf_counter()
+            inner = self.stage_seconds['dedup'] + self.stage_seconds['merge'] + self.stage_seconds['enrich']
+            super().process_candidate(candidate, signature)
+            inner = self.stage_seconds['dedup'] + self.stage_seconds['merge'] + self.stage_seconds['enrich'] - inner
+            # עדכון האינדקסים אחרי מועמד חדש
+            self.stage_seconds['index'] += time.perf_counter() - started - inner
+
+        def find_duplicate(self, candidate, signature=None):
+            duplicate_id = self._timed('dedup', super().find_duplicate, candidate, signature)
+            self.row_assignments.append(duplicate_id or candidate.id)
+            return duplicate_id
+
+        def merge_candidates(self, existing_id, new_candidate):
+            return self._timed('merge', super().merge_candidates, existing_id, new_candidate)
+
+        def enrich_candidate(self, candidate):
+            return self._timed('enrich', super().enrich_candidate, candidate)
+
+        def save_database(self):
+            return self._timed('save', super().save_database)
+
+    return TimedIntegrator
+
+
+def run_benchmark(rows: int, seed: int = DEFAULT_SEED, duplicate_rate: float = DEFAULT_DUPLICATE_RATE,
+                  work_dir: Optional[str] = None) -> Dict:
+    """ריצה אחת מקצה לקצה על מאגר ריק (עדיף בתהליך נפרד - שיא ה-RSS הוא של התהליך)"""
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='integration_benchmark_')
+    previous_cwd = os.getcwd()
+    try:
+        os.chdir(work_dir)
+        data_file = f'candidates_multi_platform_benchmark_{rows}.csv'
+        started = time.perf_counter()
+        dataset = generate_dataset(data_file, rows, seed, duplicate_rate)
+        generate_seconds = time.perf_counter() - started
+
+        TimedIntegrator = _timed_integrator(_load_integrator_class())
+        # שקט בזמן המדידה - הלוג של כל מיזוג עולה יותר מהמיזוג עצמו
+        root_level = logging.getLogger().level
+        logging.getLogger().setLevel(logging.WARNING)
+        try:
+            integrator = TimedIntegrator()
+            started = time.perf_counter()
+            integrator.integrate_files([data_file])
+            ingest_seconds = time.perf_counter() - started
+            rss_after_ingest = peak_rss_mb()
+            integrator.save_database()
+        finally:
+            logging.getLogger().setLevel(root_level)
+
+        stages = integrator.stage_seconds
+        stages['read'] = max(0.0, ingest_seconds - sum(stages[s] for s in STAGES if s not in ('read', 'save')))
+        total_seconds = ingest_seconds + stages['save']
+        return {
+            'rows': rows,
+            'dataset': dataset,
+            'generate_seconds': round(generate_seconds, 3),
+            'stages': {
+                stage: {
+                    'seconds': round(seconds, 3),
+                    'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None
+                }
+                for stage, seconds in stages.items()
+            },
+            'total_seconds': round(total_seconds, 3),
+            'rows_per_second': round(rows / total_seconds, 1) if total_seconds > 0 else None,
+            'peak_rss_mb': {
+                'after_ingest': round(rss_after_ingest, 1),
+                'after_save': round(peak_rss_mb(), 1)
+            },
+            'candidates_stored': integrator.report_aggregator.total,
+            'duplicates_found': integrator.duplicates_found,
+            'dedup': pair_metrics(integrator.row_assignments, integrator.row_entities)
+        }
+    finally:
+        os.chdir(previous_cwd)
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_suite(sizes: Sequence[int] = DEFAULT_SIZES, seed: int = DEFAULT_SEED,
+              duplicate_rate: float = DEFAULT_DUPLICATE_RATE) -> Dict:
+    """כל הגדלים, כל אחד בתהליך חדש כדי ששיא הזיכרון יימדד בנפרד"""
+    results = []
+    for rows in sizes:
+        logger.info(f"Benchmarking {rows} rows...")
+        with multiprocessing.Pool(1) as pool:
+            result = pool.apply(run_benchmark, (rows, seed, duplicate_rate))
+        logger.info(
+            f"{rows} rows: {result['total_seconds']:.1f}s ({result['rows_per_second']:.0f} rows/s), "
+            f"peak RSS {result['peak_rss_mb']['after_save']:.0f} MB, "
+            f"precision {result['dedup']['precision']:.3f}, recall {result['dedup']['recall']:.3f}"
+        )
+        results.append(result)
+    return {
+        'benchmark': 'integration_pipeline',
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'duplicate_rate': duplicate_rate,
+        'results': results
+    }
+
+
+def main():
+    """python integration_benchmark.py [גדלים מופרדים בפסיק] [seed]"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else list(DEFAULT_SIZES)
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SEED
+    result = run_suite(sizes, seed)
+
+    output_file = f'integration_benchmark_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    logger.info(f"Benchmark saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@ Multi-Platform Smart Scraper for MeUnique
 
 import asyncio
 import aiohttp
-import json
 import os
 import sys
 from datetime import datetime, timedelta
@@ -18,14 +17,15 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import pandas as pd
 from tqdm import tqdm
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import re
 from collections import defaultdict
 import time
 
+from serialization import write_records
+
 # הגדרת לוגינג
 logging.basicConfig(
     level=logging.INFO,
@@ -621,26 +621,10 @@ class MultiPlatformScraper:
         """שמירת התוצאות"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # המרה ל-DataFrame
-        df_data = []
-        for candidate in self.candidates.values():
-            row = asdict(candidate)
-            row['skills'] = ', '.join(row['skills'])
-            row['sources'] = ', '.join(row['sources'])
-            df_data.append(row)
-        
-        df = pd.DataFrame(df_data)
-        
-        # שמירה ל-CSV
-        csv_file = f'candidates_multi_platform_{timestamp}.csv'
-        df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-        logger.info(f"💾 Saved {len(df)} candidates to {csv_file}")
-        
-        # שמירה ל-JSON
-        json_file = f'candidates_multi_platform_{timestamp}.json'
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump([asdict(c) for c in self.candidates.values()], f, ensure_ascii=False, indent=2)
-        logger.info(f"💾 Saved candidates to {json_file}")
+        # CSV ו-JSON במעבר אחד (OUTPUT_FORMATS=csv מדלג על העותק הכפול)
+        saved = write_records(f'candidates_multi_platform_{timestamp}', self.candidates.values())
+        for output_file in saved.values():
+            logger.info(f"💾 Saved {len(self.candidates)} candidates to {output_file}")
         
         # סטטיסטיקות
         self.print_statistics()
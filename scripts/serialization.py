@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Fast Serialization
+סריאליזציה משותפת לכל קבצי הפלט - JSON קומפקטי ומהיר (orjson אם מותקן), תמיכה
+ישירה ב-datetime ו-dataclass בלי העתקה עמוקה של asdict, וכותבים זורמים ל-JSON ו-CSV
+שכותבים כל רשומה ברגע שהיא מוכנה
+"""
+
+import csv
+import dataclasses
+import json
+import logging
+import os
+from datetime import date, datetime
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+# פורמטי הפלט לקבצים שנכתבים גם כ-JSON וגם כ-CSV (למשל OUTPUT_FORMATS=json,
+# או OUTPUT_FORMATS=parquet לפורמט העמודתי של arrow_io)
+OUTPUT_FORMATS_ENV = "OUTPUT_FORMATS"
+DEFAULT_OUTPUT_FORMATS = ("json", "csv")
+CSV_LIST_SEPARATOR = ", "
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    _ORJSON_PRETTY = _ORJSON_OPTIONS | orjson.OPT_INDENT_2
+
+
+def to_serializable(value):
+    """המרה לערך JSON רגיל עבור טיפוסים שהמקודד לא מכיר"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        # רדוד - שדות מקוננים מומרים בקריאה הבאה של המקודד
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, 'item'):
+        # סקלר של numpy
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj, pretty: bool = False) -> bytes:
+    """קידוד JSON ל-bytes ב-UTF-8 (קומפקטי, או בהזחה של 2 לדוחות שנקראים ע"י אנשים)"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=to_serializable, option=_ORJSON_PRETTY if pretty else _ORJSON_OPTIONS)
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=2, default=to_serializable)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=to_serializable)
+    return text.encode('utf-8')
+
+
+def loads(data):
+    """פענוח JSON (bytes או str) - orjson אם מותקן"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(obj, path: str, pretty: bool = False) -> str:
+    """כתיבת JSON לקובץ (דרך קובץ זמני - קובץ חלקי לא מחליף קובץ קיים)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(obj, pretty))
+    os.replace(tmp_path, path)
+    return path
+
+
+def output_formats() -> Set[str]:
+    """הפורמטים שמופעלים לפלט כפול (ברירת מחדל: JSON ו-CSV)"""
+    value = os.getenv(OUTPUT_FORMATS_ENV)
+    if not value:
+        return set(DEFAULT_OUTPUT_FORMATS)
+    return {fmt.strip().lower() for fmt in value.split(',') if fmt.strip()}
+
+
+class JsonArrayWriter:
+    """כתיבה זורמת של מערך JSON - רשומה אחרי רשומה, בלי לבנות רשימה בזיכרון"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(b'[')
+
+    def write(self, record) -> None:
+        self._file.write(b'\n' if self.count == 0 else b',\n')
+        self._file.write(dumps(record))
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.write(b'\n]\n' if self.count else b']\n')
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> 'JsonArrayWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return CSV_LIST_SEPARATOR.join(str(item) for item in value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict) or dataclasses.is_dataclass(value):
+        return dumps(value).decode('utf-8')
+    return value
+
+
+def _record_fields(record) -> Dict:
+    if dataclasses.is_dataclass(record):
+        return {field.name: getattr(record, field.name) for field in dataclasses.fields(record)}
+    return record
+
+
+class CsvWriter:
+    """כתיבה זורמת של CSV - העמודות לפי הרשומה הראשונה, רשימות מחוברות בפסיקים"""
+
+    def __init__(self, path: str, fieldnames: Optional[Sequence[str]] = None, encoding: str = 'utf-8-sig'):
+        self.path = path
+        self.fieldnames: Optional[List[str]] = list(fieldnames) if fieldnames else None
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, 'w', encoding=encoding, newline='')
+        self._writer = None
+
+    def write(self, record) -> None:
+        row = _record_fields(record)
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = list(row)
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerow({key: _csv_value(row.get(key)) for key in self.fieldnames})
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if self._writer is None and self.fieldnames:
+            csv.DictWriter(self._file, fieldnames=self.fieldnames).writeheader()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> 'CsvWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_records(base_path: str, records: Iterable, formats: Optional[Set[str]] = None,
+                  csv_encoding: str = 'utf-8-sig') -> Dict[str, str]:
+    """כתיבת רשומות לכל הפורמטים המופעלים במעבר יחיד ({פורמט: נתיב})
+
+    base_path בלי סיומת; הפורמטים מ-OUTPUT_FORMATS אם לא הועברו במפורש.
+    """
+    formats = output_formats() if formats is None else formats
+    writers = {}
+    if 'json' in formats:
+        writers['json'] = JsonArrayWriter(f"{base_path}.json")
+    if 'csv' in formats:
+        writers['csv'] = CsvWriter(f"{base_path}.csv", encoding=csv_encoding)
+    if 'parquet' in formats:
+        # ייבוא מאוחר - pyarrow נדרש רק כשהפורמט מופעל
+        from arrow_io import ParquetWriter
+        writers['parquet'] = ParquetWriter(f"{base_path}.parquet")
+    if not writers:
+        logger.warning(f"No output formats enabled ({OUTPUT_FORMATS_ENV}), nothing written for {base_path}")
+        return {}
+
+    try:
+        for record in records:
+            for writer in writers.values():
+                writer.write(record)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    for writer in writers.values():
+        writer.close()
+    # Parquet בלי רשומות לא נוצר (אין ממה לגזור סכמה)
+    return {fmt: writer.path for fmt, writer in writers.items() if os.path.exists(writer.path)}
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Compiled Skill Matcher
+מאמת כישורים מקומפל - חיפוש hash מדויק, fuzzy וקטורי במנות ו-memoization
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    from rapidfuzz import fuzz as rf_fuzz, process as rf_process
+    from rapidfuzz.utils import default_process
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+    from fuzzywuzzy import fuzz, process
+
+logger = logging.getLogger(__name__)
+
+SkillMatch = Tuple[str, float]
+
+
+class SkillMatcher:
+    """מאמת כישורים שנבנה פעם אחת מתוך verified_skills
+
+    לכל כישור גולמי מוחזרת רשימת (canonical_skill, confidence) באותה
+    סמנטיקה של enrich_skills: מעבר על הקטגוריות לפי הסדר, התאמה מדויקת
+    עוצרת (ביטחון 1.0), ובכל קטגוריה בלי התאמה מדויקת נלקחת ההתאמה
+    הדומה ביותר אם הציון מעל הסף.
+    """
+
+    def __init__(self, verified_skills: Dict[str, List[str]], threshold: int = 80,
+                 aliases: Optional[Dict[str, str]] = None):
+        self.threshold = threshold
+        self.categories: List[List[str]] = [list(skills) for skills in verified_skills.values()]
+        self.aliases = {k.lower(): v for k, v in (aliases or {}).items()}
+
+        # הקטגוריה הראשונה שמכילה כל כישור - חיפוש מדויק ב-O(1)
+        self.exact_category: Dict[str, int] = {}
+        for idx, skills in enumerate(self.categories):
+            for skill in skills:
+                self.exact_category.setdefault(skill, idx)
+
+        # כל הבחירות בוקטור אחד + גבולות הקטגוריות לחיתוך המטריצה
+        self.choices: List[str] = [skill for skills in self.categories for skill in skills]
+        self.bounds: List[Tuple[int, int]] = []
+        start = 0
+        for skills in self.categories:
+            self.bounds.append((start, start + len(skills)))
+            start += len(skills)
+
+        self._cache: Dict[str, Tuple[SkillMatch, ...]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _exact_index(self, skill_lower: str) -> Optional[int]:
+        return self.exact_category.get(self.aliases.get(skill_lower, skill_lower))
+
+    def _resolve(self, raw: str, best_per_category: List[Tuple[str, int]]) -> Tuple[SkillMatch, ...]:
+        """בניית התוצאה מהציון הטוב ביותר בכל קטגוריה"""
+        skill_lower = raw.lower()
+        exact_idx = self._exact_index(skill_lower)
+        results = []
+        for idx in range(len(self.categories)):
+            if idx == exact_idx:
+                canonical = raw if skill_lower in self.exact_category else self.aliases[skill_lower]
+                results.append((canonical, 1.0))
+                break
+            choice, score = best_per_category[idx]
+            if score > self.threshold:
+                results.append((choice, score / 100.0))
+        return tuple(results)
+
+    def _needs_fuzzy(self, raw: str) -> bool:
+        # התאמה מדויקת בקטגוריה הראשונה - אין צורך בחישוב fuzzy
+        return self._exact_index(raw.lower()) != 0
+
+    def prepare(self, raw_skills: Iterable[str]) -> int:
+        """חישוב מרוכז לכל הכישורים הייחודיים שעוד לא נראו (למשל כל הכישורים בקובץ)"""
+        pending = []
+        seen = set()
+        for raw in raw_skills:
+            if raw not in self._cache and raw not in seen:
+                seen.add(raw)
+                pending.append(raw)
+        if not pending:
+            return 0
+
+        fuzzy = [raw for raw in pending if self._needs_fuzzy(raw)]
+        for raw in pending:
+            if not self._needs_fuzzy(raw):
+                self._cache[raw] = self._resolve(raw, [])
+
+        if fuzzy:
+            for raw, best in zip(fuzzy, self._best_per_category([raw.lower() for raw in fuzzy])):
+                self._cache[raw] = self._resolve(raw, best)
+
+        return len(pending)
+
+    def _best_per_category(self, queries: List[str]) -> List[List[Tuple[str, int]]]:
+        """ההתאמה הטובה ביותר בכל קטגוריה לכל שאילתה"""
+        if HAS_RAPIDFUZZ:
+            # מטריצת cdist אחת לכל השאילתות מול כל הבחירות
+            scores = rf_process.cdist(
+                queries, self.choices,
+                scorer=rf_fuzz.ratio,
+                processor=default_process,
+                dtype=np.float64,
+                workers=-1
+            )
+            results = []
+            for row in scores:
+                best = []
+                for start, end in self.bounds:
+                    # argmax מחזיר את הראשון מבין השווים - כמו extractOne
+                    pos = start + int(np.argmax(row[start:end]))
+                    best.append((self.choices[pos], int(round(row[pos]))))
+                results.append(best)
+            return results
+
+        results = []
+        for query in queries:
+            best = []
+            for skills in self.categories:
+                match = process.extractOne(query, skills, scorer=fuzz.ratio)
+                best.append(match if match else ('', 0))
+            results.append(best)
+        return results
+
+    def lookup(self, raw: str) -> Tuple[SkillMatch, ...]:
+        """כל ההתאמות לכישור גולמי (עם memoization)"""
+        cached = self._cache.get(raw)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        self.prepare([raw])
+        return self._cache[raw]
+
+    def match(self, raw: str) -> Optional[SkillMatch]:
+        """ההתאמה הטובה ביותר לכישור גולמי: (canonical_skill, confidence)"""
+        matches = self.lookup(raw)
+        if not matches:
+            return None
+        return max(matches, key=lambda m: m[1])
+
+    def stats(self) -> Dict[str, int]:
+        """סטטיסטיקות מטמון"""
+        return {
+            'cached_skills': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
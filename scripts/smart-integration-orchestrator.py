@@ -19,6 +19,10 @@ import time
 from dataclasses import dataclass, asdict
 import subprocess
 
+from candidate_normalize import ORCHESTRATOR_SENIORITY
+from github_enrichment import GITHUB_HOURLY_LIMIT
+from serialization import dump
+
 # הגדרת לוגינג
 logging.basicConfig(
     level=logging.INFO,
@@ -113,7 +117,7 @@ class SmartIntegrationOrchestrator:
                 'current_usage': 0
             },
             'github': {
-                'hourly_limit': 5000,
+                'hourly_limit': GITHUB_HOURLY_LIMIT,
                 'current_usage': 0
             },
             'openai': {
@@ -392,18 +396,7 @@ class SmartIntegrationOrchestrator:
         
     def extract_seniority(self, title: str) -> str:
         """חילוץ רמת בכירות מתואר"""
-        title_lower = title.lower()
-        
-        if any(word in title_lower for word in ['cto', 'ceo', 'vp', 'chief']):
-            return 'executive'
-        elif any(word in title_lower for word in ['director', 'head of', 'manager']):
-            return 'management'
-        elif any(word in title_lower for word in ['senior', 'lead', 'principal']):
-            return 'senior'
-        elif any(word in title_lower for word in ['junior', 'intern']):
-            return 'junior'
-        else:
-            return 'mid-level'
+        return ORCHESTRATOR_SENIORITY(title)
             
     def update_tags_and_categories(self, connections: Dict):
         """עדכון תיוגים וקטגוריות"""
@@ -424,9 +417,8 @@ class SmartIntegrationOrchestrator:
         """שמירה למאגר החכם"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # שמירת קשרים
-        with open(f"{self.database_path}connections_{timestamp}.json", 'w', encoding='utf-8') as f:
-            json.dump(connections, f, ensure_ascii=False, indent=2)
+        # שמירת קשרים - קומפקטי, זה קובץ הנתונים הגדול של הריצה
+        dump(connections, f"{self.database_path}connections_{timestamp}.json")
             
         # עדכון אינדקס ראשי
         await self.update_master_index(connections)
@@ -461,8 +453,7 @@ class SmartIntegrationOrchestrator:
         master_index['last_updated'] = datetime.now().isoformat()
         
         # שמירה
-        with open(index_file, 'w', encoding='utf-8') as f:
-            json.dump(master_index, f, ensure_ascii=False, indent=2)
+        dump(master_index, index_file)
             
     def generate_smart_recommendations(self, connections: Dict) -> List[Dict]:
         """יצירת המלצות חכמות"""
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Write-Ahead Log Benchmark
+בנצ'מרק ליומן ה-WAL של האינטגרציה - תפוקת append עם group commit מול שמירה מלאה
+של המאגר אחרי כל רשומה, ושחזור אחרי קריסה: ריצה שנקטעת באמצע קובץ, ריצה שמשחזרת
+וממשיכה, והשוואה של המאגר הסופי לריצה שלא קרסה
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from candidate_store import CandidateStore
+from candidate_wal import WriteAheadLog
+from integration_benchmark import DEFAULT_SEED, _load_integrator_class, generate_dataset
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROWS = 20000
+DEFAULT_CHUNK_SIZE = 1000
+# כמה שמירות מלאות למדוד (כל אחת כותבת את כל המאגר)
+FULL_SAVE_SAMPLES = 5
+CRASH_EXIT_CODE = 17
+_TIMESTAMP_FIELDS = ('created_at', 'updated_at')
+
+
+def _quiet():
+    """לוג שקט בזמן המדידה - הלוג של כל מיזוג עולה יותר מהמיזוג עצמו"""
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _integrate(work_dir: str, data_file: str, chunk_size: int, checkpoint_ops: int,
+               crash_after_rows: int = 0) -> None:
+    """ריצת אינטגרציה בתיקייה - עם crash_after_rows התהליך נהרג אחרי מנה (בלי שמירה)"""
+    os.chdir(work_dir)
+    _quiet()
+    integrator_class = _load_integrator_class()
+
+    class CrashingIntegrator(integrator_class):
+        def checkpoint_if_due(self):
+            if crash_after_rows and self.rows_processed >= crash_after_rows:
+                # הקבוצה האחרונה נכתבת כמו ב-group commit שהספיק לפני הקריסה
+                self.wal.sync()
+                os._exit(CRASH_EXIT_CODE)
+            super().checkpoint_if_due()
+
+    integrator = CrashingIntegrator(wal_checkpoint_ops=checkpoint_ops)
+    integrator.integrate_files([data_file], chunk_size=chunk_size)
+    integrator.save_database()
+
+
+def _comparable_state(store_path: str) -> Dict[str, Dict]:
+    """המצב השמור בלי חותמות זמן, ורשימות ממוינות (סדר set משתנה בין תהליכים)"""
+    state = {}
+    for candidate_id, record in CandidateStore(store_path).load().items():
+        state[candidate_id] = {
+            field: sorted(value) if isinstance(value, list) else value
+            for field, value in record.items()
+            if field not in _TIMESTAMP_FIELDS
+        }
+    return state
+
+
+def _run_process(target, *args) -> int:
+    process = multiprocessing.Process(target=target, args=args)
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+def benchmark_append(records: List[Dict], work_dir: str) -> Dict:
+    """פעולות/שנייה: WAL עם group commit מול שמירה מלאה אחרי כל רשומה"""
+    wal = WriteAheadLog(os.path.join(work_dir, 'bench_wal.log'))
+    started = time.perf_counter()
+    for record in records:
+        wal.put(record)
+    wal.close()
+    wal_seconds = time.perf_counter() - started
+
+    store = CandidateStore(os.path.join(work_dir, 'full_save_store'))
+    started = time.perf_counter()
+    for _ in range(FULL_SAVE_SAMPLES):
+        store.compact(records)
+    full_save_seconds = (time.perf_counter() - started) / FULL_SAVE_SAMPLES
+
+    wal_ops = len(records) / wal_seconds if wal_seconds > 0 else None
+    full_save_ops = 1 / full_save_seconds if full_save_seconds > 0 else None
+    return {
+        'records': len(records),
+        'wal_seconds': round(wal_seconds, 3),
+        'wal_ops_per_second': round(wal_ops, 1) if wal_ops else None,
+        'wal': wal.stats(),
+        'full_save_seconds': round(full_save_seconds, 3),
+        'full_save_ops_per_second': round(full_save_ops, 3) if full_save_ops else None,
+        'speedup': round(wal_ops / full_save_ops, 1) if wal_ops and full_save_ops else None
+    }
+
+
+def benchmark_recovery(rows: int = DEFAULT_ROWS, seed: int = DEFAULT_SEED,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, crash_fraction: float = 0.6) -> Dict:
+    """קריסה אחרי crash_fraction מהשורות, שחזור והמשך - והשוואה לריצה נקייה"""
+    root = tempfile.mkdtemp(prefix='wal_benchmark_')
+    previous_cwd = os.getcwd()
+    root_level = logging.getLogger().level
+    _quiet()
+    try:
+        data_file = os.path.join(root, f'candidates_multi_platform_wal_{rows}.csv')
+        dataset = generate_dataset(data_file, rows, seed)
+        clean_dir, crash_dir = os.path.join(root, 'clean'), os.path.join(root, 'crash')
+        os.makedirs(clean_dir)
+        os.makedirs(crash_dir)
+        # checkpoint לפני הקריסה ועוד זנב ביומן - השחזור הוא snapshot + החלת הזנב
+        checkpoint_ops = max(1, int(rows * crash_fraction * 0.4))
+        crash_after = int(rows * crash_fraction)
+
+        started = time.perf_counter()
+        _run_process(_integrate, clean_dir, data_file, chunk_size, checkpoint_ops)
+        clean_seconds = time.perf_counter() - started
+
+        exit_code = _run_process(_integrate, crash_dir, data_file, chunk_size, checkpoint_ops, crash_after)
+        wal_path = os.path.join(crash_dir, 'candidates_master_db', 'merge_wal.log')
+        wal_bytes = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+
+        # השחזור: טעינת המאגר + החלת היומן, ואז המשך הקובץ מהשורה הבאה
+        os.chdir(crash_dir)
+        integrator_class = _load_integrator_class()
+        started = time.perf_counter()
+        integrator = integrator_class(wal_checkpoint_ops=checkpoint_ops)
+        restart_seconds = time.perf_counter() - started
+        recovery = integrator.wal_recovery
+        started = time.perf_counter()
+        integrator.integrate_files([data_file], chunk_size=chunk_size)
+        resumed_rows = integrator.rows_processed
+        integrator.save_database()
+        resume_seconds = time.perf_counter() - started
+        os.chdir(previous_cwd)
+
+        clean_state = _comparable_state(os.path.join(clean_dir, 'candidates_master_db'))
+        recovered_state = _comparable_state(os.path.join(crash_dir, 'candidates_master_db'))
+        records = list(CandidateStore(os.path.join(clean_dir, 'candidates_master_db')).load().values())
+        return {
+            'rows': rows,
+            'dataset': dataset,
+            'chunk_size': chunk_size,
+            'checkpoint_ops': checkpoint_ops,
+            'crash_after_rows': crash_after,
+            'crash_exit_code': exit_code,
+            'clean_run_seconds': round(clean_seconds, 3),
+            'wal_bytes_at_crash': wal_bytes,
+            'recovery': recovery,
+            'restart_seconds': round(restart_seconds, 3),
+            'resumed_rows': resumed_rows,
+            'resume_seconds': round(resume_seconds, 3),
+            'candidates': len(clean_state),
+            'identical_to_clean_run': clean_state == recovered_state,
+            'append': benchmark_append(records, root)
+        }
+    finally:
+        os.chdir(previous_cwd)
+        logging.getLogger().setLevel(root_level)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    """python wal_benchmark.py [שורות] [seed]"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SEED
+    result = benchmark_recovery(rows, seed)
+    append = result['append']
+    logger.info(
+        f"WAL append: {append['wal_ops_per_second']:.0f} ops/s vs full save {append['full_save_ops_per_second']:.2f} "
+        f"ops/s ({append['speedup']:.0f}x); restart with replay {result['restart_seconds']:.2f}s, "
+        f"{result['resumed_rows']} rows re-read, identical to clean run: {result['identical_to_clean_run']}"
+    )
+
+    output = {
+        'benchmark': 'write_ahead_log',
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        **result
+    }
+    output_file = f'wal_benchmark_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    logger.info(f"Benchmark saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()